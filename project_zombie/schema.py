@@ -0,0 +1,92 @@
+"""
+OpenAPI schema serving.
+
+The schema is prebuilt by the ``generate_openapi_schema`` command and served
+from that artifact, falling back to generating it once per schema version.
+The Swagger UI page loads it from there as well.
+drf_yasg is imported on first use so it does not slow down worker startup.
+"""
+
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse
+
+
+SCHEMA_FORMAT = "openapi"
+SCHEMA_CONTENT_TYPE = "application/openapi+json"
+
+# (schema version, artifact mtime) -> schema content
+_schema_cache = {}
+
+
+@lru_cache(maxsize=None)
+def get_schema_info():
+    from drf_yasg import openapi
+
+    return openapi.Info(
+        title="Project Zombie API",
+        default_version="v1",
+    )
+
+
+@lru_cache(maxsize=None)
+def get_schema_view():
+    from drf_yasg.views import get_schema_view
+    from rest_framework import permissions
+
+    return get_schema_view(
+        get_schema_info(),
+        public=True,
+        permission_classes=[permissions.AllowAny],
+    )
+
+
+def get_schema_path(version=None):
+    version = version or settings.OPENAPI_SCHEMA_VERSION
+    return Path(settings.OPENAPI_SCHEMA_DIR) / f"openapi-{version}.json"
+
+
+def generate_schema():
+    from drf_yasg.codecs import OpenAPICodecJson
+
+    # No host is emitted, so clients resolve paths against the serving host.
+    generator = get_schema_view().generator_class(get_schema_info(), url="")
+    schema = generator.get_schema(request=None, public=True)
+    return OpenAPICodecJson(validators=[]).encode(schema)
+
+
+def get_schema_content():
+    path = get_schema_path()
+    try:
+        mtime = path.stat().st_mtime_ns
+    except FileNotFoundError:
+        mtime = None
+
+    key = (settings.OPENAPI_SCHEMA_VERSION, mtime)
+    if key not in _schema_cache:
+        content = path.read_bytes() if mtime is not None else generate_schema()
+        _schema_cache.clear()
+        _schema_cache[key] = content
+    return _schema_cache[key]
+
+
+def render_swagger_ui(request):
+    from drf_yasg import openapi
+    from drf_yasg.renderers import SwaggerUIRenderer
+
+    # The page only shows the schema info: swagger-ui fetches the document
+    # itself from `?format=openapi`, so the API is not introspected here.
+    swagger = openapi.Swagger(
+        info=get_schema_info(), _prefix="/", paths=openapi.Paths({})
+    )
+    renderer = SwaggerUIRenderer()
+    content = renderer.render(swagger, renderer_context={"request": request})
+    return HttpResponse(content, content_type=f"{renderer.media_type}; charset=utf-8")
+
+
+def swagger_view(request):
+    if request.GET.get("format") == SCHEMA_FORMAT:
+        return HttpResponse(get_schema_content(), content_type=SCHEMA_CONTENT_TYPE)
+    return render_swagger_ui(request)
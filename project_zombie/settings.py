@@ -20,6 +20,11 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 STATIC_URL = "/static/"
 STATIC_ROOT = os.path.join(BASE_DIR, "staticfiles")
 
+# Built by `python manage.py generate_openapi_schema`; bump the version to
+# invalidate cached schemas after API changes.
+OPENAPI_SCHEMA_VERSION = os.getenv("OPENAPI_SCHEMA_VERSION", "v1")
+OPENAPI_SCHEMA_DIR = os.path.join(BASE_DIR, "openapi")
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.1/howto/deployment/checklist/
@@ -42,6 +47,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "corsheaders",
     "rest_framework",
     "drf_yasg",
@@ -58,6 +64,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "utils.middleware.PrimaryStickinessMiddleware",
 ]
 
 CORS_ORIGIN_WHITELIST = ["http://localhost:3000", "http://localhost:8000"]
@@ -83,11 +90,9 @@ TEMPLATES = [
 WSGI_APPLICATION = "project_zombie.wsgi.application"
 
 
-DATABASE_URL = os.getenv("DATABASE_URL")
-url = urlparse(DATABASE_URL)
-
-DATABASES = {
-    "default": {
+def parse_database_url(database_url):
+    url = urlparse(database_url)
+    return {
         "ENGINE": "django.db.backends.postgresql",
         "NAME": url.path[1:],  # Removing leading slash
         "USER": url.username,
@@ -95,6 +100,140 @@ DATABASES = {
         "HOST": url.hostname,
         "PORT": url.port,
     }
+
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+DATABASE_REPLICA_URLS = [
+    u for u in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if u.strip()
+]
+
+DATABASES = {"default": parse_database_url(DATABASE_URL)}
+for i, replica_url in enumerate(DATABASE_REPLICA_URLS, start=1):
+    DATABASES[f"replica_{i}"] = {
+        **parse_database_url(replica_url.strip()),
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_ROUTERS = ["utils.routers.PrimaryReplicaRouter"]
+
+# Skips the `stress` tagged tests unless requested with `--tag stress`.
+TEST_RUNNER = "utils.testing.TestRunner"
+
+# Replicas lagging behind the primary by more than this are skipped.
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+REPLICA_LAG_CHECK_INTERVAL_SECONDS = float(
+    os.getenv("REPLICA_LAG_CHECK_INTERVAL_SECONDS", "1")
+)
+# Clients that just wrote read from the primary for this long.
+REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", "10"))
+REPLICA_STICKY_COOKIE_NAME = "use_primary_db"
+
+# Post-commit background tasks, see `utils.tasks`. With the default memory
+# broker, tasks run in-process right after the transaction commits.
+TASKS_BROKER_URL = os.getenv("TASKS_BROKER_URL", "memory://")
+TASKS_QUEUE = "project_zombie.tasks"
+TASKS_MAX_RETRIES = int(os.getenv("TASKS_MAX_RETRIES", "3"))
+TASKS_BATCH_SIZE = int(os.getenv("TASKS_BATCH_SIZE", "100"))
+
+# Dashboards are shared by all worker processes only with a Redis
+# `CACHE_URL`, e.g. `redis://redis:6379/1`.
+CACHE_URL = os.getenv("CACHE_URL")
+CACHES = {
+    "default": (
+        {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_URL,
+        }
+        if CACHE_URL
+        else {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    )
+}
+SURVIVOR_DASHBOARD_CACHE_TIMEOUT = int(
+    os.getenv("SURVIVOR_DASHBOARD_CACHE_TIMEOUT", "300")
+)
+
+# Rendered inventories are cached by each worker process, up to this size
+# and for up to `INVENTORY_CACHE_TIMEOUT` seconds, and invalidated through
+# generation counters shared by all of them.
+INVENTORY_CACHE_MAX_BYTES = int(
+    os.getenv("INVENTORY_CACHE_MAX_BYTES", str(32 * 1024 * 1024))
+)
+INVENTORY_CACHE_TIMEOUT = int(os.getenv("INVENTORY_CACHE_TIMEOUT", "300"))
+GENERATIONS_STORE_PATH = os.getenv(
+    "GENERATIONS_STORE_PATH",
+    (
+        "/dev/shm/project_zombie_generations"
+        if os.path.isdir("/dev/shm")
+        else os.path.join(BASE_DIR, ".generations")
+    ),
+)
+GENERATIONS_STORE_SLOTS = int(os.getenv("GENERATIONS_STORE_SLOTS", "262144"))
+
+# Size, in degrees, of the grid cells zones are indexed by.
+ZONE_GRID_CELL_SIZE = float(os.getenv("ZONE_GRID_CELL_SIZE", "0.1"))
+
+# Heatmap tiles are split in `HEATMAP_TILE_SIZE` x `HEATMAP_TILE_SIZE` cells
+# and cached by each worker process for up to `HEATMAP_CACHE_TIMEOUT` seconds.
+# Location logs invalidate the tiles from `HEATMAP_MIN_INVALIDATED_ZOOM` up.
+HEATMAP_TILE_SIZE = int(os.getenv("HEATMAP_TILE_SIZE", "32"))
+HEATMAP_MAX_ZOOM = int(os.getenv("HEATMAP_MAX_ZOOM", "16"))
+HEATMAP_MIN_INVALIDATED_ZOOM = int(os.getenv("HEATMAP_MIN_INVALIDATED_ZOOM", "6"))
+HEATMAP_CACHE_TIMEOUT = int(os.getenv("HEATMAP_CACHE_TIMEOUT", "60"))
+HEATMAP_CACHE_MAX_BYTES = int(
+    os.getenv("HEATMAP_CACHE_MAX_BYTES", str(16 * 1024 * 1024))
+)
+
+# Healthy survivors are exposed to infected ones located within the last
+# `INFECTION_RISK_WINDOW_HOURS`, weighted by exp(-(distance / radius)²).
+INFECTION_RISK_RADIUS_KM = float(os.getenv("INFECTION_RISK_RADIUS_KM", "0.5"))
+INFECTION_RISK_WINDOW_HOURS = int(os.getenv("INFECTION_RISK_WINDOW_HOURS", "72"))
+
+# Survivors located within the last `GROUPS_WINDOW_MINUTES` are grouped,
+# DBSCAN-style, when at least `GROUPS_MIN_SURVIVORS` are within
+# `GROUPS_DISTANCE_KM` of one of them. Changing the distance requires
+# `cluster_survivor_groups --full`.
+GROUPS_DISTANCE_KM = float(os.getenv("GROUPS_DISTANCE_KM", "0.05"))
+GROUPS_MIN_SURVIVORS = int(os.getenv("GROUPS_MIN_SURVIVORS", "3"))
+GROUPS_WINDOW_MINUTES = int(os.getenv("GROUPS_WINDOW_MINUTES", "30"))
+
+# Trade partners are searched around a survivor within growing radii, from
+# `TRADE_PARTNERS_MIN_RADIUS_KM` up to `TRADE_PARTNERS_MAX_RADIUS_KM`.
+TRADE_PARTNERS_MIN_RADIUS_KM = float(os.getenv("TRADE_PARTNERS_MIN_RADIUS_KM", "1"))
+TRADE_PARTNERS_MAX_RADIUS_KM = float(os.getenv("TRADE_PARTNERS_MAX_RADIUS_KM", "256"))
+
+# Location logs older than `LOCATION_LOGS_ARCHIVE_AFTER_DAYS` are moved by
+# `archive_location_logs` into compressed segment files of up to
+# `LOCATION_LOGS_ARCHIVE_SEGMENT_ROWS` rows, see `survivors.archive`.
+LOCATION_LOGS_ARCHIVE_DIR = os.getenv(
+    "LOCATION_LOGS_ARCHIVE_DIR", os.path.join(BASE_DIR, "archive", "location_logs")
+)
+LOCATION_LOGS_ARCHIVE_AFTER_DAYS = int(
+    os.getenv("LOCATION_LOGS_ARCHIVE_AFTER_DAYS", "90")
+)
+LOCATION_LOGS_ARCHIVE_SEGMENT_ROWS = int(
+    os.getenv("LOCATION_LOGS_ARCHIVE_SEGMENT_ROWS", "100000")
+)
+
+# Token buckets shared by all worker processes, see `utils.throttling`. Rates
+# are in requests per second, bursts in requests.
+THROTTLE_STORE_PATH = os.getenv(
+    "THROTTLE_STORE_PATH",
+    (
+        "/dev/shm/project_zombie_throttle"
+        if os.path.isdir("/dev/shm")
+        else os.path.join(BASE_DIR, ".throttle")
+    ),
+)
+THROTTLE_STORE_SLOTS = int(os.getenv("THROTTLE_STORE_SLOTS", "65536"))
+THROTTLE_BUCKETS = {
+    "location_logs_survivor": {
+        "rate": float(os.getenv("LOCATION_LOGS_SURVIVOR_RATE", "0.2")),
+        "burst": int(os.getenv("LOCATION_LOGS_SURVIVOR_BURST", "5")),
+    },
+    "location_logs_client": {
+        "rate": float(os.getenv("LOCATION_LOGS_CLIENT_RATE", "20")),
+        "burst": int(os.getenv("LOCATION_LOGS_CLIENT_BURST", "100")),
+    },
 }
 
 
@@ -0,0 +1,66 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from . import schema
+
+
+class OpenAPISchemaTestCase(APITestCase):
+    def setUp(self):
+        schema._schema_cache.clear()
+        self.schema_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.schema_dir.cleanup)
+        settings_override = override_settings(
+            OPENAPI_SCHEMA_DIR=self.schema_dir.name, OPENAPI_SCHEMA_VERSION="v1"
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def get_schema(self):
+        response = self.client.get(reverse("schema-swagger-ui"), {"format": "openapi"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return json.loads(response.content)
+
+    def test_generated_schema_is_served(self):
+        call_command("generate_openapi_schema", stdout=StringIO())
+        path = Path(self.schema_dir.name) / "openapi-v1.json"
+        self.assertTrue(path.exists())
+
+        data = json.loads(path.read_bytes())
+        data["info"]["title"] = "Prebuilt"
+        path.write_text(json.dumps(data))
+
+        self.assertEqual(self.get_schema()["info"]["title"], "Prebuilt")
+
+    def test_schema_is_generated_without_artifact(self):
+        data = self.get_schema()
+
+        self.assertIn("/survivors/", data["paths"])
+        self.assertNotIn("host", data)
+
+    def test_schema_version_bump_invalidates_cache(self):
+        path = Path(self.schema_dir.name) / "openapi-v2.json"
+        path.write_text(json.dumps({"info": {"title": "Next"}}))
+        self.assertNotEqual(self.get_schema()["info"]["title"], "Next")
+
+        with self.settings(OPENAPI_SCHEMA_VERSION="v2"):
+            self.assertEqual(self.get_schema()["info"]["title"], "Next")
+
+    def test_swagger_ui(self):
+        with mock.patch.object(
+            schema.get_schema_view().generator_class, "get_schema"
+        ) as get_schema:
+            response = self.client.get(reverse("schema-swagger-ui"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertContains(response, "swagger")
+        self.assertContains(response, "Project Zombie API")
+        get_schema.assert_not_called()
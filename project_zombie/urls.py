@@ -19,28 +19,13 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
-from rest_framework import permissions
 
-
-schema_view = get_schema_view(
-    openapi.Info(
-        title="Project Zombie API",
-        default_version="v1",
-    ),
-    public=True,
-    permission_classes=[permissions.AllowAny],
-)
+from .schema import swagger_view
 
 
 urlpatterns = [
     path("admin/", admin.site.urls),
-    path(
-        "swagger/",
-        schema_view.with_ui("swagger", cache_timeout=0),
-        name="schema-swagger-ui",
-    ),
+    path("swagger/", swagger_view, name="schema-swagger-ui"),
     path("survivors/", include("survivors.urls")),
     path("resources/", include("resources.urls")),
 ] + static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
@@ -1,6 +1,12 @@
 from django.contrib import admin
 
-from .models import Resource
+from .models import Resource, ResourceTradeVolume
 
 
 admin.site.register(Resource)
+
+
+@admin.register(ResourceTradeVolume)
+class ResourceTradeVolumeAdmin(admin.ModelAdmin):
+    list_display = ["resource", "bucket", "trade_count", "quantity", "turnover"]
+    list_filter = ["resource"]
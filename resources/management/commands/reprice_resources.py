@@ -0,0 +1,40 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from resources.models import Resource
+from resources.pricing import (
+    DEMAND_WINDOW,
+    ELASTICITY,
+    MAX_PRICE_CHANGE,
+    reprice_resources,
+)
+
+
+class Command(BaseCommand):
+    help = "Reprices resources from their supply and recent trade demand."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--window-hours",
+            type=float,
+            default=DEMAND_WINDOW.total_seconds() / 3600,
+            help="Trade activity window used as demand.",
+        )
+        parser.add_argument("--elasticity", type=float, default=ELASTICITY)
+        parser.add_argument(
+            "--max-change",
+            type=float,
+            default=MAX_PRICE_CHANGE,
+            help="Maximum relative price change per run.",
+        )
+
+    def handle(self, *args, **options):
+        prices = reprice_resources(
+            window=timedelta(hours=options["window_hours"]),
+            elasticity=options["elasticity"],
+            max_change=options["max_change"],
+        )
+        names = dict(Resource.objects.values_list("id", "name"))
+        for resource_id, (old, new) in prices.items():
+            self.stdout.write(f"{names[resource_id]}: {old} -> {new}")
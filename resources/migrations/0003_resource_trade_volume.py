@@ -0,0 +1,49 @@
+# Generated by Django 5.1 on 2026-10-19 02:38
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("resources", "0002_alter_resource_name"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ResourceTradeVolume",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("bucket", models.DateTimeField()),
+                ("trade_count", models.IntegerField(default=0)),
+                ("quantity", models.BigIntegerField(default=0)),
+                (
+                    "turnover",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0.0"), max_digits=14
+                    ),
+                ),
+                (
+                    "resource",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="trade_volumes",
+                        to="resources.resource",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("resource", "bucket")},
+            },
+        ),
+    ]
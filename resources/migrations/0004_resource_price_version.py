@@ -0,0 +1,18 @@
+# Generated by Django 5.1 on 2026-10-19 02:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("resources", "0003_resource_trade_volume"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="resource",
+            name="price_version",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
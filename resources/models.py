@@ -8,6 +8,27 @@ from utils.models import BaseModel
 class Resource(BaseModel):
     name = models.CharField(max_length=255, unique=True)
     price = models.DecimalField(default=Decimal("0.0"), max_digits=5, decimal_places=2)
+    # Bumped for all resources whenever prices are republished.
+    price_version = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return self.name
+
+
+class ResourceTradeVolume(models.Model):
+    """
+    Hourly rollup of traded quantities, maintained incrementally on each trade.
+    """
+
+    resource = models.ForeignKey(
+        Resource, on_delete=models.CASCADE, related_name="trade_volumes"
+    )
+    bucket = models.DateTimeField()
+    trade_count = models.IntegerField(default=0)
+    quantity = models.BigIntegerField(default=0)
+    turnover = models.DecimalField(
+        default=Decimal("0.0"), max_digits=14, decimal_places=2
+    )
+
+    class Meta:
+        unique_together = ["resource", "bucket"]
@@ -0,0 +1,108 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import Resource, ResourceTradeVolume
+from .signals import prices_changed
+from survivors.models import InventoryItem
+
+
+DEMAND_WINDOW = timedelta(hours=24)
+ELASTICITY = 0.5
+MAX_PRICE_CHANGE = 0.1
+MIN_PRICE = 0.01
+MAX_PRICE = 999.99
+
+_PUBLISH_PRICES_SQL = f"""
+    UPDATE {Resource._meta.db_table} AS resource
+    SET price = new.price, price_version = %s, updated_at = NOW()
+    FROM unnest(%s::bigint[], %s::numeric[]) AS new(id, price)
+    WHERE resource.id = new.id
+"""
+
+
+def compute_prices(
+    prices, supply, demand, elasticity=ELASTICITY, max_change=MAX_PRICE_CHANGE
+):
+    """
+    Scale `prices` by how each resource's share of recent demand compares to
+    its share of supply, changing no price by more than `max_change`.
+    """
+    supply_share = (supply + 1) / (supply + 1).sum()
+    demand_share = (demand + 1) / (demand + 1).sum()
+    factors = np.clip(
+        (demand_share / supply_share) ** elasticity, 1 - max_change, 1 + max_change
+    )
+    return np.clip(np.round(prices * factors, 2), MIN_PRICE, MAX_PRICE)
+
+
+def get_supply_and_demand(resource_ids, since):
+    supply = dict(
+        InventoryItem.objects.filter(owner__is_infected=False)
+        .values("resource_id")
+        .annotate(quantity=Sum("quantity"))
+        .values_list("resource_id", "quantity")
+    )
+    demand = dict(
+        ResourceTradeVolume.objects.filter(bucket__gte=since)
+        .values("resource_id")
+        .annotate(quantity=Sum("quantity"))
+        .values_list("resource_id", "quantity")
+    )
+    return (
+        np.array([supply.get(pk, 0) for pk in resource_ids], dtype=np.float64),
+        np.array([demand.get(pk, 0) for pk in resource_ids], dtype=np.float64),
+    )
+
+
+def reprice_resources(
+    window=DEMAND_WINDOW, elasticity=ELASTICITY, max_change=MAX_PRICE_CHANGE
+):
+    """
+    Reprice all resources from current supply and recent trade demand.
+
+    New prices are published in a single UPDATE together with a new
+    `price_version`, while resources are locked, so trades validated against
+    older prices fail instead of mixing both. Return `{id: (old, new)}`.
+    """
+    resource_ids = list(Resource.objects.order_by("id").values_list("id", flat=True))
+    supply, demand = get_supply_and_demand(resource_ids, timezone.now() - window)
+
+    with transaction.atomic():
+        resources = list(
+            Resource.objects.select_for_update()
+            .filter(id__in=resource_ids)
+            .order_by("id")
+            .values_list("id", "price", "price_version")
+        )
+        if not resources:
+            return {}
+        ids, old_prices, versions = zip(*resources)
+        # Resources created meanwhile are not priced, deleted ones are skipped.
+        index = {pk: position for position, pk in enumerate(resource_ids)}
+        positions = [index[pk] for pk in ids]
+
+        new_prices = compute_prices(
+            np.array(old_prices, dtype=np.float64),
+            supply[positions],
+            demand[positions],
+            elasticity=elasticity,
+            max_change=max_change,
+        )
+        new_prices = [Decimal(f"{price:.2f}") for price in new_prices]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                _PUBLISH_PRICES_SQL, [max(versions) + 1, list(ids), new_prices]
+            )
+
+        changed_ids = [
+            pk for pk, old, new in zip(ids, old_prices, new_prices) if old != new
+        ]
+        if changed_ids:
+            prices_changed.send(sender=Resource, resource_ids=changed_ids)
+
+    return dict(zip(ids, zip(old_prices, new_prices)))
@@ -0,0 +1,52 @@
+from collections import defaultdict
+
+from django.db import connection
+
+from .models import ResourceTradeVolume
+
+
+# Rows are upserted in resource order. Otherwise two concurrent trades of the
+# same resources, listed in different orders, could each lock one resource's
+# bucket row and then wait for the other's.
+_INCREMENT_TRADE_VOLUME_SQL = f"""
+    INSERT INTO {ResourceTradeVolume._meta.db_table} AS volume
+        (resource_id, bucket, trade_count, quantity, turnover)
+    SELECT resource_id, %s, 1, quantity, turnover
+    FROM unnest(%s::bigint[], %s::bigint[], %s::numeric[])
+        AS item(resource_id, quantity, turnover)
+    ORDER BY resource_id
+    ON CONFLICT (resource_id, bucket) DO UPDATE SET
+        trade_count = volume.trade_count + EXCLUDED.trade_count,
+        quantity = volume.quantity + EXCLUDED.quantity,
+        turnover = volume.turnover + EXCLUDED.turnover
+"""
+
+
+def get_bucket(at):
+    return at.replace(minute=0, second=0, microsecond=0)
+
+
+def increment_trade_volume(items, at):
+    """
+    Add a trade of `(resource_id, quantity, price)` items made `at` to the
+    hourly rollups with a single upsert.
+    """
+    quantities = defaultdict(int)
+    turnovers = defaultdict(int)
+    for resource_id, quantity, price in items:
+        quantities[resource_id] += quantity
+        turnovers[resource_id] += quantity * price
+    if not quantities:
+        return
+
+    resource_ids = list(quantities)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            _INCREMENT_TRADE_VOLUME_SQL,
+            [
+                get_bucket(at),
+                resource_ids,
+                [quantities[resource_id] for resource_id in resource_ids],
+                [turnovers[resource_id] for resource_id in resource_ids],
+            ],
+        )
@@ -7,3 +7,20 @@ class ResourceSerializer(serializers.ModelSerializer):
     class Meta:
         model = Resource
         fields = ["id", "name", "price"]
+
+
+class TradeVolumeFilterSerializer(serializers.Serializer):
+    resource_id = serializers.IntegerField(required=False)
+    interval = serializers.ChoiceField(
+        choices=["hour", "day", "week", "month"], default="day"
+    )
+    since = serializers.DateTimeField(required=False)
+    until = serializers.DateTimeField(required=False)
+
+
+class TradeVolumeSerializer(serializers.Serializer):
+    resource_id = serializers.IntegerField()
+    bucket = serializers.DateTimeField()
+    trade_count = serializers.IntegerField()
+    quantity = serializers.IntegerField()
+    turnover = serializers.DecimalField(max_digits=14, decimal_places=2)
@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+
+# Sent with `resource_ids` after prices were republished in bulk.
+prices_changed = Signal()
@@ -1,9 +1,19 @@
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import numpy as np
+
 from django.urls import reverse
 from model_bakery import baker
 from rest_framework import status
 from rest_framework.test import APITestCase
 
-from .models import Resource
+from survivors.models import InventoryItem, Survivor
+
+from .models import Resource, ResourceTradeVolume
+from .pricing import compute_prices, reprice_resources
+from .rollups import increment_trade_volume
+from utils.testing import QueryBudgetMixin
 
 
 class ResourcesListAPIViewTestCase(APITestCase):
@@ -25,3 +35,172 @@ class ResourcesListAPIViewTestCase(APITestCase):
         ]
 
         self.assertListEqual(expected_data, res_data)
+
+
+class TradeVolumeListAPIViewTestCase(APITestCase):
+    @property
+    def url(self):
+        return reverse("resource-trade-volume")
+
+    def setUp(self):
+        self.resources = baker.make(Resource, _quantity=2)
+        for resource, hour, day in [
+            (self.resources[0], 1, 1),
+            (self.resources[0], 2, 1),
+            (self.resources[0], 1, 2),
+            (self.resources[1], 1, 1),
+        ]:
+            baker.make(
+                ResourceTradeVolume,
+                resource=resource,
+                bucket=datetime(2024, 1, day, hour, tzinfo=timezone.utc),
+                trade_count=1,
+                quantity=2,
+                turnover=3,
+            )
+
+    def test_get(self):
+        res = self.client.get(self.url, {"resource_id": self.resources[0].id})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        self.assertListEqual(
+            [
+                {
+                    "resource_id": self.resources[0].id,
+                    "bucket": f"2024-01-0{day}T00:00:00Z",
+                    "trade_count": count,
+                    "quantity": 2 * count,
+                    "turnover": f"{3 * count:.2f}",
+                }
+                for day, count in [(1, 2), (2, 1)]
+            ],
+            res.json(),
+        )
+
+    def test_get_hourly_since(self):
+        res = self.client.get(
+            self.url, {"interval": "hour", "since": "2024-01-01T02:00:00Z"}
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(
+            [
+                (self.resources[0].id, "2024-01-01T02:00:00Z"),
+                (self.resources[0].id, "2024-01-02T01:00:00Z"),
+            ],
+            [(row["resource_id"], row["bucket"]) for row in res.json()],
+        )
+
+    def test_get_invalid_interval(self):
+        res = self.client.get(self.url, {"interval": "year"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TradeVolumeRollupTestCase(APITestCase):
+    def test_upserted_in_resource_order(self):
+        resources = baker.make(Resource, _quantity=3)
+
+        increment_trade_volume(
+            [(resource.id, 1, Decimal("1.00")) for resource in reversed(resources)],
+            datetime(2024, 1, 1, 1, tzinfo=timezone.utc),
+        )
+
+        # Row ids follow the order in which rows were inserted, and locked.
+        self.assertEqual(
+            [resource.id for resource in resources],
+            list(
+                ResourceTradeVolume.objects.order_by("id").values_list(
+                    "resource_id", flat=True
+                )
+            ),
+        )
+
+
+class RepricingTestCase(APITestCase):
+    def test_compute_prices(self):
+        prices = compute_prices(
+            np.array([10.0, 10.0, 10.0, 0.01]),
+            supply=np.array([100, 10, 10, 100]),
+            demand=np.array([0, 0, 100, 0]),
+            max_change=0.9,
+        )
+
+        self.assertLess(prices[0], prices[1])
+        self.assertLess(prices[1], 10)
+        self.assertEqual(19, prices[2])
+        self.assertEqual(0.01, prices[3])
+
+    def test_reprice_resources(self):
+        water, food = baker.make(Resource, price=Decimal("10.00"), _quantity=2)
+        survivor = baker.make(Survivor)
+        baker.make(InventoryItem, owner=survivor, resource=water, quantity=100)
+        baker.make(InventoryItem, owner=survivor, resource=food, quantity=1)
+
+        prices = reprice_resources()
+
+        water.refresh_from_db()
+        food.refresh_from_db()
+        self.assertEqual(
+            {water.id: (10, water.price), food.id: (10, food.price)}, prices
+        )
+        self.assertLess(water.price, 10)
+        self.assertGreater(food.price, 10)
+        self.assertEqual((1, 1), (water.price_version, food.price_version))
+
+        survivor.refresh_from_db()
+        self.assertEqual(100 * water.price + food.price, survivor.wealth)
+
+
+class QueryBudgetTestCase(QueryBudgetMixin, APITestCase):
+    dataset_sizes = [1, 10, 50]
+    large_tables = [ResourceTradeVolume._meta.db_table]
+
+    def setUp(self):
+        self.resources = []
+
+    def grow_dataset(self, size):
+        """
+        Add resources, with a day of hourly trade volume rollups each, until
+        there are `size` of them.
+        """
+        resources = baker.make(Resource, _quantity=size - len(self.resources))
+        ResourceTradeVolume.objects.bulk_create(
+            ResourceTradeVolume(
+                resource=resource,
+                bucket=datetime(2024, 1, 1, tzinfo=timezone.utc)
+                + timedelta(hours=hour),
+                trade_count=1,
+                quantity=2,
+                turnover=3,
+            )
+            for resource in resources
+            for hour in range(24)
+        )
+        self.resources += resources
+
+    def get_requests(self):
+        trade_volume_url = reverse("resource-trade-volume")
+        return [
+            ("resources", 1, reverse("resources")),
+            ("trade volume", 1, trade_volume_url),
+            (
+                "trade volume of resource",
+                1,
+                f"{trade_volume_url}?resource_id={self.resources[0].id}&interval=day",
+            ),
+            (
+                "trade volume since",
+                1,
+                f"{trade_volume_url}?since=2024-01-01T12:00:00Z&interval=hour",
+            ),
+        ]
+
+    def test_query_budgets(self):
+        for size in self.dataset_sizes:
+            self.grow_dataset(size)
+            for name, budget, url in self.get_requests():
+                with self.subTest(size=size, endpoint=name):
+                    msg = f"{name} with {size} resources"
+                    with self.assertQueryBudget(budget, msg):
+                        res = self.client.get(url)
+                    self.assertEqual(res.status_code, status.HTTP_200_OK, msg)
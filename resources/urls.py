@@ -1,7 +1,10 @@
 from django.urls import path
-from .views import ResourcesListAPIView
+from .views import ResourcesListAPIView, TradeVolumeListAPIView
 
 
 urlpatterns = [
     path("", ResourcesListAPIView.as_view(), name="resources"),
+    path(
+        "trade-volume/", TradeVolumeListAPIView.as_view(), name="resource-trade-volume"
+    ),
 ]
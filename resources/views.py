@@ -1,11 +1,53 @@
+from django.db.models import F, Sum
+from django.db.models.functions import Trunc
 from rest_framework.generics import ListAPIView
 
-from .models import Resource
-from .serializers import ResourceSerializer
+from .models import Resource, ResourceTradeVolume
+from .serializers import (
+    ResourceSerializer,
+    TradeVolumeFilterSerializer,
+    TradeVolumeSerializer,
+)
+from utils.views import ReplicaReadMixin
 
 
-class ResourcesListAPIView(ListAPIView):
+class ResourcesListAPIView(ReplicaReadMixin, ListAPIView):
     serializer_class = ResourceSerializer
 
     def get_queryset(self):
         return Resource.objects.all()
+
+
+class TradeVolumeListAPIView(ReplicaReadMixin, ListAPIView):
+    """
+    Per-resource trade volume and turnover time series, aggregated from the
+    hourly rollups.
+    """
+
+    serializer_class = TradeVolumeSerializer
+
+    def get_queryset(self):
+        filters = TradeVolumeFilterSerializer(data=self.request.query_params.dict())
+        filters.is_valid(raise_exception=True)
+        params = filters.validated_data
+
+        queryset = ResourceTradeVolume.objects.all()
+        if "resource_id" in params:
+            queryset = queryset.filter(resource_id=params["resource_id"])
+        if "since" in params:
+            queryset = queryset.filter(bucket__gte=params["since"])
+        if "until" in params:
+            queryset = queryset.filter(bucket__lt=params["until"])
+
+        return (
+            queryset.values("resource_id", period=Trunc("bucket", params["interval"]))
+            .annotate(
+                trade_count=Sum("trade_count"),
+                quantity=Sum("quantity"),
+                turnover=Sum("turnover"),
+            )
+            .values(
+                "resource_id", "trade_count", "quantity", "turnover", bucket=F("period")
+            )
+            .order_by("resource_id", "period")
+        )
@@ -1,16 +1,138 @@
+import re
+
 from django.contrib import admin
 
 from .models import (
     Gender,
     InfectionReport,
     InventoryItem,
+    InventoryMovement,
+    InventorySnapshot,
     LocationLog,
     Survivor,
+    SurvivorGroup,
+    Trade,
+    TradeItem,
+    Zone,
 )
+from utils.admin import LargeTableAdmin, RecentCreatedAtFilter
+
+
+@admin.register(Gender)
+class GenderAdmin(admin.ModelAdmin):
+    list_display = ["id", "name"]
+    search_fields = ["name"]
+
+
+@admin.register(Survivor)
+class SurvivorAdmin(LargeTableAdmin):
+    list_display = [
+        "id",
+        "name",
+        "age",
+        "gender",
+        "is_infected",
+        "wealth",
+        "infection_risk",
+    ]
+    list_select_related = ["gender"]
+    list_filter = ["is_infected", RecentCreatedAtFilter]
+    search_fields = ["name"]
+    autocomplete_fields = ["gender"]
+    # Infections and wealth are derived state, see `infections` and `wealth`.
+    readonly_fields = ["is_infected", "wealth", "infection_risk"]
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        # Unlike `icontains`, a regex match can use the trigram index on name.
+        return queryset.filter(name__iregex=re.escape(search_term)), False
+
+
+@admin.register(LocationLog)
+class LocationLogAdmin(LargeTableAdmin):
+    list_display = ["id", "survivor", "latitude", "longitude", "created_at"]
+    list_select_related = ["survivor"]
+    autocomplete_fields = ["survivor"]
+
+
+@admin.register(InfectionReport)
+class InfectionReportAdmin(LargeTableAdmin):
+    list_display = ["id", "author", "infected_survivor", "created_at"]
+    list_select_related = ["author", "infected_survivor"]
+    autocomplete_fields = ["author", "infected_survivor"]
+
+
+@admin.register(InventoryItem)
+class InventoryItemAdmin(LargeTableAdmin):
+    list_display = ["id", "owner", "resource", "quantity"]
+    list_select_related = ["owner", "resource"]
+    autocomplete_fields = ["owner"]
+
+    # Balances only change through the ledger, see `ledger.post_movements`.
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(InventoryMovement)
+class InventoryMovementAdmin(LargeTableAdmin):
+    list_display = ["id", "owner", "resource", "delta", "reason", "created_at"]
+    list_select_related = ["owner", "resource"]
+    list_filter = ["reason", RecentCreatedAtFilter]
+    raw_id_fields = ["owner", "trade"]
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(InventorySnapshot)
+class InventorySnapshotAdmin(admin.ModelAdmin):
+    list_display = ["id", "last_movement_id", "created_at"]
+
+
+class TradeItemInline(admin.TabularInline):
+    model = TradeItem
+    readonly_fields = ["giver", "resource", "quantity", "price"]
+    can_delete = False
+    extra = 0
+
+
+@admin.register(Trade)
+class TradeAdmin(LargeTableAdmin):
+    list_display = ["id", "survivor", "partner", "value", "created_at"]
+    list_select_related = ["survivor", "partner"]
+    raw_id_fields = ["survivor", "partner"]
+    inlines = [TradeItemInline]
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Zone)
+class ZoneAdmin(admin.ModelAdmin):
+    list_display = ["id", "name", "shape", "healthy_count", "infected_count"]
+    search_fields = ["name"]
+    readonly_fields = ["healthy_count", "infected_count"]
+
+
+@admin.register(SurvivorGroup)
+class SurvivorGroupAdmin(admin.ModelAdmin):
+    list_display = ["id", "size", "center_latitude", "center_longitude", "updated_at"]
 
+    def has_add_permission(self, request):
+        return False
 
-admin.site.register(Gender)
-admin.site.register(InfectionReport)
-admin.site.register(InventoryItem)
-admin.site.register(LocationLog)
-admin.site.register(Survivor)
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,303 @@
+"""
+Cold storage of old location logs.
+
+Archived logs are moved out of PostgreSQL into immutable segment files of
+zlib-compressed columns, each sorted by time. ``index.json``, next to them,
+lists the time and survivor ranges of every segment, so queries only map and
+decompress the segments they overlap.
+"""
+
+import fcntl
+import json
+import mmap
+import os
+import struct
+import zlib
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+
+from .models import LocationLog
+
+
+INDEX_NAME = "index.json"
+SEGMENT_SUFFIX = ".seg"
+# Segments are renamed from pending once their logs' deletion is committed.
+PENDING_SUFFIX = ".pending"
+
+# Name and type of the columns of segments, in file order. `created_at` is in
+# microseconds since the epoch and sorts the rows, then `id`.
+COLUMNS = (
+    ("created_at", "<i8"),
+    ("id", "<i8"),
+    ("survivor_id", "<i8"),
+    ("latitude", "<f8"),
+    ("longitude", "<f8"),
+)
+
+_MAGIC = b"ZLOG"
+_HEADER = struct.Struct("<4sI")
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+_DELETE_LOCATION_LOGS_SQL = (
+    f"DELETE FROM {LocationLog._meta.db_table} WHERE id = ANY(%s)"
+)
+
+
+def to_timestamp(value):
+    return (value - _EPOCH) // _MICROSECOND
+
+
+def get_archive_dir():
+    return settings.LOCATION_LOGS_ARCHIVE_DIR
+
+
+@contextmanager
+def lock_archive(directory):
+    """
+    Serialize writers of the archive in `directory`.
+    """
+    os.makedirs(directory, exist_ok=True)
+    fd = os.open(os.path.join(directory, ".lock"), os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)
+
+
+def write_atomically(path, content):
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "wb") as file:
+        file.write(content)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary_path, path)
+
+
+def write_segment(directory, columns):
+    """
+    Write `{name: array}` columns, sorted by time, to a new pending segment
+    file and return its index entry.
+    """
+    blobs = [
+        zlib.compress(np.ascontiguousarray(columns[name], dtype).tobytes())
+        for name, dtype in COLUMNS
+    ]
+    created_at, survivor_ids = columns["created_at"], columns["survivor_id"]
+    entry = {
+        "name": f"{created_at[0]:017d}-{columns['id'][0]}{SEGMENT_SUFFIX}",
+        "rows": len(created_at),
+        "min_created_at": int(created_at[0]),
+        "max_created_at": int(created_at[-1]),
+        "min_survivor_id": int(survivor_ids.min()),
+        "max_survivor_id": int(survivor_ids.max()),
+    }
+    layout, offset = {}, 0
+    for (name, dtype), blob in zip(COLUMNS, blobs):
+        layout[name] = [dtype, offset, len(blob)]
+        offset += len(blob)
+    header = json.dumps({**entry, "columns": layout}).encode()
+    write_atomically(
+        os.path.join(directory, entry["name"] + PENDING_SUFFIX),
+        b"".join([_HEADER.pack(_MAGIC, len(header)), header, *blobs]),
+    )
+    return entry
+
+
+def read_segment_header(data, path):
+    magic, header_size = _HEADER.unpack_from(data)
+    if magic != _MAGIC:
+        raise ValueError(f"{path} is not a location log segment.")
+    header = json.loads(bytes(data[_HEADER.size : _HEADER.size + header_size]))
+    return header, _HEADER.size + header_size
+
+
+def write_index(directory):
+    """
+    Rebuild the index of the archive in `directory` from its segment headers.
+    """
+    entries = []
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(SEGMENT_SUFFIX):
+            continue
+        path = os.path.join(directory, name)
+        with open(path, "rb") as file:
+            header, _ = read_segment_header(file.read(64 * 1024), path)
+        header.pop("columns")
+        entries.append(header)
+    write_atomically(
+        os.path.join(directory, INDEX_NAME), json.dumps(entries, indent=1).encode()
+    )
+    return entries
+
+
+def load_index(directory):
+    try:
+        with open(os.path.join(directory, INDEX_NAME), "rb") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return []
+
+
+def publish_segment(pending_path):
+    os.replace(pending_path, pending_path.removesuffix(PENDING_SUFFIX))
+
+
+def recover_pending_segments(directory):
+    """
+    Publish the pending segments left by interrupted runs whose logs'
+    deletion was committed, and drop the others.
+    """
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(PENDING_SUFFIX):
+            continue
+        path = os.path.join(directory, name)
+        ids = read_segment(path, None, None, None)["id"].tolist()
+        # Logs are deleted all at once, in the transaction archiving them.
+        if LocationLog.objects.filter(id__in=ids).exists():
+            os.unlink(path)
+        else:
+            publish_segment(path)
+
+
+def archive_segment(directory, before, segment_rows):
+    """
+    Move up to `segment_rows` of the oldest location logs created before
+    `before` to a new segment and return its index entry, or None.
+    """
+    pending_path = None
+    try:
+        # Durable, so that the segment is only published once committed.
+        with transaction.atomic(durable=True):
+            rows = list(
+                LocationLog.objects.select_for_update(skip_locked=True, of=("self",))
+                .filter(created_at__lt=before)
+                # Latest locations of survivors are still served from here.
+                .exclude(created_at=F("survivor__last_located_at"))
+                .order_by("created_at", "id")
+                .values_list(*(name for name, _ in COLUMNS))[:segment_rows]
+            )
+            if not rows:
+                return None
+            created_at, ids, survivor_ids, latitudes, longitudes = zip(*rows)
+            entry = write_segment(
+                directory,
+                {
+                    "created_at": np.fromiter(map(to_timestamp, created_at), "<i8"),
+                    "id": np.array(ids, "<i8"),
+                    "survivor_id": np.array(survivor_ids, "<i8"),
+                    "latitude": np.array(latitudes, "<f8"),
+                    "longitude": np.array(longitudes, "<f8"),
+                },
+            )
+            pending_path = os.path.join(directory, entry["name"] + PENDING_SUFFIX)
+            with connection.cursor() as cursor:
+                cursor.execute(_DELETE_LOCATION_LOGS_SQL, [list(ids)])
+    except BaseException:
+        # Logs stay in the database if the deletion is not committed.
+        if pending_path is not None:
+            os.unlink(pending_path)
+        raise
+    publish_segment(pending_path)
+    return entry
+
+
+def archive_location_logs(before, segment_rows=None):
+    """
+    Move location logs created before `before` to segments of up to
+    `segment_rows` rows, oldest first, and return their index entries.
+    """
+    directory = get_archive_dir()
+    segment_rows = segment_rows or settings.LOCATION_LOGS_ARCHIVE_SEGMENT_ROWS
+    entries = []
+    with lock_archive(directory):
+        try:
+            recover_pending_segments(directory)
+            while entry := archive_segment(directory, before, segment_rows):
+                entries.append(entry)
+        finally:
+            write_index(directory)
+    return entries
+
+
+def read_segment(path, start, end, survivor_ids):
+    """
+    Return the `{name: array}` columns of the rows of the segment at `path`
+    in the `[start, end)` time range and of `survivor_ids` if not None.
+    """
+    with open(path, "rb") as file, mmap.mmap(
+        file.fileno(), 0, access=mmap.ACCESS_READ
+    ) as data, memoryview(data) as view:
+        header, base = read_segment_header(view, path)
+
+        def read_column(name):
+            dtype, offset, size = header["columns"][name]
+            return np.frombuffer(
+                zlib.decompress(view[base + offset : base + offset + size]), dtype
+            )
+
+        created_at = read_column("created_at")
+        rows = slice(
+            np.searchsorted(created_at, start) if start is not None else 0,
+            np.searchsorted(created_at, end) if end is not None else len(created_at),
+        )
+        if survivor_ids is None:
+            selected = np.ones(rows.stop - rows.start, dtype=bool)
+        else:
+            selected = np.isin(read_column("survivor_id")[rows], survivor_ids)
+        return {
+            name: (created_at if name == "created_at" else read_column(name))[rows][
+                selected
+            ]
+            for name, _ in COLUMNS
+        }
+
+
+def query_location_logs(start=None, end=None, survivor_ids=None):
+    """
+    Return the archived location logs created in `[start, end)`, of
+    `survivor_ids` if given, as `{name: array}` columns sorted by time, with
+    `created_at` as UTC `datetime64[us]`. Only the segments overlapping the
+    requested ranges are read.
+    """
+    directory = get_archive_dir()
+    start = to_timestamp(start) if start is not None else None
+    end = to_timestamp(end) if end is not None else None
+    if survivor_ids is not None:
+        survivor_ids = np.unique(np.fromiter(survivor_ids, np.int64))
+
+    parts = []
+    for entry in load_index(directory):
+        if start is not None and entry["max_created_at"] < start:
+            continue
+        if end is not None and entry["min_created_at"] >= end:
+            continue
+        if survivor_ids is not None:
+            first = np.searchsorted(survivor_ids, entry["min_survivor_id"])
+            if (
+                first == len(survivor_ids)
+                or survivor_ids[first] > entry["max_survivor_id"]
+            ):
+                continue
+        parts.append(
+            read_segment(
+                os.path.join(directory, entry["name"]), start, end, survivor_ids
+            )
+        )
+
+    columns = {
+        name: np.concatenate([part[name] for part in parts] or [np.empty(0, dtype)])
+        for name, dtype in COLUMNS
+    }
+    # Segments archived in different runs may overlap in time.
+    order = np.lexsort((columns["id"], columns["created_at"]))
+    columns = {name: column[order] for name, column in columns.items()}
+    columns["created_at"] = columns["created_at"].astype("datetime64[us]")
+    return columns
@@ -0,0 +1,38 @@
+from functools import partial
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+def get_dashboard_cache_key(survivor_id):
+    return f"survivors:dashboard:{survivor_id}"
+
+
+def get_dashboard_version_key(survivor_id):
+    return f"survivors:dashboard-version:{survivor_id}"
+
+
+def get_dashboard_version(survivor_id):
+    """
+    Return the version the dashboard of `survivor_id` is cached under.
+
+    Read before the dashboard data, so a dashboard invalidated in between is
+    stored under a dropped version and never served.
+    """
+    return cache.get_or_set(
+        get_dashboard_version_key(survivor_id),
+        uuid4().hex,
+        settings.SURVIVOR_DASHBOARD_CACHE_TIMEOUT,
+    )
+
+
+def invalidate_dashboards(survivor_ids):
+    """
+    Drop the cached dashboard versions of `survivor_ids` once the current
+    transaction commits, so they are not refilled with data about to change.
+    """
+    keys = [get_dashboard_version_key(survivor_id) for survivor_id in set(survivor_ids)]
+    if keys:
+        transaction.on_commit(partial(cache.delete_many, keys), robust=True)
@@ -0,0 +1,50 @@
+from utils.fastjson import (
+    OMIT_IF_NONE,
+    compile_encoder,
+    decimal_encoder,
+    encode_bool,
+    encode_datetime,
+    encode_float,
+    encode_int,
+    encode_str,
+)
+
+
+# Each schema mirrors the read representation of the matching serializer in
+# `serializers.py`, paired with the `values_list()` lookups feeding it.
+
+SURVIVOR_SCHEMA = [
+    ("id", encode_int),
+    ("name", encode_str),
+    ("age", encode_int),
+    ("gender", encode_str, OMIT_IF_NONE),
+    ("is_infected", encode_bool),
+]
+SURVIVOR_LOOKUPS = ["id", "name", "age", "gender__name", "is_infected"]
+
+SURVIVOR_LOCATION_LOG_SCHEMA = [
+    ("id", encode_int),
+    ("latitude", encode_float),
+    ("longitude", encode_float),
+    ("created_at", encode_datetime),
+    ("survivor", SURVIVOR_SCHEMA),
+]
+SURVIVOR_LOCATION_LOG_LOOKUPS = [
+    "id",
+    "latitude",
+    "longitude",
+    "created_at",
+    *[f"survivor__{lookup}" for lookup in SURVIVOR_LOOKUPS],
+]
+
+INVENTORY_ITEM_SCHEMA = [
+    ("id", encode_int),
+    ("resource", encode_str),
+    ("resource_price", decimal_encoder(2)),
+    ("quantity", encode_int),
+]
+INVENTORY_ITEM_LOOKUPS = ["id", "resource__name", "resource__price", "quantity"]
+
+encode_survivor = compile_encoder(SURVIVOR_SCHEMA)
+encode_survivor_location_log = compile_encoder(SURVIVOR_LOCATION_LOG_SCHEMA)
+encode_inventory_item = compile_encoder(INVENTORY_ITEM_SCHEMA)
@@ -0,0 +1,158 @@
+"""
+Grid of the Earth's surface for proximity searches between survivors.
+
+Locations are mapped to Cartesian kilometres and binned into cubic cells of
+the searched distance, so points closer than it are always in the same or
+one of the 27 neighbouring cells, without distortion near the poles or the
+antimeridian.
+"""
+
+import itertools
+import math
+
+import numpy as np
+
+
+EARTH_RADIUS_KM = 6371.0
+
+# Cells are packed in an int64 key of three 21-bit coordinates.
+_CELL_BITS = 21
+_CELL_ORIGIN = 1 << (_CELL_BITS - 1)
+NEIGHBOUR_CELLS = np.array(
+    [
+        (dx << 2 * _CELL_BITS) + (dy << _CELL_BITS) + dz
+        for dx, dy, dz in itertools.product((-1, 0, 1), repeat=3)
+    ],
+    dtype=np.int64,
+)
+
+
+def to_cartesian(latitudes, longitudes):
+    """
+    Return `(x, y, z)` kilometres of locations on the Earth's surface, whose
+    straight distances match great-circle ones at short range.
+    """
+    latitudes, longitudes = np.radians(latitudes), np.radians(longitudes)
+    return EARTH_RADIUS_KM * np.column_stack(
+        (
+            np.cos(latitudes) * np.cos(longitudes),
+            np.cos(latitudes) * np.sin(longitudes),
+            np.sin(latitudes),
+        )
+    )
+
+
+def to_geographic(points):
+    """
+    Return the latitudes and longitudes of Cartesian `points`, projected on
+    the Earth's surface.
+    """
+    x, y, z = points.T
+    return (
+        np.degrees(np.arctan2(z, np.hypot(x, y))),
+        np.degrees(np.arctan2(y, x)),
+    )
+
+
+def get_cells(points, cell_size):
+    cells = np.floor(points / cell_size).astype(np.int64) + _CELL_ORIGIN
+    return (cells[:, 0] << 2 * _CELL_BITS) + (cells[:, 1] << _CELL_BITS) + cells[:, 2]
+
+
+def get_neighbour_cells(cells):
+    """
+    Return the unique cells of, or next to, `cells`.
+    """
+    cells = np.asarray(cells, dtype=np.int64)
+    return np.unique((cells[:, None] + NEIGHBOUR_CELLS).ravel())
+
+
+def iter_pairs(points, sources, distance, chunk_size=100_000):
+    """
+    Yield, by chunks of `points`, `(point_indices, source_indices,
+    squared_distances)` arrays of the pairs of Cartesian `points` and
+    `sources` at most `distance` apart.
+    """
+    if not len(points) or not len(sources):
+        return
+
+    source_cells = get_cells(sources, distance)
+    source_order = np.argsort(source_cells, kind="stable")
+    source_cells = source_cells[source_order]
+    sources = sources[source_order].T.copy()
+
+    # Points are processed in cell order, so that neighbouring points and their
+    # sources are close in memory, by chunks bounding the memory of pairs.
+    point_cells = get_cells(points, distance)
+    order = np.argsort(point_cells, kind="stable")
+    point_cells, points = point_cells[order], points[order].T.copy()
+    for start in range(0, len(order), chunk_size):
+        chunk = slice(start, start + chunk_size)
+        # Searching sorted unique cells is much faster than searching points.
+        cells, inverse = np.unique(point_cells[chunk], return_inverse=True)
+        parts = []
+        for neighbour in NEIGHBOUR_CELLS:
+            first = np.searchsorted(source_cells, cells + neighbour, "left")
+            counts = np.searchsorted(source_cells, cells + neighbour, "right") - first
+            first, counts = first[inverse], counts[inverse]
+            total = counts.sum()
+            if not total:
+                continue
+            # Pair each point with the sources of its neighbouring cell.
+            targets = np.repeat(np.arange(len(inverse)), counts)
+            pairs = np.arange(total) + np.repeat(
+                first - np.cumsum(counts) + counts, counts
+            )
+            squared_distances = sum(
+                (points[axis, chunk][targets] - sources[axis][pairs]) ** 2
+                for axis in range(3)
+            )
+            near = squared_distances <= distance**2
+            parts.append(
+                (
+                    order[start + targets[near]],
+                    source_order[pairs[near]],
+                    squared_distances[near],
+                )
+            )
+        if parts:
+            yield tuple(map(np.concatenate, zip(*parts)))
+
+
+def get_bounding_box(latitude, longitude, radius):
+    """
+    Return the latitude range and the longitude ranges, split at the
+    antimeridian, of the box covering `radius` kilometres around a location.
+    """
+    angle = radius / EARTH_RADIUS_KM
+    latitude_delta = math.degrees(angle)
+    latitudes = (
+        max(latitude - latitude_delta, -90),
+        min(latitude + latitude_delta, 90),
+    )
+    ratio = math.sin(angle) / max(math.cos(math.radians(latitude)), 1e-12)
+    if angle >= math.pi / 2 or ratio >= 1 or abs(latitude) + latitude_delta >= 90:
+        # The circle covers a pole.
+        return latitudes, [(-180, 180)]
+
+    longitude_delta = math.degrees(math.asin(ratio))
+    west, east = longitude - longitude_delta, longitude + longitude_delta
+    if west < -180:
+        return latitudes, [(west + 360, 180), (-180, east)]
+    if east > 180:
+        return latitudes, [(west, 180), (-180, east - 360)]
+    return latitudes, [(west, east)]
+
+
+def get_distance(latitude, longitude, other_latitude, other_longitude):
+    """
+    Return the great-circle distance between two locations in kilometres.
+    """
+    latitude, other_latitude = math.radians(latitude), math.radians(other_latitude)
+    haversine = (
+        math.sin((other_latitude - latitude) / 2) ** 2
+        + math.cos(latitude)
+        * math.cos(other_latitude)
+        * math.sin(math.radians(other_longitude - longitude) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(math.sqrt(haversine), 1))
@@ -0,0 +1,301 @@
+"""
+Groups of survivors travelling together.
+
+Survivors located recently are clustered DBSCAN-style: those with at least
+`GROUPS_MIN_SURVIVORS` survivors, themselves included, within
+`GROUPS_DISTANCE_KM` are core survivors, and groups are the core survivors
+chained by that distance along with the survivors next to them.
+
+Locations are binned into grid cells of that distance (see `grid`), kept in
+`Survivor.group_cell`. Moves mark the cells left and entered as dirty, and
+`cluster_groups` only reclusters the occupied cells connected to dirty ones,
+which no group crosses, reusing the ids of the groups found there.
+"""
+
+from collections import Counter
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .grid import (
+    get_cells,
+    get_neighbour_cells,
+    iter_pairs,
+    to_cartesian,
+    to_geographic,
+)
+from .models import DirtyGroupCell, Survivor, SurvivorGroup
+from utils.shm import stable_hash
+
+
+_LOCK_NAME = "survivors:groups"
+
+_DIRTY_CELLS_SQL = f"SELECT cell, marked_at FROM {DirtyGroupCell._meta.db_table}"
+
+# Cells marked again since they were read are kept for the next run.
+_CLEAR_DIRTY_CELLS_SQL = f"""
+    DELETE FROM {DirtyGroupCell._meta.db_table} AS dirty
+    USING unnest(%s::bigint[], %s::timestamptz[]) AS cleared(cell, marked_at)
+    WHERE dirty.cell = cleared.cell AND dirty.marked_at = cleared.marked_at
+"""
+
+_MARK_DIRTY_CELLS_SQL = f"""
+    INSERT INTO {DirtyGroupCell._meta.db_table} (cell, marked_at)
+    SELECT DISTINCT dirty.cell, statement_timestamp()
+    FROM unnest(%s::bigint[]) AS dirty(cell)
+    ON CONFLICT (cell) DO UPDATE SET marked_at = EXCLUDED.marked_at
+"""
+
+_EXPIRED_CELLS_SQL = f"""
+    SELECT DISTINCT group_cell FROM {Survivor._meta.db_table}
+    WHERE group_id IS NOT NULL AND last_located_at < %s
+"""
+
+_LOAD_CELLS_SQL = f"""
+    SELECT
+        id,
+        last_latitude,
+        last_longitude,
+        last_located_at >= %s,
+        group_cell,
+        group_id
+    FROM {Survivor._meta.db_table}
+    WHERE group_cell = ANY(%s)
+"""
+
+_OUTER_GROUP_CELLS_SQL = f"""
+    SELECT DISTINCT group_cell FROM {Survivor._meta.db_table}
+    WHERE group_id = ANY(%s) AND NOT group_cell = ANY(%s)
+"""
+
+_ASSIGN_GROUPS_SQL = f"""
+    UPDATE {Survivor._meta.db_table} AS survivor
+    SET group_id = assignment.group_id
+    FROM unnest(%s::bigint[], %s::bigint[]) AS assignment(id, group_id)
+    WHERE survivor.id = assignment.id
+        AND survivor.group_id IS DISTINCT FROM assignment.group_id
+"""
+
+_SET_GROUP_CELLS_SQL = f"""
+    UPDATE {Survivor._meta.db_table} AS survivor
+    SET group_cell = cell.value
+    FROM unnest(%s::bigint[], %s::bigint[]) AS cell(id, value)
+    WHERE survivor.id = cell.id
+"""
+
+
+def get_group_cells(latitudes, longitudes):
+    return get_cells(
+        to_cartesian(latitudes, longitudes), settings.GROUPS_DISTANCE_KM
+    ).tolist()
+
+
+def get_group_cell(latitude, longitude):
+    (cell,) = get_group_cells([latitude], [longitude])
+    return cell
+
+
+def cluster(points, distance, min_size):
+    """
+    Return DBSCAN labels of Cartesian `points`, the smallest index of a core
+    point of their cluster, or -1 for noise.
+    """
+    targets, sources = [], []
+    for point_indices, source_indices, _ in iter_pairs(points, points, distance):
+        targets.append(point_indices)
+        sources.append(source_indices)
+    if not targets:
+        return np.full(len(points), -1)
+    targets, sources = np.concatenate(targets), np.concatenate(sources)
+    # Pairs include each point with itself.
+    is_core = np.bincount(targets, minlength=len(points)) >= min_size
+
+    # Chained core points are merged into trees, rooted at their smallest
+    # index, by hooking the roots of pairs onto the smallest one and then
+    # flattening the trees, until all pairs share roots.
+    labels = np.arange(len(points))
+    core_pairs = is_core[targets] & is_core[sources]
+    core_targets, core_sources = targets[core_pairs], sources[core_pairs]
+    while True:
+        target_roots, source_roots = labels[core_targets], labels[core_sources]
+        split = target_roots != source_roots
+        if not split.any():
+            break
+        core_targets, core_sources = core_targets[split], core_sources[split]
+        np.minimum.at(labels, target_roots[split], source_roots[split])
+        while not np.array_equal(flattened := labels[labels], labels):
+            labels = flattened
+
+    # Border points join the cluster of a core point next to them.
+    border_pairs = ~is_core[targets] & is_core[sources]
+    border_labels = np.full(len(points), len(points))
+    np.minimum.at(border_labels, targets[border_pairs], labels[sources[border_pairs]])
+    labels[~is_core] = border_labels[~is_core]
+    labels[labels == len(points)] = -1
+    return labels
+
+
+def mark_dirty_cells(cells):
+    cells = [cell for cell in cells if cell is not None]
+    if cells:
+        with connection.cursor() as cursor:
+            cursor.execute(_MARK_DIRTY_CELLS_SQL, [cells])
+
+
+def load_region(cursor, dirty_cells, recent_since):
+    """
+    Return rows of the survivors in the occupied cells connected to
+    `dirty_cells`, and in the cells of the groups found there.
+    """
+    rows, visited, groups = {}, set(), set()
+    frontier = set(get_neighbour_cells(list(dirty_cells)).tolist())
+    while frontier:
+        visited |= frontier
+        cursor.execute(_LOAD_CELLS_SQL, [recent_since, list(frontier)])
+        loaded = cursor.fetchall()
+        rows.update((row[0], row) for row in loaded)
+        occupied = [cell for _, _, _, is_recent, cell, _ in loaded if is_recent]
+        frontier = set()
+        if occupied:
+            frontier.update(get_neighbour_cells(occupied).tolist())
+        # Groups straddling the region, after their members spread apart.
+        new_groups = {row[5] for row in loaded if row[5] is not None} - groups
+        if new_groups:
+            groups |= new_groups
+            cursor.execute(_OUTER_GROUP_CELLS_SQL, [list(new_groups), list(visited)])
+            frontier.update(cell for (cell,) in cursor.fetchall())
+        frontier -= visited
+    return list(rows.values())
+
+
+def assign_groups(rows, labels):
+    """
+    Persist the groups of `labels` among `rows` and delete the groups left.
+    Groups keep their id while a cluster retains most of their survivors.
+    """
+    ids = np.array([row[0] for row in rows], dtype=np.int64)
+    previous_groups = [row[5] for row in rows]
+    clusters = {}
+    for index, label in enumerate(labels.tolist()):
+        if label >= 0:
+            clusters.setdefault(label, []).append(index)
+    clusters = list(clusters.values())
+
+    cluster_group_ids, reused_ids = {}, set()
+    votes = sorted(
+        (
+            (count, group_id, cluster_index)
+            for cluster_index, members in enumerate(clusters)
+            for group_id, count in Counter(previous_groups[i] for i in members).items()
+            if group_id is not None
+        ),
+        reverse=True,
+    )
+    for _, group_id, cluster_index in votes:
+        if cluster_index not in cluster_group_ids and group_id not in reused_ids:
+            cluster_group_ids[cluster_index] = group_id
+            reused_ids.add(group_id)
+
+    now = timezone.now()
+    groups = []
+    for cluster_index, members in enumerate(clusters):
+        latitudes, longitudes = to_geographic(
+            to_cartesian(
+                [rows[i][1] for i in members], [rows[i][2] for i in members]
+            ).mean(axis=0, keepdims=True)
+        )
+        groups.append(
+            (
+                members,
+                SurvivorGroup(
+                    id=cluster_group_ids.get(cluster_index),
+                    size=len(members),
+                    center_latitude=latitudes[0],
+                    center_longitude=longitudes[0],
+                    survivor_ids=sorted(ids[members].tolist()),
+                    updated_at=now,
+                ),
+            )
+        )
+
+    SurvivorGroup.objects.bulk_update(
+        [group for _, group in groups if group.id is not None],
+        ["size", "center_latitude", "center_longitude", "survivor_ids", "updated_at"],
+    )
+    SurvivorGroup.objects.bulk_create(
+        [group for _, group in groups if group.id is None]
+    )
+    group_ids = [None] * len(rows)
+    for members, group in groups:
+        for i in members:
+            group_ids[i] = group.id
+    with connection.cursor() as cursor:
+        cursor.execute(_ASSIGN_GROUPS_SQL, [ids.tolist(), group_ids])
+    SurvivorGroup.objects.filter(
+        id__in={group_id for group_id in previous_groups if group_id is not None}
+        - reused_ids
+    ).delete()
+    return [group for _, group in groups]
+
+
+@transaction.atomic
+def cluster_groups(now=None):
+    """
+    Recluster the survivors around dirty cells and around groups with expired
+    locations, and return the groups updated.
+    """
+    recent_since = (now or timezone.now()) - timedelta(
+        minutes=settings.GROUPS_WINDOW_MINUTES
+    )
+    with connection.cursor() as cursor:
+        # Concurrent runs would assign the same survivors.
+        cursor.execute(
+            "SELECT pg_advisory_xact_lock(%s)", [stable_hash(_LOCK_NAME) >> 1]
+        )
+        # Read without locking, so that moves marking them are not blocked.
+        cursor.execute(_DIRTY_CELLS_SQL)
+        marks = dict(cursor.fetchall())
+        cursor.execute(_EXPIRED_CELLS_SQL, [recent_since])
+        dirty_cells = set(marks) | {cell for (cell,) in cursor.fetchall()}
+        if not dirty_cells:
+            return []
+        rows = load_region(cursor, dirty_cells, recent_since)
+
+    recent_rows = [row for row in rows if row[3]]
+    labels = np.full(len(rows), -1)
+    if recent_rows:
+        labels[[i for i, row in enumerate(rows) if row[3]]] = cluster(
+            to_cartesian(
+                [row[1] for row in recent_rows], [row[2] for row in recent_rows]
+            ),
+            settings.GROUPS_DISTANCE_KM,
+            settings.GROUPS_MIN_SURVIVORS,
+        )
+    groups = assign_groups(rows, labels)
+    # Last, so that moves marking these cells again only wait for the commit.
+    with connection.cursor() as cursor:
+        cursor.execute(_CLEAR_DIRTY_CELLS_SQL, [list(marks), list(marks.values())])
+    return groups
+
+
+@transaction.atomic
+def cluster_all_groups(now=None):
+    """
+    Recompute the grid cells of all survivors, e.g. after the grouping
+    distance changed, and recluster them all.
+    """
+    ids, latitudes, longitudes = list(
+        zip(
+            *Survivor.objects.filter(last_latitude__isnull=False).values_list(
+                "id", "last_latitude", "last_longitude"
+            )
+        )
+    ) or [(), (), ()]
+    cells = get_group_cells(latitudes, longitudes) if ids else []
+    with connection.cursor() as cursor:
+        cursor.execute(_SET_GROUP_CELLS_SQL, [list(ids), cells])
+    mark_dirty_cells(cells)
+    return cluster_groups(now)
@@ -0,0 +1,143 @@
+"""
+Survivor density heatmap tiles.
+
+Tiles follow the Web Mercator ``z/x/y`` scheme of web maps. Each tile is
+split into a grid of cells counting the healthy and infected survivors whose
+latest location falls inside. Rendered tiles are cached by each process
+until a survivor in the tile moves or gets infected, or for at most
+`HEATMAP_CACHE_TIMEOUT` seconds. Tiles below `HEATMAP_MIN_INVALIDATED_ZOOM`
+cover too many survivors to stay cached under steady location ingest, so they
+only expire.
+"""
+
+import json
+import math
+import time
+from functools import partial
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+
+from .models import Survivor
+from utils.caching import get_lru_cache, get_shared_generations
+
+
+# Latitudes beyond are not covered by Web Mercator tiles.
+MAX_LATITUDE = math.degrees(math.atan(math.sinh(math.pi)))
+
+
+def get_tile_generation_key(zoom, x, y):
+    return f"survivors:heatmap:{zoom}:{x}:{y}"
+
+
+def project(latitudes, longitudes, zoom):
+    """
+    Return the fractional tile coordinates of locations at `zoom`.
+    """
+    tiles = 2**zoom
+    x = (np.asarray(longitudes) + 180) / 360 * tiles
+    y = (1 - np.arcsinh(np.tan(np.radians(latitudes))) / np.pi) / 2 * tiles
+    return x, y
+
+
+def get_tile_bounds(zoom, x, y):
+    """
+    Return the latitude and longitude ranges covered by a tile.
+    """
+    tiles = 2**zoom
+    latitudes = [
+        math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / tiles))))
+        for row in (y + 1, y)
+    ]
+    longitudes = [column / tiles * 360 - 180 for column in (x, x + 1)]
+    return latitudes, longitudes
+
+
+def is_mapped(latitude, longitude):
+    return abs(latitude) < MAX_LATITUDE and -180 <= longitude < 180
+
+
+def compute_tile(zoom, x, y, size):
+    """
+    Return `(healthy, infected)` survivor counts of the `size` x `size` cells
+    of a tile, each row by row as a flat array.
+    """
+    latitudes, longitudes = get_tile_bounds(zoom, x, y)
+    locations = list(
+        Survivor.objects.filter(
+            last_latitude__range=latitudes, last_longitude__range=longitudes
+        ).values_list("last_latitude", "last_longitude", "is_infected")
+    )
+    points = np.array(locations, dtype=np.float64).reshape(-1, 3)
+    tile_x, tile_y = project(points[:, 0], points[:, 1], zoom)
+    columns = np.floor((tile_x - x) * size).astype(np.int64)
+    rows = np.floor((tile_y - y) * size).astype(np.int64)
+    # Bounds are inclusive, points on the far edges belong to the next tiles.
+    inside = (columns >= 0) & (columns < size) & (rows >= 0) & (rows < size)
+    cells = rows * size + columns
+    infected = points[:, 2].astype(bool)
+    return (
+        np.bincount(cells[inside & ~infected], minlength=size * size),
+        np.bincount(cells[inside & infected], minlength=size * size),
+    )
+
+
+def render_tile(zoom, x, y):
+    size = settings.HEATMAP_TILE_SIZE
+    healthy, infected = compute_tile(zoom, x, y, size)
+    (cells,) = np.nonzero(healthy + infected)
+    return json.dumps(
+        {
+            "zoom": zoom,
+            "x": x,
+            "y": y,
+            "size": size,
+            # `[column, row, healthy, infected]` of non-empty cells.
+            "cells": [
+                [
+                    int(cell % size),
+                    int(cell // size),
+                    int(healthy[cell]),
+                    int(infected[cell]),
+                ]
+                for cell in cells
+            ],
+        },
+        separators=(",", ":"),
+    ).encode()
+
+
+def get_tile(zoom, x, y):
+    """
+    Return the rendered JSON of a tile, from the cache if still valid.
+    """
+    cache = get_lru_cache("survivors:heatmap", settings.HEATMAP_CACHE_MAX_BYTES)
+    generation = (
+        get_shared_generations().get(get_tile_generation_key(zoom, x, y)),
+        int(time.time() // settings.HEATMAP_CACHE_TIMEOUT),
+    )
+    content = cache.get((zoom, x, y), generation)
+    if content is None:
+        content = render_tile(zoom, x, y)
+        cache.set((zoom, x, y), generation, content)
+    return content
+
+
+def invalidate_heatmap_tiles(locations):
+    """
+    Turn the cached tiles covering `[(latitude, longitude), ...]`, from
+    `HEATMAP_MIN_INVALIDATED_ZOOM` up, stale once the current transaction
+    commits.
+    """
+    keys = set()
+    for latitude, longitude in locations:
+        if latitude is None or longitude is None or not is_mapped(latitude, longitude):
+            continue
+        for zoom in range(
+            settings.HEATMAP_MIN_INVALIDATED_ZOOM, settings.HEATMAP_MAX_ZOOM + 1
+        ):
+            tile_x, tile_y = project(latitude, longitude, zoom)
+            keys.add(get_tile_generation_key(zoom, int(tile_x), int(tile_y)))
+    if keys:
+        transaction.on_commit(partial(get_shared_generations().bump, keys), robust=True)
@@ -0,0 +1,41 @@
+from django.db import connection
+
+from .dashboard import invalidate_dashboards
+from .ledger import lock_out_inventories
+from .models import InfectionReport, Survivor
+from .zones import move_to_infected
+
+
+INFECTION_REPORTS_THRESHOLD = 3
+
+_FLAG_INFECTED_SQL = f"""
+    UPDATE {Survivor._meta.db_table}
+    SET is_infected = TRUE, infection_risk = NULL, updated_at = NOW()
+    WHERE NOT is_infected AND id IN (
+        SELECT infected_survivor_id
+        FROM {InfectionReport._meta.db_table}
+        WHERE infected_survivor_id = ANY(%s)
+        GROUP BY infected_survivor_id
+        HAVING COUNT(*) >= %s
+    )
+    RETURNING id
+"""
+
+
+def flag_infected_survivors(survivor_ids):
+    """
+    Flag the given survivors that crossed the infection reports threshold in
+    a single UPDATE, lock their inventories and return their ids.
+    """
+    survivor_ids = list(set(survivor_ids))
+    if not survivor_ids:
+        return []
+
+    with connection.cursor() as cursor:
+        cursor.execute(_FLAG_INFECTED_SQL, [survivor_ids, INFECTION_REPORTS_THRESHOLD])
+        infected_ids = [row[0] for row in cursor.fetchall()]
+
+    lock_out_inventories(infected_ids)
+    move_to_infected(infected_ids)
+    invalidate_dashboards(infected_ids)
+    return infected_ids
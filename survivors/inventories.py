@@ -0,0 +1,44 @@
+import time
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+
+from utils.caching import get_lru_cache, get_shared_generations
+
+
+PRICES_GENERATION_KEY = "resources:prices"
+
+
+def get_inventory_generation_key(survivor_id):
+    return f"survivors:inventory:{survivor_id}"
+
+
+def get_inventory_generation(survivor_id):
+    return (
+        *get_shared_generations().get(
+            get_inventory_generation_key(survivor_id), PRICES_GENERATION_KEY
+        ),
+        # Backstop for changes that do not bump generations.
+        int(time.time() // settings.INVENTORY_CACHE_TIMEOUT),
+    )
+
+
+def get_inventory_cache():
+    return get_lru_cache("survivors:inventory", settings.INVENTORY_CACHE_MAX_BYTES)
+
+
+def invalidate_inventories(survivor_ids):
+    """
+    Turn the inventories of `survivor_ids` cached by any process stale once
+    the current transaction commits.
+    """
+    keys = [get_inventory_generation_key(survivor_id) for survivor_id in survivor_ids]
+    if keys:
+        transaction.on_commit(partial(get_shared_generations().bump, keys), robust=True)
+
+
+def invalidate_all_inventories():
+    transaction.on_commit(
+        partial(get_shared_generations().bump, [PRICES_GENERATION_KEY]), robust=True
+    )
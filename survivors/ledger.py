@@ -0,0 +1,278 @@
+"""
+Append-only ledger of inventory movements.
+
+The ledger is an audit trail layered on top of the `InventoryItem` balances,
+which `post_movements` still updates in place, so trades of the same balances
+contend on their rows. Historical holdings are replayed from the latest
+snapshot, and balances can be rebuilt from the ledger.
+"""
+
+from collections import defaultdict
+
+from django.db import connection, transaction
+from django.db.models import Sum
+
+from .inventories import invalidate_inventories
+from .models import (
+    InventoryItem,
+    InventoryMovement,
+    InventorySnapshot,
+    InventorySnapshotItem,
+)
+from .wealth import apply_wealth_deltas
+
+
+def record_movements(movements):
+    """
+    Append movements to the ledger without touching materialized balances.
+    """
+    return InventoryMovement.objects.bulk_create(list(movements))
+
+
+_ITEMS_TABLE = InventoryItem._meta.db_table
+
+# Balances are upserted in key order, so concurrent trades between the same
+# survivors, in either direction, queue up instead of deadlocking. Debits are
+# guarded in the same statement: balances that do not cover them are left
+# unchanged and not returned, and missing ones are inserted, then rolled back.
+_APPLY_SQL = f"""
+    WITH change AS (
+        SELECT *
+        FROM unnest(%s::bigint[], %s::bigint[], %s::integer[], %s::integer[])
+            AS change(owner_id, resource_id, debit, credit)
+    )
+    INSERT INTO {_ITEMS_TABLE} AS item
+        (owner_id, resource_id, quantity, created_at, updated_at)
+    SELECT owner_id, resource_id, credit, NOW(), NOW()
+    FROM change
+    ORDER BY owner_id, resource_id
+    ON CONFLICT (resource_id, owner_id) DO UPDATE
+    SET quantity = item.quantity + EXCLUDED.quantity - (
+            SELECT debit FROM change
+            WHERE change.owner_id = item.owner_id
+                AND change.resource_id = item.resource_id
+        ),
+        updated_at = NOW()
+    WHERE item.quantity >= (
+        SELECT debit FROM change
+        WHERE change.owner_id = item.owner_id
+            AND change.resource_id = item.resource_id
+    )
+    RETURNING item.owner_id, item.resource_id, item.xmax = 0
+"""
+
+_DELETE_EMPTY_SQL = f"""
+    DELETE FROM {_ITEMS_TABLE} AS item
+    USING unnest(%s::bigint[], %s::bigint[]) AS debit(owner_id, resource_id)
+    WHERE item.owner_id = debit.owner_id
+        AND item.resource_id = debit.resource_id
+        AND item.quantity = 0
+"""
+
+
+class InsufficientInventory(Exception):
+    def __init__(self, missing):
+        super().__init__(f"Missing inventory items: {sorted(missing)}")
+        self.missing = missing
+
+
+def split_deltas(movements):
+    """
+    Sum movements into `(debits, credits)` of `{(owner_id, resource_id):
+    quantity}`, without netting them, so every debit is covered by holdings.
+    """
+    debits = defaultdict(int)
+    credits = defaultdict(int)
+    for movement in movements:
+        key = (movement.owner_id, movement.resource_id)
+        if movement.delta < 0:
+            debits[key] -= movement.delta
+        elif movement.delta > 0:
+            credits[key] += movement.delta
+    return debits, credits
+
+
+def as_columns(keys):
+    return [
+        [owner_id for owner_id, _ in keys],
+        [resource_id for _, resource_id in keys],
+    ]
+
+
+@transaction.atomic
+def post_movements(movements):
+    """
+    Append movements to the ledger and apply them to the `InventoryItem`
+    balances and survivors' wealth.
+
+    Raise `InsufficientInventory` if some debited balances do not cover
+    their debits.
+    """
+    movements = record_movements(movements)
+    apply_movements(*split_deltas(movements))
+    apply_wealth_deltas(movements)
+    return movements
+
+
+def apply_movements(debits, credits):
+    """
+    Apply debits and credits with a single upsert, without reading or locking
+    the balances beforehand.
+    """
+    keys = sorted(debits.keys() | credits.keys())
+    if not keys:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            _APPLY_SQL,
+            [
+                *as_columns(keys),
+                [debits.get(key, 0) for key in keys],
+                [credits.get(key, 0) for key in keys],
+            ],
+        )
+        updated = {
+            (owner_id, resource_id)
+            for owner_id, resource_id, inserted in cursor.fetchall()
+            if not inserted
+        }
+        if debits.keys() - updated:
+            raise InsufficientInventory(debits.keys() - updated)
+        if debits:
+            cursor.execute(_DELETE_EMPTY_SQL, as_columns(debits))
+
+
+def lock_out_inventories(survivor_ids):
+    """
+    Record that the holdings of newly infected survivors became inaccessible.
+
+    Lockouts do not change balances, so they are zero-delta audit entries.
+    """
+    return record_movements(
+        InventoryMovement(
+            owner_id=owner_id,
+            resource_id=resource_id,
+            delta=0,
+            reason=InventoryMovement.Reason.INFECTION_LOCKOUT,
+        )
+        for owner_id, resource_id in InventoryItem.objects.filter(
+            owner_id__in=survivor_ids
+        ).values_list("owner_id", "resource_id")
+    )
+
+
+_LOCK_MOVEMENTS_SQL = f"LOCK TABLE {InventoryMovement._meta.db_table} IN SHARE MODE"
+
+
+def get_committed_movement_id():
+    """
+    Return the id up to which all movements are committed.
+
+    Ids are drawn before their transactions commit, so a lower id may still
+    show up after the highest one. The SHARE lock waits for the transactions
+    inserting movements and is released as soon as the id is read.
+    """
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(_LOCK_MOVEMENTS_SQL)
+        last_movement = InventoryMovement.objects.order_by("-id").first()
+    return last_movement.id if last_movement else 0
+
+
+def take_snapshot():
+    last_movement_id = get_committed_movement_id()
+    with transaction.atomic():
+        return create_snapshot(last_movement_id)
+
+
+def create_snapshot(last_movement_id):
+    holdings = get_holdings(movement_id__lte=last_movement_id)
+
+    snapshot = InventorySnapshot.objects.create(last_movement_id=last_movement_id)
+    InventorySnapshotItem.objects.bulk_create(
+        [
+            InventorySnapshotItem(
+                snapshot=snapshot,
+                owner_id=owner_id,
+                resource_id=resource_id,
+                quantity=quantity,
+            )
+            for (owner_id, resource_id), quantity in holdings.items()
+        ],
+        batch_size=1000,
+    )
+    return snapshot
+
+
+def get_holdings(owner_ids=None, at=None, movement_id__lte=None):
+    """
+    Compute `{(owner_id, resource_id): quantity}` holdings from the ledger,
+    starting from the latest snapshot that precedes `at` (or now).
+    """
+    snapshots = InventorySnapshot.objects.order_by("-last_movement_id")
+    movements = InventoryMovement.objects.all()
+    if at is not None:
+        snapshots = snapshots.filter(created_at__lte=at)
+        movements = movements.filter(created_at__lte=at)
+    if movement_id__lte is not None:
+        snapshots = snapshots.filter(last_movement_id__lte=movement_id__lte)
+        movements = movements.filter(id__lte=movement_id__lte)
+
+    holdings = defaultdict(int)
+    snapshot = snapshots.first()
+    if snapshot:
+        snapshot_items = snapshot.items.all()
+        if owner_ids is not None:
+            snapshot_items = snapshot_items.filter(owner_id__in=owner_ids)
+        for owner_id, resource_id, quantity in snapshot_items.values_list(
+            "owner_id", "resource_id", "quantity"
+        ):
+            holdings[(owner_id, resource_id)] = quantity
+        movements = movements.filter(id__gt=snapshot.last_movement_id)
+
+    if owner_ids is not None:
+        movements = movements.filter(owner_id__in=owner_ids)
+    for owner_id, resource_id, delta in (
+        movements.values("owner_id", "resource_id")
+        .annotate(delta=Sum("delta"))
+        .values_list("owner_id", "resource_id", "delta")
+    ):
+        holdings[(owner_id, resource_id)] += delta
+
+    return {key: quantity for key, quantity in holdings.items() if quantity}
+
+
+@transaction.atomic
+def rebuild_balances(owner_ids=None):
+    """
+    Overwrite `InventoryItem` balances with the holdings derived from the
+    ledger.
+    """
+    holdings = get_holdings(owner_ids=owner_ids)
+    items = InventoryItem.objects.select_for_update()
+    if owner_ids is not None:
+        items = items.filter(owner_id__in=owner_ids)
+
+    items_to_update = []
+    item_ids_to_delete = []
+    changed_owner_ids = set()
+    for item in items:
+        quantity = holdings.pop((item.owner_id, item.resource_id), 0)
+        if not quantity:
+            item_ids_to_delete.append(item.id)
+        elif item.quantity != quantity:
+            item.quantity = quantity
+            items_to_update.append(item)
+        else:
+            continue
+        changed_owner_ids.add(item.owner_id)
+
+    InventoryItem.objects.filter(id__in=item_ids_to_delete).delete()
+    InventoryItem.objects.bulk_update(items_to_update, ["quantity"])
+    InventoryItem.objects.bulk_create(
+        [
+            InventoryItem(owner_id=owner_id, resource_id=resource_id, quantity=quantity)
+            for (owner_id, resource_id), quantity in holdings.items()
+        ]
+    )
+    invalidate_inventories(changed_owner_ids | {owner_id for owner_id, _ in holdings})
@@ -0,0 +1,34 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from survivors.archive import archive_location_logs
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves location logs older than the given number of days out of the "
+        "database into compressed segment files."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days", type=int, default=settings.LOCATION_LOGS_ARCHIVE_AFTER_DAYS
+        )
+        parser.add_argument(
+            "--segment-rows",
+            type=int,
+            default=settings.LOCATION_LOGS_ARCHIVE_SEGMENT_ROWS,
+        )
+
+    def handle(self, *args, **options):
+        entries = archive_location_logs(
+            timezone.now() - timedelta(days=options["days"]),
+            segment_rows=options["segment_rows"],
+        )
+        self.stdout.write(
+            f"{sum(entry['rows'] for entry in entries)} location logs archived "
+            f"into {len(entries)} segments."
+        )
@@ -0,0 +1,85 @@
+import gc
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from survivors.encoders import encode_survivor_location_log
+from survivors.models import Gender, LocationLog, Survivor
+from survivors.serializers import SurvivorLocationLogSerializer
+from utils.fastjson import render_list
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares CPU time per row of the serializer and fast JSON paths of "
+        "the location logs list, using in-memory rows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10000)
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        rows_count = options["rows"]
+        now = timezone.now()
+        gender = Gender(id=1, name="Female")
+        location_logs = [
+            LocationLog(
+                id=i,
+                latitude=50.45 + i / 1e6,
+                longitude=30.52 - i / 1e6,
+                created_at=now,
+                survivor=Survivor(
+                    id=i, name=f"Survivor {i}", age=30, gender=gender, is_infected=False
+                ),
+            )
+            for i in range(rows_count)
+        ]
+        rows = [
+            (
+                log.id,
+                log.latitude,
+                log.longitude,
+                log.created_at,
+                log.survivor.id,
+                log.survivor.name,
+                log.survivor.age,
+                log.survivor.gender.name,
+                log.survivor.is_infected,
+            )
+            for log in location_logs
+        ]
+
+        def serializer_path():
+            return JSONRenderer().render(
+                SurvivorLocationLogSerializer(location_logs, many=True).data
+            )
+
+        def fast_path():
+            return render_list(rows, encode_survivor_location_log)
+
+        if serializer_path() != fast_path():
+            self.stderr.write("Fast path output differs from serializer output!")
+            return
+
+        serializer_time = self.measure(serializer_path, options["repeat"])
+        fast_time = self.measure(fast_path, options["repeat"])
+        self.stdout.write(
+            f"serializer: {serializer_time / rows_count * 1e6:.2f} us/row\n"
+            f"fast path:  {fast_time / rows_count * 1e6:.2f} us/row\n"
+            f"speedup:    {serializer_time / fast_time:.1f}x"
+        )
+
+    def measure(self, func, repeat):
+        timings = []
+        gc.disable()
+        try:
+            for _ in range(repeat):
+                started_at = time.process_time()
+                func()
+                timings.append(time.process_time() - started_at)
+        finally:
+            gc.enable()
+        return min(timings)
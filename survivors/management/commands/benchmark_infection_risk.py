@@ -0,0 +1,89 @@
+import math
+import time
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from survivors.grid import EARTH_RADIUS_KM
+from survivors.infections import INFECTION_REPORTS_THRESHOLD
+from survivors.risk import compute_risks
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares the vectorized infection risk scoring with a Python loop, "
+        "on in-memory survivors clustered around random cities."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--survivors", type=int, default=1_000_000)
+        parser.add_argument("--cities", type=int, default=200)
+        parser.add_argument("--infected-ratio", type=float, default=0.02)
+        parser.add_argument("--loop-sample", type=int, default=200)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        count = options["survivors"]
+        rng = np.random.default_rng(options["seed"])
+        cities = rng.integers(0, options["cities"], count)
+        city_latitudes = rng.uniform(-60, 60, options["cities"])
+        city_longitudes = rng.uniform(-180, 180, options["cities"])
+        # Survivors spread over a few kilometres around their city.
+        latitudes = city_latitudes[cities] + rng.normal(0, 0.03, count)
+        longitudes = city_longitudes[cities] + rng.normal(0, 0.03, count)
+        latitudes[rng.random(count) < 0.05] = np.nan
+        is_infected = rng.random(count) < options["infected_ratio"]
+        is_recent = rng.random(count) < 0.5
+        reports = rng.poisson(0.1, count)
+        radius = settings.INFECTION_RISK_RADIUS_KM
+
+        started_at = time.perf_counter()
+        risks = compute_risks(
+            latitudes, longitudes, is_infected, is_recent, reports, radius
+        )
+        vectorized_time = time.perf_counter() - started_at
+
+        sources = [
+            (latitude, longitude)
+            for latitude, longitude, infected, recent in zip(
+                latitudes, longitudes, is_infected, is_recent
+            )
+            if infected and recent and not math.isnan(latitude)
+        ]
+        targets = np.flatnonzero(~is_infected & ~np.isnan(latitudes))
+        sample = rng.choice(targets, min(options["loop_sample"], len(targets)))
+        started_at = time.perf_counter()
+        loop_risks = [
+            self.loop_risk(latitudes[i], longitudes[i], reports[i], sources, radius)
+            for i in sample
+        ]
+        loop_time = (time.perf_counter() - started_at) / len(sample) * len(targets)
+
+        if not np.allclose(risks[sample], loop_risks, rtol=1e-6, atol=1e-9):
+            raise CommandError("Vectorized risks differ from the Python loop.")
+
+        self.stdout.write(
+            f"survivors:   {count} ({is_infected.sum()} infected)\n"
+            f"vectorized:  {vectorized_time:.2f} s\n"
+            f"python loop: {loop_time:.0f} s (extrapolated from {len(sample)})\n"
+            f"speedup:     {loop_time / vectorized_time:.0f}x"
+        )
+
+    def loop_risk(self, latitude, longitude, reports, sources, radius):
+        exposure = 0
+        x, y, z = self.to_cartesian(latitude, longitude)
+        for source in sources:
+            sx, sy, sz = self.to_cartesian(*source)
+            distance = (x - sx) ** 2 + (y - sy) ** 2 + (z - sz) ** 2
+            if distance <= (3 * radius) ** 2:
+                exposure += math.exp(-distance / radius**2)
+        return 1 - math.exp(-(exposure + reports / INFECTION_REPORTS_THRESHOLD))
+
+    def to_cartesian(self, latitude, longitude):
+        latitude, longitude = math.radians(latitude), math.radians(longitude)
+        return (
+            EARTH_RADIUS_KM * math.cos(latitude) * math.cos(longitude),
+            EARTH_RADIUS_KM * math.cos(latitude) * math.sin(longitude),
+            EARTH_RADIUS_KM * math.sin(latitude),
+        )
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from survivors.groups import cluster_all_groups, cluster_groups
+
+
+class Command(BaseCommand):
+    help = (
+        "Reclusters survivor groups around the grid cells survivors moved in "
+        "or out of since the last run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Recompute the grid cells of all survivors and recluster them all.",
+        )
+
+    def handle(self, *args, **options):
+        groups = cluster_all_groups() if options["full"] else cluster_groups()
+        self.stdout.write(f"{len(groups)} survivor groups updated.")
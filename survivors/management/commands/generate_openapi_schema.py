@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from project_zombie.schema import generate_schema, get_schema_path
+
+
+class Command(BaseCommand):
+    help = "Prebuilds the OpenAPI schema served by the Swagger endpoints."
+
+    def handle(self, *args, **options):
+        path = get_schema_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(generate_schema())
+        self.stdout.write(f"OpenAPI schema written to {path}.")
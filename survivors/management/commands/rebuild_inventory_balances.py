@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from survivors.ledger import rebuild_balances
+
+
+class Command(BaseCommand):
+    help = "Rebuilds inventory item balances from the inventory ledger."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--survivor",
+            type=int,
+            action="append",
+            dest="survivor_ids",
+            help="Limit the rebuild to the given survivor, can be repeated.",
+        )
+
+    def handle(self, *args, **options):
+        rebuild_balances(owner_ids=options["survivor_ids"])
+        self.stdout.write("Inventory balances rebuilt.")
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from survivors.zones import recount_zones
+
+
+class Command(BaseCommand):
+    help = "Recounts zone occupancy from the latest locations of survivors."
+
+    def handle(self, *args, **options):
+        zones = recount_zones()
+        self.stdout.write(f"Occupancy of {len(zones)} zones recounted.")
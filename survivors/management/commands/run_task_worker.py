@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from utils.tasks import consume
+
+
+class Command(BaseCommand):
+    help = "Consumes post-commit tasks from the task broker."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=settings.TASKS_BATCH_SIZE)
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once the queue is drained.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            consumed = consume(options["batch_size"])
+            if options["verbosity"] > 1 and consumed:
+                self.stdout.write(f"Consumed {consumed} tasks.")
+            if options["once"] and not consumed:
+                break
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from survivors.risk import score_infection_risks
+
+
+class Command(BaseCommand):
+    help = "Recomputes the infection risk scores of healthy survivors."
+
+    def handle(self, *args, **options):
+        scored, changed = score_infection_risks()
+        self.stdout.write(
+            f"Infection risk of {scored} survivors scored, {changed} changed."
+        )
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from survivors.ledger import take_snapshot
+
+
+class Command(BaseCommand):
+    help = "Snapshots inventory holdings so ledger replays can start from it."
+
+    def handle(self, *args, **options):
+        snapshot = take_snapshot()
+        self.stdout.write(
+            f"Snapshot {snapshot.id} taken up to movement "
+            f"{snapshot.last_movement_id} with {snapshot.items.count()} items."
+        )
@@ -0,0 +1,49 @@
+# Generated by Django 5.1 on 2026-10-19 02:29
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def compute_wealth(apps, schema_editor):
+    InventoryItem = apps.get_model("survivors", "InventoryItem")
+    Survivor = apps.get_model("survivors", "Survivor")
+    inventory_value = (
+        InventoryItem.objects.filter(owner=OuterRef("pk"))
+        .values("owner")
+        .annotate(value=Sum(F("quantity") * F("resource__price")))
+        .values("value")
+    )
+    Survivor.objects.update(
+        wealth=Coalesce(
+            Subquery(inventory_value, output_field=DecimalField()),
+            Value(0, output_field=DecimalField()),
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("survivors", "0003_inventory_ledger"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="survivor",
+            name="wealth",
+            field=models.DecimalField(
+                decimal_places=2, default=Decimal("0.00"), max_digits=12
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="survivor",
+            index=models.Index(
+                condition=models.Q(("is_infected", False)),
+                fields=["-wealth", "id"],
+                name="survivor_wealth_rank_idx",
+            ),
+        ),
+        migrations.RunPython(compute_wealth, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.1 on 2026-10-19 02:30
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("survivors", "0004_survivor_wealth"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name="survivor",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["name"],
+                name="survivor_name_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="survivor",
+            index=models.Index(
+                fields=["is_infected", "gender", "age"],
+                include=("id", "name", "created_at"),
+                name="survivor_filter_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="survivor",
+            index=models.Index(
+                condition=models.Q(("is_infected", False)),
+                fields=["created_at"],
+                include=("id", "name", "age", "gender"),
+                name="survivor_healthy_created_idx",
+            ),
+        ),
+    ]
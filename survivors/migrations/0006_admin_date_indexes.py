@@ -0,0 +1,32 @@
+# Generated by Django 5.1 on 2026-10-19 02:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("survivors", "0005_survivor_search_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="infectionreport",
+            index=models.Index(
+                fields=["created_at"], name="survivors_i_created_c3266f_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="locationlog",
+            index=models.Index(
+                fields=["survivor", "-created_at"],
+                name="survivors_l_survivo_58ba68_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="locationlog",
+            index=models.Index(
+                fields=["created_at"], name="survivors_l_created_919da6_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 5.1 on 2026-10-19 03:02
+
+from django.db import migrations, models
+
+
+BACKFILL_LAST_LOCATIONS_SQL = """
+    UPDATE survivors_survivor AS survivor
+    SET last_latitude = latest.latitude,
+        last_longitude = latest.longitude,
+        last_located_at = latest.created_at
+    FROM (
+        SELECT DISTINCT ON (survivor_id) survivor_id, latitude, longitude, created_at
+        FROM survivors_locationlog
+        ORDER BY survivor_id, created_at DESC
+    ) AS latest
+    WHERE survivor.id = latest.survivor_id
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("survivors", "0007_trade_log"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Zone",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("name", models.CharField(max_length=255)),
+                (
+                    "shape",
+                    models.CharField(
+                        choices=[("circle", "Circle"), ("polygon", "Polygon")],
+                        max_length=16,
+                    ),
+                ),
+                ("center_latitude", models.FloatField(blank=True, null=True)),
+                ("center_longitude", models.FloatField(blank=True, null=True)),
+                ("radius", models.FloatField(blank=True, null=True)),
+                ("vertices", models.JSONField(blank=True, default=list)),
+                ("min_latitude", models.FloatField(editable=False)),
+                ("max_latitude", models.FloatField(editable=False)),
+                ("min_longitude", models.FloatField(editable=False)),
+                ("max_longitude", models.FloatField(editable=False)),
+                ("healthy_count", models.IntegerField(default=0, editable=False)),
+                ("infected_count", models.IntegerField(default=0, editable=False)),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+        migrations.AddField(
+            model_name="survivor",
+            name="last_latitude",
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="survivor",
+            name="last_located_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="survivor",
+            name="last_longitude",
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="survivor",
+            index=models.Index(
+                condition=models.Q(("last_latitude__isnull", False)),
+                fields=["last_latitude", "last_longitude"],
+                include=("is_infected",),
+                name="survivor_last_location_idx",
+            ),
+        ),
+        migrations.RunSQL(BACKFILL_LAST_LOCATIONS_SQL, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1 on 2026-10-19 03:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("survivors", "0008_zones"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="survivor",
+            name="infection_risk",
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+    ]
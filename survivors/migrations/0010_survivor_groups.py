@@ -0,0 +1,74 @@
+# Generated by Django 5.1 on 2026-10-19 03:22
+
+import django.contrib.postgres.fields
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("survivors", "0009_survivor_infection_risk"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DirtyGroupCell",
+            fields=[
+                ("cell", models.BigIntegerField(primary_key=True, serialize=False)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="SurvivorGroup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("size", models.PositiveIntegerField()),
+                ("center_latitude", models.FloatField()),
+                ("center_longitude", models.FloatField()),
+                (
+                    "survivor_ids",
+                    django.contrib.postgres.fields.ArrayField(
+                        base_field=models.BigIntegerField(), size=None
+                    ),
+                ),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+        migrations.AddField(
+            model_name="survivor",
+            name="group_cell",
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="survivor",
+            name="group",
+            field=models.ForeignKey(
+                blank=True,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="survivors",
+                to="survivors.survivorgroup",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="survivor",
+            index=models.Index(
+                condition=models.Q(("group_cell__isnull", False)),
+                fields=["group_cell"],
+                name="survivor_group_cell_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.1 on 2026-10-19 03:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("resources", "0004_resource_price_version"),
+        ("survivors", "0010_survivor_groups"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="inventoryitem",
+            index=models.Index(
+                fields=["resource", "-quantity"],
+                include=("owner",),
+                name="inventory_resource_holders_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1 on 2026-10-19 03:50
+
+import django.db.models.functions.datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("survivors", "0011_inventory_resource_holders_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="dirtygroupcell",
+            name="marked_at",
+            field=models.DateTimeField(
+                db_default=django.db.models.functions.datetime.Now()
+            ),
+        ),
+    ]
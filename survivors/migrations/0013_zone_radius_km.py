@@ -0,0 +1,40 @@
+# Generated by Django 5.1 on 2026-10-19 09:12
+
+import math
+
+from django.db import migrations, models
+
+from survivors.grid import EARTH_RADIUS_KM, get_bounding_box
+
+
+def convert_radii_to_km(apps, schema_editor):
+    Zone = apps.get_model("survivors", "Zone")
+    zones = list(Zone.objects.filter(shape="circle"))
+    for zone in zones:
+        zone.radius = math.radians(zone.radius) * EARTH_RADIUS_KM
+        latitudes, longitude_ranges = get_bounding_box(
+            zone.center_latitude, zone.center_longitude, zone.radius
+        )
+        zone.min_latitude, zone.max_latitude = latitudes
+        zone.min_longitude = min(west for west, _ in longitude_ranges)
+        zone.max_longitude = max(east for _, east in longitude_ranges)
+    Zone.objects.bulk_update(
+        zones,
+        ["radius", "min_latitude", "max_latitude", "min_longitude", "max_longitude"],
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("survivors", "0012_dirty_group_cell_marked_at"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="zone",
+            name="radius",
+            field=models.FloatField(blank=True, help_text="Kilometres.", null=True),
+        ),
+        migrations.RunPython(convert_radii_to_km, migrations.RunPython.noop),
+    ]
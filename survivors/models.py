@@ -1,5 +1,12 @@
+from decimal import Decimal
+
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models.functions import Now
 
+from .grid import get_bounding_box, get_distance
 from resources.models import Resource
 from utils.models import BaseModel
 
@@ -16,6 +23,61 @@ class Survivor(BaseModel):
     age = models.PositiveIntegerField()
     gender = models.ForeignKey(Gender, on_delete=models.SET_NULL, blank=True, null=True)
     is_infected = models.BooleanField(default=False)
+    wealth = models.DecimalField(
+        default=Decimal("0.00"), max_digits=12, decimal_places=2
+    )
+    # Denormalized from the latest `LocationLog`, see `zones.move_survivor`.
+    last_latitude = models.FloatField(null=True, blank=True, editable=False)
+    last_longitude = models.FloatField(null=True, blank=True, editable=False)
+    last_located_at = models.DateTimeField(null=True, blank=True, editable=False)
+    # Between 0 and 1, NULL for infected survivors, see `risk.score_infection_risks`.
+    infection_risk = models.FloatField(null=True, blank=True, editable=False)
+    # Grid cell of the latest location, and group, see `groups`.
+    group_cell = models.BigIntegerField(null=True, blank=True, editable=False)
+    group = models.ForeignKey(
+        "SurvivorGroup",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name="survivors",
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["last_latitude", "last_longitude"],
+                name="survivor_last_location_idx",
+                condition=models.Q(last_latitude__isnull=False),
+                include=["is_infected"],
+            ),
+            models.Index(
+                fields=["group_cell"],
+                name="survivor_group_cell_idx",
+                condition=models.Q(group_cell__isnull=False),
+            ),
+            models.Index(
+                fields=["-wealth", "id"],
+                name="survivor_wealth_rank_idx",
+                condition=models.Q(is_infected=False),
+            ),
+            GinIndex(
+                fields=["name"],
+                name="survivor_name_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+            models.Index(
+                fields=["is_infected", "gender", "age"],
+                name="survivor_filter_idx",
+                include=["id", "name", "created_at"],
+            ),
+            models.Index(
+                fields=["created_at"],
+                name="survivor_healthy_created_idx",
+                condition=models.Q(is_infected=False),
+                include=["id", "name", "age", "gender"],
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -28,6 +90,12 @@ class LocationLog(BaseModel):
         Survivor, on_delete=models.CASCADE, related_name="location_logs"
     )
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["survivor", "-created_at"]),
+            models.Index(fields=["created_at"]),
+        ]
+
 
 class InfectionReport(BaseModel):
     author = models.ForeignKey(Survivor, on_delete=models.CASCADE)
@@ -37,6 +105,7 @@ class InfectionReport(BaseModel):
 
     class Meta:
         unique_together = ("author", "infected_survivor")
+        indexes = [models.Index(fields=["created_at"])]
 
 
 class InventoryItem(BaseModel):
@@ -48,3 +117,179 @@ class InventoryItem(BaseModel):
 
     class Meta:
         unique_together = ("resource", "owner")
+        indexes = [
+            # Holders of a resource by quantity, see `partners`.
+            models.Index(
+                fields=["resource", "-quantity"],
+                name="inventory_resource_holders_idx",
+                include=["owner"],
+            ),
+        ]
+
+
+class Trade(BaseModel):
+    survivor = models.ForeignKey(
+        Survivor, on_delete=models.CASCADE, related_name="initiated_trades"
+    )
+    partner = models.ForeignKey(
+        Survivor, on_delete=models.CASCADE, related_name="accepted_trades"
+    )
+    value = models.DecimalField(max_digits=12, decimal_places=2)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["survivor", "-created_at"]),
+            models.Index(fields=["partner", "-created_at"]),
+        ]
+
+
+class TradeItem(models.Model):
+    trade = models.ForeignKey(Trade, on_delete=models.CASCADE, related_name="items")
+    giver = models.ForeignKey(Survivor, on_delete=models.CASCADE, related_name="+")
+    resource = models.ForeignKey(Resource, on_delete=models.CASCADE)
+    quantity = models.IntegerField()
+    price = models.DecimalField(max_digits=5, decimal_places=2)
+
+
+class InventoryMovement(BaseModel):
+    class Reason(models.TextChoices):
+        OPENING_BALANCE = "opening_balance"
+        REGISTRATION = "registration"
+        TRADE = "trade"
+        INFECTION_LOCKOUT = "infection_lockout"
+
+    owner = models.ForeignKey(
+        Survivor, on_delete=models.CASCADE, related_name="inventory_movements"
+    )
+    resource = models.ForeignKey(Resource, on_delete=models.CASCADE)
+    delta = models.IntegerField()
+    reason = models.CharField(max_length=32, choices=Reason.choices)
+    trade = models.ForeignKey(
+        Trade,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="movements",
+    )
+
+    class Meta:
+        indexes = [models.Index(fields=["owner", "created_at"])]
+
+
+class InventorySnapshot(BaseModel):
+    last_movement_id = models.BigIntegerField(default=0)
+
+
+class InventorySnapshotItem(models.Model):
+    snapshot = models.ForeignKey(
+        InventorySnapshot, on_delete=models.CASCADE, related_name="items"
+    )
+    owner = models.ForeignKey(Survivor, on_delete=models.CASCADE)
+    resource = models.ForeignKey(Resource, on_delete=models.CASCADE)
+    quantity = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ("snapshot", "owner", "resource")
+
+
+class Zone(BaseModel):
+    """
+    Safe zone, a circle of `radius` kilometres or a polygon in
+    latitude/longitude coordinates, with counters of the survivors whose
+    latest location is inside it.
+    """
+
+    class Shape(models.TextChoices):
+        CIRCLE = "circle"
+        POLYGON = "polygon"
+
+    name = models.CharField(max_length=255)
+    shape = models.CharField(max_length=16, choices=Shape.choices)
+    center_latitude = models.FloatField(null=True, blank=True)
+    center_longitude = models.FloatField(null=True, blank=True)
+    radius = models.FloatField(null=True, blank=True, help_text="Kilometres.")
+    # `[[latitude, longitude], ...]`
+    vertices = models.JSONField(default=list, blank=True)
+    min_latitude = models.FloatField(editable=False)
+    max_latitude = models.FloatField(editable=False)
+    min_longitude = models.FloatField(editable=False)
+    max_longitude = models.FloatField(editable=False)
+    healthy_count = models.IntegerField(default=0, editable=False)
+    infected_count = models.IntegerField(default=0, editable=False)
+
+    def __str__(self):
+        return self.name
+
+    def clean(self):
+        if self.shape == self.Shape.CIRCLE:
+            if None in (self.center_latitude, self.center_longitude, self.radius):
+                raise ValidationError("Circles need a center and a radius.")
+            if self.radius <= 0:
+                raise ValidationError({"radius": "Radius must be positive."})
+        elif len(self.vertices) < 3 or any(
+            len(vertex) != 2 for vertex in self.vertices
+        ):
+            raise ValidationError(
+                {"vertices": "Polygons need at least 3 [latitude, longitude] pairs."}
+            )
+
+    def save(self, *args, **kwargs):
+        if self.shape == self.Shape.CIRCLE:
+            latitudes, longitude_ranges = get_bounding_box(
+                self.center_latitude, self.center_longitude, self.radius
+            )
+            self.min_latitude, self.max_latitude = latitudes
+            # Boxes split at the antimeridian span all longitudes.
+            self.min_longitude = min(west for west, _ in longitude_ranges)
+            self.max_longitude = max(east for _, east in longitude_ranges)
+        else:
+            latitudes, longitudes = zip(*self.vertices)
+            self.min_latitude, self.max_latitude = min(latitudes), max(latitudes)
+            self.min_longitude, self.max_longitude = min(longitudes), max(longitudes)
+        super().save(*args, **kwargs)
+
+    def contains(self, latitude, longitude):
+        if not (
+            self.min_latitude <= latitude <= self.max_latitude
+            and self.min_longitude <= longitude <= self.max_longitude
+        ):
+            return False
+        if self.shape == self.Shape.CIRCLE:
+            return (
+                get_distance(
+                    self.center_latitude, self.center_longitude, latitude, longitude
+                )
+                <= self.radius
+            )
+
+        # Ray casting along the latitude axis.
+        inside = False
+        for (lat_a, lon_a), (lat_b, lon_b) in zip(
+            self.vertices, self.vertices[-1:] + self.vertices[:-1]
+        ):
+            if (lon_a > longitude) != (lon_b > longitude) and latitude < (
+                lat_b - lat_a
+            ) * (longitude - lon_a) / (lon_b - lon_a) + lat_a:
+                inside = not inside
+        return inside
+
+
+class SurvivorGroup(BaseModel):
+    """
+    Survivors travelling together, clustered from their recent locations.
+    """
+
+    size = models.PositiveIntegerField()
+    center_latitude = models.FloatField()
+    center_longitude = models.FloatField()
+    survivor_ids = ArrayField(models.BigIntegerField())
+
+
+class DirtyGroupCell(models.Model):
+    """
+    Grid cell whose survivors moved since they were last clustered.
+    """
+
+    cell = models.BigIntegerField(primary_key=True)
+    # Only the marks seen by a clustering run are cleared by it.
+    marked_at = models.DateTimeField(db_default=Now())
@@ -0,0 +1,63 @@
+"""
+Nearest trade partners holding a wanted resource.
+
+Partners are searched in bounding boxes around a survivor's latest location,
+growing from `TRADE_PARTNERS_MIN_RADIUS_KM` until enough are found within the
+radius or `TRADE_PARTNERS_MAX_RADIUS_KM` is reached. Each step is one query
+joining the last location index of survivors with the index of resource
+holders by quantity, so only the neighbourhood is ever read.
+"""
+
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db.models import F, Q
+
+from .grid import get_bounding_box, get_distance
+from .models import Survivor
+
+
+RADIUS_GROWTH = 4
+
+
+def find_trade_partners(survivor, resource_id, quantity, limit):
+    """
+    Return up to `limit` healthy survivors, nearest to `survivor` first,
+    holding at least `quantity` of a resource, with their `distance` in
+    kilometres and the `quantity` they hold.
+    """
+    holders = (
+        Survivor.objects.filter(
+            is_infected=False,
+            inventory_items__resource_id=resource_id,
+            inventory_items__quantity__gte=quantity,
+        )
+        .exclude(id=survivor.id)
+        .annotate(quantity=F("inventory_items__quantity"))
+        .only("id", "name", "last_latitude", "last_longitude")
+    )
+    radius = settings.TRADE_PARTNERS_MIN_RADIUS_KM
+    while True:
+        latitudes, longitude_ranges = get_bounding_box(
+            survivor.last_latitude, survivor.last_longitude, radius
+        )
+        partners = []
+        for partner in holders.filter(
+            reduce(or_, (Q(last_longitude__range=r) for r in longitude_ranges)),
+            last_latitude__range=latitudes,
+        ):
+            partner.distance = get_distance(
+                survivor.last_latitude,
+                survivor.last_longitude,
+                partner.last_latitude,
+                partner.last_longitude,
+            )
+            # Box corners are farther than the radius, and may hide nearer
+            # partners beyond the box.
+            if partner.distance <= radius:
+                partners.append(partner)
+        if len(partners) >= limit or radius >= settings.TRADE_PARTNERS_MAX_RADIUS_KM:
+            partners.sort(key=lambda partner: (partner.distance, partner.id))
+            return partners[:limit]
+        radius = min(radius * RADIUS_GROWTH, settings.TRADE_PARTNERS_MAX_RADIUS_KM)
@@ -0,0 +1,121 @@
+"""
+Infection risk scores of healthy survivors.
+
+A survivor's risk grows with the infection reports filed against them and
+with the exposure of their latest location to the recent locations of
+infected survivors: a Gaussian kernel of the distance, cut off at three
+radii. Scores of all survivors are computed at once on NumPy arrays, only
+comparing survivors in neighbouring cells of the cutoff size, see `grid`.
+"""
+
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from .grid import iter_pairs, to_cartesian
+from .infections import INFECTION_REPORTS_THRESHOLD
+from .models import InfectionReport, Survivor
+
+
+_LOAD_SURVIVORS_SQL = f"""
+    SELECT
+        survivor.id,
+        survivor.last_latitude,
+        survivor.last_longitude,
+        survivor.is_infected,
+        COALESCE(survivor.last_located_at >= %s, FALSE),
+        COALESCE(reports.count, 0)
+    FROM {Survivor._meta.db_table} AS survivor
+    LEFT JOIN (
+        SELECT infected_survivor_id, COUNT(*) AS count
+        FROM {InfectionReport._meta.db_table}
+        GROUP BY infected_survivor_id
+    ) AS reports ON reports.infected_survivor_id = survivor.id
+"""
+
+# Survivors infected since their risk was computed keep the NULL risk set by
+# `flag_infected_survivors`.
+_UPDATE_RISKS_SQL = f"""
+    UPDATE {Survivor._meta.db_table} AS survivor
+    SET infection_risk = risk.value
+    FROM unnest(%s::bigint[], %s::float8[]) AS risk(id, value)
+    WHERE survivor.id = risk.id
+        AND NOT survivor.is_infected
+        AND survivor.infection_risk IS DISTINCT FROM risk.value
+"""
+
+
+def load_survivors(recent_since):
+    """
+    Return `(ids, latitudes, longitudes, is_infected, is_recent, reports)`
+    arrays of all survivors, with NaN coordinates if they were never located.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(_LOAD_SURVIVORS_SQL, [recent_since])
+        columns = list(zip(*cursor.fetchall())) or [()] * 6
+    return tuple(
+        np.array(column, dtype=dtype)
+        for column, dtype in zip(
+            columns, (np.int64, np.float64, np.float64, bool, bool, np.int64)
+        )
+    )
+
+
+def get_exposures(points, sources, radius):
+    """
+    Return the sum, for each of `points`, of the Gaussian kernel of their
+    distances to `sources` within three `radius`.
+    """
+    exposures = np.zeros(len(points))
+    for point_indices, _, squared_distances in iter_pairs(points, sources, 3 * radius):
+        exposures += np.bincount(
+            point_indices,
+            np.exp(-squared_distances / radius**2),
+            minlength=len(points),
+        )
+    return exposures
+
+
+def compute_risks(latitudes, longitudes, is_infected, is_recent, reports, radius):
+    """
+    Return risk scores between 0 and 1 of survivors, NaN for infected ones.
+    Only infected survivors located recently (`is_recent`) expose others.
+    """
+    is_located = ~np.isnan(latitudes)
+    points = to_cartesian(latitudes, longitudes)
+    targets = ~is_infected & is_located
+    exposures = np.zeros(len(latitudes))
+    exposures[targets] = get_exposures(
+        points[targets], points[is_infected & is_recent & is_located], radius
+    )
+    risks = 1 - np.exp(-(exposures + reports / INFECTION_REPORTS_THRESHOLD))
+    risks[is_infected] = np.nan
+    return risks
+
+
+def score_infection_risks(now=None):
+    """
+    Recompute and store the infection risk of all healthy survivors, in one
+    UPDATE, and return the number of survivors scored and of scores changed.
+    """
+    now = now or timezone.now()
+    ids, latitudes, longitudes, is_infected, is_recent, reports = load_survivors(
+        now - timedelta(hours=settings.INFECTION_RISK_WINDOW_HOURS)
+    )
+    risks = compute_risks(
+        latitudes,
+        longitudes,
+        is_infected,
+        is_recent,
+        reports,
+        settings.INFECTION_RISK_RADIUS_KM,
+    )
+    healthy = ~is_infected
+    with connection.cursor() as cursor:
+        cursor.execute(
+            _UPDATE_RISKS_SQL, [ids[healthy].tolist(), risks[healthy].tolist()]
+        )
+        return int(healthy.sum()), cursor.rowcount
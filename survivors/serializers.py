@@ -1,13 +1,22 @@
-from django.db import transaction
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
 
+from .dashboard import invalidate_dashboards
+from .inventories import invalidate_inventories
+from .ledger import record_movements
 from .models import (
     Gender,
     Survivor,
     LocationLog,
     InfectionReport,
     InventoryItem,
+    InventoryMovement,
+    SurvivorGroup,
+    Zone,
 )
+from .tasks import flag_infected_survivors_task
+from .wealth import apply_wealth_deltas
+from .zones import move_survivor
 from resources.models import Resource
 
 
@@ -75,9 +84,54 @@ class SurvivorSerializer(serializers.ModelSerializer):
             InventoryItem(owner=instance, **item) for item in inventory_items_data
         ]
         InventoryItem.objects.bulk_create(inventory_items)
+        movements = record_movements(
+            InventoryMovement(
+                owner=instance,
+                resource=item.resource,
+                delta=item.quantity,
+                reason=InventoryMovement.Reason.REGISTRATION,
+            )
+            for item in inventory_items
+        )
+        apply_wealth_deltas(movements)
+        invalidate_inventories([instance.id])
         return instance
 
 
+class SurvivorFilterSerializer(serializers.Serializer):
+    is_infected = serializers.BooleanField(required=False)
+    gender_id = serializers.IntegerField(required=False)
+    age_min = serializers.IntegerField(min_value=0, required=False)
+    age_max = serializers.IntegerField(min_value=0, required=False)
+    created_after = serializers.DateTimeField(required=False)
+    created_before = serializers.DateTimeField(required=False)
+    name = serializers.CharField(required=False)
+    search = serializers.CharField(required=False)
+
+
+class SurvivorWealthSerializer(serializers.ModelSerializer):
+    rank = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Survivor
+        fields = ["id", "name", "wealth", "rank"]
+
+
+class TradePartnerFilterSerializer(serializers.Serializer):
+    resource_id = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1, default=1)
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=10)
+
+
+class TradePartnerSerializer(serializers.ModelSerializer):
+    quantity = serializers.IntegerField(read_only=True)
+    distance_km = serializers.FloatField(source="distance", read_only=True)
+
+    class Meta:
+        model = Survivor
+        fields = ["id", "name", "quantity", "distance_km"]
+
+
 class SurvivorLocationLogSerializer(LocationLogSerializer):
     survivor = SurvivorSerializer(read_only=True)
     survivor_id = serializers.PrimaryKeyRelatedField(
@@ -89,6 +143,71 @@ class SurvivorLocationLogSerializer(LocationLogSerializer):
     class Meta(LocationLogSerializer.Meta):
         fields = [*LocationLogSerializer.Meta.fields, "survivor", "survivor_id"]
 
+    @transaction.atomic
+    def create(self, validated_data):
+        instance = super().create(validated_data)
+        move_survivor(
+            instance.survivor_id,
+            instance.latitude,
+            instance.longitude,
+            instance.created_at,
+        )
+        invalidate_dashboards([instance.survivor_id])
+        return instance
+
+
+class LastLocationSerializer(serializers.Serializer):
+    latitude = serializers.FloatField(source="last_latitude")
+    longitude = serializers.FloatField(source="last_longitude")
+    created_at = serializers.DateTimeField(source="last_located_at")
+
+    def to_representation(self, instance):
+        if instance.last_located_at is None:
+            return None
+        return super().to_representation(instance)
+
+
+class SurvivorDashboardSerializer(serializers.ModelSerializer):
+    gender = serializers.CharField(
+        source="gender.name", read_only=True, allow_null=True
+    )
+    infection_reports_count = serializers.IntegerField(read_only=True)
+    last_location = LastLocationSerializer(source="*", read_only=True)
+    inventory_items = InventoryItemSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Survivor
+        fields = [
+            "id",
+            "name",
+            "age",
+            "gender",
+            "is_infected",
+            "wealth",
+            "infection_reports_count",
+            "last_location",
+            "inventory_items",
+        ]
+
+
+class ZoneSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Zone
+        fields = ["id", "name", "shape", "healthy_count", "infected_count"]
+
+
+class SurvivorGroupSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SurvivorGroup
+        fields = [
+            "id",
+            "size",
+            "center_latitude",
+            "center_longitude",
+            "survivor_ids",
+            "updated_at",
+        ]
+
 
 class InfectionReportSerializer(serializers.ModelSerializer):
     author_id = serializers.PrimaryKeyRelatedField(
@@ -104,6 +223,8 @@ class InfectionReportSerializer(serializers.ModelSerializer):
         model = InfectionReport
         fields = ["author_id", "infected_survivor_id"]
 
+    duplicate_error = {"author_id": ["You cannot report same survivor twice!"]}
+
     def validate(self, attrs):
         author = attrs.get("author")
         infected_survivor = attrs.get("infected_survivor")
@@ -111,21 +232,64 @@ class InfectionReportSerializer(serializers.ModelSerializer):
         if InfectionReport.objects.filter(
             author=author, infected_survivor=infected_survivor
         ).exists():
-            raise serializers.ValidationError(
-                {"author_id": ["You cannot report same survivor twice!"]}
-            )
+            raise serializers.ValidationError(self.duplicate_error)
         return super().validate(attrs)
 
     @transaction.atomic
     def create(self, validated_data):
-        instance = super().create(validated_data)
-        potentially_infected_survivor = instance.infected_survivor
-        if potentially_infected_survivor.infection_reports.count() >= 3:
-            potentially_infected_survivor.is_infected = True
-            potentially_infected_survivor.save()
+        try:
+            with transaction.atomic():
+                instance = super().create(validated_data)
+        except IntegrityError:
+            # Reported concurrently after `validate` checked.
+            raise serializers.ValidationError(self.duplicate_error)
+        flag_infected_survivors_task.delay([instance.infected_survivor_id])
+        invalidate_dashboards([instance.infected_survivor_id])
         return instance
 
 
+class InfectionReportItemSerializer(serializers.Serializer):
+    author_id = serializers.IntegerField()
+    infected_survivor_id = serializers.IntegerField()
+
+
+class InfectionReportBulkSerializer(serializers.Serializer):
+    reports = InfectionReportItemSerializer(many=True, allow_empty=False)
+
+    def validate_reports(self, value):
+        survivor_ids = {
+            survivor_id
+            for report in value
+            for survivor_id in (report["author_id"], report["infected_survivor_id"])
+        }
+        infection_statuses = dict(
+            Survivor.objects.filter(id__in=survivor_ids).values_list(
+                "id", "is_infected"
+            )
+        )
+
+        if survivor_ids - infection_statuses.keys():
+            raise serializers.ValidationError(["Some reported survivors do not exist."])
+        if any(infection_statuses[report["author_id"]] for report in value):
+            raise serializers.ValidationError(
+                ["Infected survivors cannot perform such action."]
+            )
+        return value
+
+    @transaction.atomic
+    def create(self, validated_data):
+        InfectionReport.objects.bulk_create(
+            [InfectionReport(**report) for report in validated_data["reports"]],
+            ignore_conflicts=True,
+        )
+        infected_survivor_ids = [
+            report["infected_survivor_id"] for report in validated_data["reports"]
+        ]
+        flag_infected_survivors_task.delay(infected_survivor_ids)
+        invalidate_dashboards(infected_survivor_ids)
+        return validated_data
+
+
 class TradeSerializer(serializers.Serializer):
     survivor_id = serializers.PrimaryKeyRelatedField(
         queryset=Survivor.objects.all(), write_only=True
@@ -142,48 +306,27 @@ class TradeSerializer(serializers.Serializer):
         value = validate_survivor_not_infected(self, value)
         survivor = Survivor.objects.get(id=self.initial_data["survivor_id"])
         if survivor == value:
-            raise serializers.ValidationError(
-                ["You can't trade with yourself!"]
-            )
-        return value
-
-    def validate_offered_items(self, value):
-        survivor = Survivor.objects.get(id=self.initial_data["survivor_id"])
-
-        for item in value:
-            if not survivor.inventory_items.filter(
-                resource__name=item["resource"].name, quantity__gte=item["quantity"]
-            ).exists():
-                raise serializers.ValidationError(
-                    ["Some offered items are missing from survivor's inventory."]
-                )
-        return value
-
-    def validate_requested_items(self, value):
-        partner = Survivor.objects.get(id=self.initial_data["partner_id"])
-
-        for item in value:
-            if not partner.inventory_items.filter(
-                resource__name=item["resource"].name, quantity__gte=item["quantity"]
-            ).exists():
-                raise serializers.ValidationError(
-                    ["Some requested items are missing from partner's inventory."]
-                )
+            raise serializers.ValidationError(["You can't trade with yourself!"])
         return value
 
     def validate(self, attrs):
-        resources = Resource.objects.values("name", "price")
-        resource_price_map = {r["name"]: r["price"] for r in resources}
+        # Prices are read once, so the trade is balanced against one snapshot.
+        prices = {
+            resource_id: (price, price_version)
+            for resource_id, price, price_version in Resource.objects.values_list(
+                "id", "price", "price_version"
+            )
+        }
 
         offered_value = sum(
             [
-                resource_price_map[item["resource"].name] * item["quantity"]
+                prices[item["resource"].id][0] * item["quantity"]
                 for item in attrs["offered_items"]
             ]
         )
         requested_value = sum(
             [
-                resource_price_map[item["resource"].name] * item["quantity"]
+                prices[item["resource"].id][0] * item["quantity"]
                 for item in attrs["requested_items"]
             ]
         )
@@ -195,4 +338,5 @@ class TradeSerializer(serializers.Serializer):
                     ]
                 }
             )
+        attrs["prices"] = prices
         return super().validate(attrs)
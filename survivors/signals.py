@@ -0,0 +1,62 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .dashboard import invalidate_dashboards
+from .inventories import invalidate_all_inventories
+from .models import InventoryItem, Zone
+from .wealth import recompute_wealth_of_holders
+from .zones import invalidate_zone_index, recount_zones
+from resources.models import Resource
+from resources.signals import prices_changed
+
+
+@receiver(pre_save, sender=Resource)
+def remember_resource_price(sender, instance, raw, **kwargs):
+    instance._previous_price = (
+        Resource.objects.filter(pk=instance.pk).values_list("price", flat=True).first()
+        if instance.pk and not raw
+        else None
+    )
+
+
+@receiver(post_save, sender=Resource)
+def update_holders_on_resource_change(sender, instance, created, raw, **kwargs):
+    if raw or created:
+        return
+    if getattr(instance, "_previous_price", None) != instance.price:
+        recompute_wealth_of_holders([instance.pk])
+    # Cached dashboards and inventories also render resource names.
+    invalidate_dashboards_of_holders([instance.pk])
+    invalidate_all_inventories()
+
+
+@receiver(post_delete, sender=Resource)
+def forget_deleted_resource(sender, instance, **kwargs):
+    invalidate_all_inventories()
+
+
+@receiver(prices_changed, sender=Resource)
+def recompute_wealth_on_prices_change(sender, resource_ids, **kwargs):
+    recompute_wealth_of_holders(resource_ids)
+    invalidate_dashboards_of_holders(resource_ids)
+    invalidate_all_inventories()
+
+
+def invalidate_dashboards_of_holders(resource_ids):
+    invalidate_dashboards(
+        InventoryItem.objects.filter(resource_id__in=resource_ids)
+        .values_list("owner_id", flat=True)
+        .distinct()
+    )
+
+
+@receiver(post_save, sender=Zone)
+def recount_saved_zone(sender, instance, raw, **kwargs):
+    invalidate_zone_index()
+    if not raw:
+        recount_zones([instance])
+
+
+@receiver(post_delete, sender=Zone)
+def forget_deleted_zone(sender, instance, **kwargs):
+    invalidate_zone_index()
@@ -0,0 +1,256 @@
+"""
+Concurrency stress harness for trades and infection reports.
+
+Worker threads, each with its own database connection, send random trades
+and infection reports through the API while `check_invariants` verifies the
+resulting state. Used by the `stress` tagged tests.
+"""
+
+import json
+import logging
+import random
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+
+from django.db import OperationalError, connection
+from django.db.models import Count, Sum
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from .infections import INFECTION_REPORTS_THRESHOLD
+from .ledger import get_holdings, record_movements
+from .models import InfectionReport, InventoryItem, InventoryMovement, Survivor
+from resources.models import Resource
+
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_PGCODES = {"40P01": "deadlock", "40001": "serialization failure"}
+
+
+@dataclass
+class StressStats:
+    elapsed: float = 0.0
+    outcomes: Counter = field(default_factory=Counter)
+    retries: Counter = field(default_factory=Counter)
+
+    @property
+    def operations(self):
+        return sum(self.outcomes.values())
+
+    @property
+    def throughput(self):
+        return self.operations / self.elapsed if self.elapsed else 0.0
+
+    def rate(self, reason=None):
+        """
+        Return retries for `reason` (any by default) per completed operation.
+        """
+        retries = self.retries[reason] if reason else sum(self.retries.values())
+        return retries / self.operations if self.operations else 0.0
+
+    def __str__(self):
+        outcomes = ", ".join(
+            f"{key}: {count}" for key, count in sorted(self.outcomes.items())
+        )
+        return (
+            f"{self.operations} operations in {self.elapsed:.2f}s "
+            f"({self.throughput:.1f}/s); {outcomes}; "
+            f"deadlock rate {self.rate('deadlock'):.2%}, "
+            f"retry rate {self.rate(None):.2%}"
+        )
+
+
+def create_population(survivors_count, resources_count, quantity):
+    """
+    Create survivors holding `quantity` of each resource, priced equally so
+    any same-sized swap of resources is balanced.
+    """
+    resources = Resource.objects.bulk_create(
+        [Resource(name=f"Stress {index}", price=1) for index in range(resources_count)]
+    )
+    survivors = Survivor.objects.bulk_create(
+        [
+            Survivor(name=f"Stress {index}", age=30, wealth=resources_count * quantity)
+            for index in range(survivors_count)
+        ]
+    )
+    InventoryItem.objects.bulk_create(
+        [
+            InventoryItem(owner=survivor, resource=resource, quantity=quantity)
+            for survivor in survivors
+            for resource in resources
+        ]
+    )
+    record_movements(
+        InventoryMovement(
+            owner=survivor,
+            resource=resource,
+            delta=quantity,
+            reason=InventoryMovement.Reason.REGISTRATION,
+        )
+        for survivor in survivors
+        for resource in resources
+    )
+    return [survivor.id for survivor in survivors], [
+        resource.id for resource in resources
+    ]
+
+
+def get_resource_totals():
+    return dict(
+        InventoryItem.objects.values("resource_id")
+        .annotate(total=Sum("quantity"))
+        .values_list("resource_id", "total")
+    )
+
+
+def check_invariants(resource_totals):
+    """
+    Return a list of violated invariants, given the per-resource totals
+    before the run.
+    """
+    violations = []
+    if get_resource_totals() != resource_totals:
+        violations.append("Total quantities per resource are not conserved.")
+    if InventoryItem.objects.filter(quantity__lte=0).exists():
+        violations.append("Some inventory items are empty or negative.")
+
+    balances = {
+        (owner_id, resource_id): quantity
+        for owner_id, resource_id, quantity in InventoryItem.objects.values_list(
+            "owner_id", "resource_id", "quantity"
+        )
+    }
+    if balances != get_holdings():
+        violations.append("Inventory balances do not match the ledger.")
+
+    report_counts = dict(
+        InfectionReport.objects.values("infected_survivor_id")
+        .annotate(count=Count("id"))
+        .values_list("infected_survivor_id", "count")
+    )
+    for survivor_id, is_infected in Survivor.objects.values_list("id", "is_infected"):
+        reported = report_counts.get(survivor_id, 0) >= INFECTION_REPORTS_THRESHOLD
+        if is_infected != reported:
+            violations.append(f"Survivor {survivor_id} infection flag is inconsistent.")
+
+    prices = dict(Resource.objects.values_list("id", "price"))
+    values = Counter()
+    for (owner_id, resource_id), quantity in balances.items():
+        values[owner_id] += quantity * prices[resource_id]
+    for survivor_id, wealth in Survivor.objects.values_list("id", "wealth"):
+        if wealth != values[survivor_id]:
+            violations.append(f"Survivor {survivor_id} wealth is inconsistent.")
+    return violations
+
+
+class StressWorker(threading.Thread):
+    def __init__(self, survivor_ids, resource_ids, operations, stats, lock, **options):
+        super().__init__()
+        self.survivor_ids = survivor_ids
+        self.resource_ids = resource_ids
+        self.operations = operations
+        self.stats = stats
+        self.lock = lock
+        self.random = random.Random(options.get("seed"))
+        self.report_ratio = options.get("report_ratio", 0.1)
+        self.max_retries = options.get("max_retries", 5)
+        self.exception = None
+
+    def run(self):
+        client = APIClient()
+        try:
+            for _ in range(self.operations):
+                if self.random.random() < self.report_ratio:
+                    self.perform("report", self.report, client)
+                else:
+                    self.perform("trade", self.trade, client)
+        except Exception as exc:
+            self.exception = exc
+        finally:
+            connection.close()
+
+    def perform(self, kind, operation, client):
+        for _ in range(self.max_retries + 1):
+            try:
+                status_code = operation(client)
+            except OperationalError as exc:
+                pgcode = getattr(exc.__cause__, "pgcode", None)
+                if pgcode not in RETRYABLE_PGCODES:
+                    raise
+                self.count("retries", RETRYABLE_PGCODES[pgcode])
+                continue
+            if status_code == 409:
+                self.count("retries", "stale prices")
+                continue
+            self.count("outcomes", f"{kind} {status_code}")
+            return
+        self.count("outcomes", f"{kind} gave up")
+
+    def count(self, counter, key):
+        with self.lock:
+            getattr(self.stats, counter)[key] += 1
+
+    def trade(self, client):
+        survivor_id, partner_id = self.random.sample(self.survivor_ids, 2)
+        offered, requested = self.random.sample(self.resource_ids, 2)
+        quantity = self.random.randint(1, 5)
+        res = client.post(
+            reverse("trade", kwargs={"pk": survivor_id}),
+            json.dumps(
+                {
+                    "partner_id": partner_id,
+                    "offered_items": [{"resource_id": offered, "quantity": quantity}],
+                    "requested_items": [
+                        {"resource_id": requested, "quantity": quantity}
+                    ],
+                }
+            ),
+            content_type="application/json",
+        )
+        return res.status_code
+
+    def report(self, client):
+        author_id, survivor_id = self.random.sample(self.survivor_ids, 2)
+        res = client.post(
+            reverse("survivor-infection-reports", kwargs={"pk": survivor_id}),
+            json.dumps({"author_id": author_id}),
+            content_type="application/json",
+        )
+        return res.status_code
+
+
+def run_stress(survivor_ids, resource_ids, workers=8, operations=50, seed=0, **options):
+    """
+    Run `workers` threads performing `operations` random trades and reports
+    each and return the `StressStats` of the run.
+    """
+    stats = StressStats()
+    lock = threading.Lock()
+    threads = [
+        StressWorker(
+            survivor_ids,
+            resource_ids,
+            operations,
+            stats,
+            lock,
+            seed=seed + index,
+            **options,
+        )
+        for index in range(workers)
+    ]
+    started_at = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats.elapsed = time.perf_counter() - started_at
+
+    for thread in threads:
+        if thread.exception:
+            raise thread.exception
+    logger.info("Stress run: %s", stats)
+    return stats
@@ -0,0 +1,8 @@
+from utils.tasks import task
+
+from .infections import flag_infected_survivors
+
+
+@task(batched=True)
+def flag_infected_survivors_task(survivor_ids):
+    flag_infected_survivors(survivor_ids)
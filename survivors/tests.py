@@ -1,19 +1,100 @@
 import json
+import math
+import os
+import tempfile
+import threading
 import time
-
+from datetime import timedelta
+from decimal import Decimal
+from functools import partial
+from io import StringIO
+from unittest import mock
+
+import msgpack
+import numpy as np
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from django.db import ProgrammingError, connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings, tag
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from model_bakery import baker
 from rest_framework import status
+from rest_framework.generics import RetrieveAPIView
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APITestCase
 
+from .archive import (
+    INDEX_NAME,
+    archive_location_logs,
+    load_index,
+    query_location_logs,
+    read_segment,
+    to_timestamp,
+    write_segment,
+)
+from .dashboard import invalidate_dashboards
+from .grid import EARTH_RADIUS_KM, get_bounding_box
+from .groups import (
+    assign_groups,
+    cluster,
+    cluster_all_groups,
+    cluster_groups,
+    mark_dirty_cells,
+)
+from .infections import flag_infected_survivors
+from .inventories import get_inventory_cache
+from .ledger import get_holdings, rebuild_balances, record_movements, take_snapshot
 from .models import (
     Gender,
     Survivor,
     LocationLog,
     InfectionReport,
     InventoryItem,
+    InventoryMovement,
+    DirtyGroupCell,
+    SurvivorGroup,
+    Trade,
+    Zone,
+)
+from .risk import compute_risks, get_exposures, score_infection_risks
+from .serializers import (
+    InfectionReportSerializer,
+    InventoryItemSerializer,
+    SurvivorLocationLogSerializer,
+    SurvivorSerializer,
 )
-from resources.models import Resource
+from .stress import (
+    check_invariants,
+    create_population,
+    get_resource_totals,
+    run_stress,
+)
+from .throttles import LocationLogsThrottle
+from .trades import PricesChanged, execute_trade
+from .zones import get_zone_index, move_survivor
+from .views import LocationLogsListAPIView
+from resources.models import Resource, ResourceTradeVolume
+from utils.caching import get_lru_cache
+from utils.testing import QueryBudgetMixin
+from utils.views import compile_fast_list
+
+
+def use_temporary_throttle_store(test_case):
+    """
+    Throttle in a fresh store, which persists across test runs otherwise.
+    """
+    store_dir = tempfile.TemporaryDirectory()
+    test_case.addCleanup(store_dir.cleanup)
+    settings_override = test_case.settings(
+        THROTTLE_STORE_PATH=os.path.join(store_dir.name, "throttle")
+    )
+    settings_override.enable()
+    test_case.addCleanup(settings_override.disable)
 
 
 class GendersListAPIViewTestCase(APITestCase):
@@ -69,6 +150,153 @@ class LocationLogsListAPIViewTestCase(APITestCase):
 
         self.assertListEqual(expected_data, res_data)
 
+    def test_get_msgpack(self):
+        res = self.client.get(self.url, HTTP_ACCEPT="application/msgpack")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], "application/msgpack")
+
+        json_data = self.client.get(self.url).json()
+        res_data = msgpack.unpackb(res.content, timestamp=3)
+        for item in res_data:
+            item["created_at"] = item["created_at"].strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+        self.assertListEqual(json_data, res_data)
+        self.assertLess(len(res.content), len(self.client.get(self.url).content))
+
+
+class FastJSONListTestCase(APITestCase):
+    def setUp(self):
+        gender = baker.make(Gender)
+        self.survivors = [
+            baker.make(Survivor, name='Zoë \u2028 "quoted"', gender=gender),
+            baker.make(Survivor, gender=None, is_infected=True),
+        ]
+        self.resources = baker.make(Resource, _quantity=3)
+        for survivor in self.survivors:
+            baker.make(LocationLog, survivor=survivor, latitude=0.1, longitude=-1e-7)
+            for resource in self.resources:
+                baker.make(InventoryItem, owner=survivor, resource=resource)
+
+    def assertMatchesSerializer(self, url, serializer):
+        res = self.client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], "application/json")
+        self.assertEqual(JSONRenderer().render(serializer.data), res.content)
+
+    def test_location_logs(self):
+        self.assertMatchesSerializer(
+            reverse("location-logs"),
+            SurvivorLocationLogSerializer(
+                LocationLogsListAPIView().get_queryset(), many=True
+            ),
+        )
+
+    def test_survivors(self):
+        self.assertMatchesSerializer(
+            reverse("survivors"),
+            SurvivorSerializer(Survivor.objects.select_related("gender"), many=True),
+        )
+
+    def test_inventory_items(self):
+        survivor = self.survivors[0]
+        self.assertMatchesSerializer(
+            reverse("survivor-inventory", kwargs={"pk": survivor.id}),
+            InventoryItemSerializer(
+                survivor.inventory_items.select_related("resource"), many=True
+            ),
+        )
+
+
+class SparseFieldsTestCase(APITestCase):
+    def setUp(self):
+        gender = baker.make(Gender)
+        self.survivors = [
+            baker.make(Survivor, gender=gender),
+            baker.make(Survivor, gender=None),
+        ]
+        self.location_logs = [
+            baker.make(LocationLog, survivor=survivor) for survivor in self.survivors
+        ]
+
+    def get_both_paths(self, url, params):
+        """
+        Return SQL and data of the fast and of the serializer response paths.
+        """
+        responses = []
+        for accept in ["application/json", "application/json; indent=2"]:
+            with CaptureQueriesContext(connection) as queries:
+                res = self.client.get(url, params, HTTP_ACCEPT=accept)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            responses.append((queries[-1]["sql"], res.json()))
+        return responses
+
+    def test_location_logs_fields(self):
+        for sql, data in self.get_both_paths(
+            reverse("location-logs"),
+            {"fields": "latitude,longitude,survivor.id,survivor.name"},
+        ):
+            self.assertEqual(
+                [
+                    {
+                        "latitude": log.latitude,
+                        "longitude": log.longitude,
+                        "survivor": {"id": log.survivor.id, "name": log.survivor.name},
+                    }
+                    for log in self.location_logs
+                ],
+                data,
+            )
+            self.assertNotIn("survivors_gender", sql)
+
+    def test_location_logs_collapsed(self):
+        for sql, data in self.get_both_paths(
+            reverse("location-logs"), {"fields": "id,survivor", "expand": ""}
+        ):
+            self.assertEqual(
+                [
+                    {"id": log.id, "survivor": log.survivor.id}
+                    for log in self.location_logs
+                ],
+                data,
+            )
+            self.assertNotIn('"survivors_survivor"."name"', sql)
+
+    def test_survivors_omitted_first_field(self):
+        for _, data in self.get_both_paths(
+            reverse("survivors"), {"fields": "gender,age"}
+        ):
+            self.assertEqual(
+                [
+                    {
+                        "gender": self.survivors[0].gender.name,
+                        "age": self.survivors[0].age,
+                    },
+                    {"age": self.survivors[1].age},
+                ],
+                data,
+            )
+
+    def test_nothing_selected(self):
+        for url, fields, expected in [
+            (reverse("survivors"), "bogus", {}),
+            (reverse("location-logs"), "survivor.bogus", {}),
+        ]:
+            for _, data in self.get_both_paths(url, {"fields": fields}):
+                self.assertEqual([expected, expected], data)
+
+    def test_unknown_fields_ignored(self):
+        compile_fast_list.cache_clear()
+        for fields in ["id,bogus", "id,survivor.bogus", "id,bogus2"]:
+            for _, data in self.get_both_paths(
+                reverse("location-logs"), {"fields": fields, "expand": "bogus"}
+            ):
+                self.assertEqual([{"id": log.id} for log in self.location_logs], data)
+        self.assertEqual(1, compile_fast_list.cache_info().currsize)
+
+    def test_leaderboard_fields(self):
+        res = self.client.get(reverse("leaderboard"), {"fields": "id,rank"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual({"id", "rank"}, set(res.json()[0]))
+
 
 class SurvivorsListCreateAPIView(APITestCase):
     @property
@@ -129,6 +357,63 @@ class SurvivorsListCreateAPIView(APITestCase):
         self.assertEqual(len(inventory_items), 2)
 
 
+class SurvivorsFilterTestCase(APITestCase):
+    @property
+    def url(self):
+        return reverse("survivors")
+
+    def setUp(self):
+        self.genders = baker.make(Gender, _quantity=2)
+        self.alice = baker.make(
+            Survivor, name="Alice Smith", age=20, gender=self.genders[0]
+        )
+        self.alex = baker.make(
+            Survivor, name="Alex Smithers", age=35, gender=self.genders[1]
+        )
+        self.bob = baker.make(
+            Survivor, name="Bob Jones", age=50, gender=self.genders[0], is_infected=True
+        )
+
+    def get_ids(self, params):
+        res = self.client.get(self.url, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [s["id"] for s in res.json()]
+
+    def test_filters(self):
+        self.assertListEqual(
+            [self.alice.id, self.alex.id], self.get_ids({"is_infected": "false"})
+        )
+        self.assertListEqual(
+            [self.alice.id, self.bob.id],
+            sorted(self.get_ids({"gender_id": self.genders[0].id})),
+        )
+        self.assertListEqual(
+            [self.alex.id, self.bob.id], sorted(self.get_ids({"age_min": 30}))
+        )
+        self.assertListEqual(
+            [self.alex.id], self.get_ids({"age_min": 30, "age_max": 40})
+        )
+        self.assertListEqual(
+            [], self.get_ids({"created_after": timezone.now().isoformat()})
+        )
+
+    def test_name_prefix(self):
+        self.assertListEqual(
+            [self.alice.id, self.alex.id], sorted(self.get_ids({"name": "al"}))
+        )
+        self.assertListEqual([], self.get_ids({"name": "smith"}))
+
+    def test_search(self):
+        self.assertListEqual([self.alice.id], self.get_ids({"search": "Alice Smyth"}))
+        self.assertListEqual(
+            [self.alex.id, self.alice.id], self.get_ids({"search": "Alex Smithers"})
+        )
+
+    def test_invalid_filter(self):
+        res = self.client.get(self.url, {"age_min": "old"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
 class SurvivorInfectionReportsCreateAPIViewTestCase(APITestCase):
     @property
     def url(self):
@@ -166,11 +451,12 @@ class SurvivorInfectionReportsCreateAPIViewTestCase(APITestCase):
         self.suspected_survivor.refresh_from_db()
         self.assertFalse(self.suspected_survivor.is_infected)
 
-        self.client.post(
-            self.url,
-            json.dumps({"author_id": baker.make(Survivor, is_infected=False).id}),
-            content_type="application/json",
-        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                self.url,
+                json.dumps({"author_id": baker.make(Survivor, is_infected=False).id}),
+                content_type="application/json",
+            )
 
         self.suspected_survivor.refresh_from_db()
         self.assertEqual(
@@ -211,6 +497,83 @@ class SurvivorInfectionReportsCreateAPIViewTestCase(APITestCase):
 
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def test_post_duplicate_concurrent(self):
+        report_author = baker.make(Survivor, is_infected=False)
+        baker.make(
+            InfectionReport,
+            author=report_author,
+            infected_survivor=self.suspected_survivor,
+        )
+
+        # Reported concurrently, after the duplicate check passed.
+        with mock.patch.object(
+            InfectionReportSerializer, "validate", lambda self, attrs: attrs
+        ):
+            res = self.client.post(
+                self.url,
+                json.dumps({"author_id": report_author.id}),
+                content_type="application/json",
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            ["You cannot report same survivor twice!"], res.json()["author_id"]
+        )
+
+
+class InfectionReportsBulkCreateAPIViewTestCase(APITestCase):
+    @property
+    def url(self):
+        return reverse("infection-reports")
+
+    def setUp(self):
+        self.suspects = baker.make(Survivor, is_infected=False, _quantity=2)
+        self.authors = baker.make(Survivor, is_infected=False, _quantity=3)
+
+    def post(self, reports):
+        return self.client.post(
+            self.url,
+            json.dumps(
+                {
+                    "reports": [
+                        {"author_id": author.id, "infected_survivor_id": suspect.id}
+                        for author, suspect in reports
+                    ]
+                }
+            ),
+            content_type="application/json",
+        )
+
+    def test_post(self):
+        baker.make(
+            InfectionReport, author=self.authors[0], infected_survivor=self.suspects[0]
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.post(
+                [(author, self.suspects[0]) for author in self.authors]
+                + [(self.authors[0], self.suspects[1])]
+            )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        self.assertEqual(4, InfectionReport.objects.count())
+        for suspect in self.suspects:
+            suspect.refresh_from_db()
+        self.assertTrue(self.suspects[0].is_infected)
+        self.assertFalse(self.suspects[1].is_infected)
+
+    def test_post_infected_author(self):
+        self.authors[0].is_infected = True
+        self.authors[0].save()
+
+        res = self.post([(self.authors[0], self.suspects[0])])
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(InfectionReport.objects.exists())
+
+    def test_post_unknown_survivor(self):
+        res = self.post([(self.authors[0], Survivor(id=0))])
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
 
 class SurvivorLocationLogsCreateAPIViewTestCase(APITestCase):
     @property
@@ -219,6 +582,7 @@ class SurvivorLocationLogsCreateAPIViewTestCase(APITestCase):
 
     def setUp(self):
         self.survivor = baker.make(Survivor, is_infected=False)
+        use_temporary_throttle_store(self)
 
     def test_post(self):
         data = {
@@ -239,6 +603,31 @@ class SurvivorLocationLogsCreateAPIViewTestCase(APITestCase):
         self.assertEqual(123.456, location_log.latitude)
         self.assertEqual(789.012, location_log.longitude)
 
+    def test_post_msgpack(self):
+        res = self.client.post(
+            self.url,
+            msgpack.packb({"latitude": 12.5, "longitude": -7.25}),
+            content_type="application/msgpack",
+            HTTP_ACCEPT="application/msgpack",
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        res_data = msgpack.unpackb(res.content, timestamp=3)
+        location_log = LocationLog.objects.get(id=res_data["id"])
+        self.assertEqual(
+            (self.survivor.id, 12.5, -7.25, location_log.created_at),
+            (
+                location_log.survivor_id,
+                res_data["latitude"],
+                res_data["longitude"],
+                res_data["created_at"],
+            ),
+        )
+
+    def test_post_invalid_msgpack(self):
+        res = self.client.post(self.url, b"\xc1", content_type="application/msgpack")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_post_infected(self):
         self.survivor.is_infected = True
         self.survivor.save()
@@ -252,12 +641,866 @@ class SurvivorLocationLogsCreateAPIViewTestCase(APITestCase):
         )
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def test_post_throttled(self):
+        buckets = {
+            "location_logs_survivor": {"rate": 0.5, "burst": 2},
+            "location_logs_client": {"rate": 100, "burst": 100},
+        }
+        other_survivor = baker.make(Survivor, is_infected=False)
+        data = json.dumps({"latitude": 1, "longitude": 2})
+
+        with self.settings(THROTTLE_BUCKETS=buckets):
+            responses = [
+                self.client.post(self.url, data, content_type="application/json")
+                for _ in range(3)
+            ]
+            other_res = self.client.post(
+                reverse("survivor-location-logs", kwargs={"pk": other_survivor.id}),
+                data,
+                content_type="application/json",
+            )
+
+        self.assertEqual([201, 201, 429], [res.status_code for res in responses])
+        self.assertEqual("2", responses[-1]["Retry-After"])
+        self.assertEqual(2, LocationLog.objects.filter(survivor=self.survivor).count())
+        self.assertEqual(other_res.status_code, status.HTTP_201_CREATED)
+
+    def test_post_throttled_client(self):
+        buckets = {
+            "location_logs_survivor": {"rate": 100, "burst": 100},
+            "location_logs_client": {"rate": 1, "burst": 1},
+        }
+        data = json.dumps({"latitude": 1, "longitude": 2})
+
+        with self.settings(THROTTLE_BUCKETS=buckets):
+            self.client.post(self.url, data, content_type="application/json")
+            with self.assertNumQueries(0):
+                res = self.client.post(
+                    self.url, "{invalid", content_type="application/json"
+                )
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual("1", res["Retry-After"])
+
+    def test_post_throttled_survivor_keeps_client_tokens(self):
+        buckets = {
+            "location_logs_survivor": {"rate": 1, "burst": 1},
+            "location_logs_client": {"rate": 0.001, "burst": 2},
+        }
+        data = json.dumps({"latitude": 1, "longitude": 2})
+        other_url = reverse(
+            "survivor-location-logs",
+            kwargs={"pk": baker.make(Survivor, is_infected=False).id},
+        )
+
+        with self.settings(THROTTLE_BUCKETS=buckets):
+            responses = [
+                self.client.post(url, data, content_type="application/json")
+                for url in [self.url, self.url, other_url]
+            ]
+
+        self.assertEqual([201, 429, 201], [res.status_code for res in responses])
+
+    def test_zero_rate_rejected(self):
+        buckets = {
+            "location_logs_survivor": {"rate": 0, "burst": 1},
+            "location_logs_client": {"rate": 1, "burst": 1},
+        }
+        with self.settings(THROTTLE_BUCKETS=buckets):
+            with self.assertRaises(ImproperlyConfigured):
+                LocationLogsThrottle()
+
+
+class ZoneTestCase(APITestCase):
+    def setUp(self):
+        use_temporary_throttle_store(self)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.circle = Zone.objects.create(
+                name="Circle",
+                shape=Zone.Shape.CIRCLE,
+                center_latitude=0,
+                center_longitude=0,
+                radius=112,
+            )
+            # U-shaped, open to the north.
+            self.polygon = Zone.objects.create(
+                name="Polygon",
+                shape=Zone.Shape.POLYGON,
+                vertices=[
+                    [0, 0],
+                    [0, 3],
+                    [3, 3],
+                    [3, 2],
+                    [1, 2],
+                    [1, 1],
+                    [3, 1],
+                    [3, 0],
+                ],
+            )
+        self.survivor = baker.make(Survivor, is_infected=False)
+
+    def get_counts(self):
+        return {
+            zone.name: (zone.healthy_count, zone.infected_count)
+            for zone in Zone.objects.all()
+        }
+
+    def post_location(self, survivor, latitude, longitude):
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(
+                reverse("survivor-location-logs", kwargs={"pk": survivor.id}),
+                json.dumps({"latitude": latitude, "longitude": longitude}),
+                content_type="application/json",
+            )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_contains(self):
+        self.assertEqual(
+            [True, True, False],
+            [self.circle.contains(*point) for point in [(0, 0), (0.6, -0.6), (1, 1)]],
+        )
+        self.assertEqual(
+            [True, True, False, False],
+            [
+                self.polygon.contains(*point)
+                for point in [(0.5, 0.5), (2, 2.5), (2, 1.5), (4, 1)]
+            ],
+        )
+
+    def test_contains_high_latitude(self):
+        zone = Zone.objects.create(
+            name="North",
+            shape=Zone.Shape.CIRCLE,
+            center_latitude=60,
+            center_longitude=0,
+            radius=100,
+        )
+        # A degree of longitude is about 56 km here, one of latitude 111 km.
+        self.assertEqual(
+            [True, True, False, False],
+            [
+                zone.contains(*point)
+                for point in [(60, 1.5), (60.5, 1), (61, 0), (60, -1.9)]
+            ],
+        )
+
+    def test_occupancy_follows_latest_location(self):
+        for latitude, longitude, counts in [
+            (0.5, 0.5, {"Circle": (1, 0), "Polygon": (1, 0)}),
+            (0.5, 0.2, {"Circle": (1, 0), "Polygon": (1, 0)}),
+            (2, 1.5, {"Circle": (0, 0), "Polygon": (0, 0)}),
+            (-0.5, 0, {"Circle": (1, 0), "Polygon": (0, 0)}),
+        ]:
+            self.post_location(self.survivor, latitude, longitude)
+            self.assertEqual(counts, self.get_counts())
+
+        self.survivor.refresh_from_db()
+        self.assertEqual(
+            (-0.5, 0),
+            (self.survivor.last_latitude, self.survivor.last_longitude),
+        )
+
+    def test_occupancy_on_infection(self):
+        self.post_location(self.survivor, 0.5, 0.5)
+        authors = baker.make(Survivor, is_infected=False, _quantity=3)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse("infection-reports"),
+                json.dumps(
+                    {
+                        "reports": [
+                            {
+                                "author_id": a.id,
+                                "infected_survivor_id": self.survivor.id,
+                            }
+                            for a in authors
+                        ]
+                    }
+                ),
+                content_type="application/json",
+            )
+
+        self.assertEqual({"Circle": (0, 1), "Polygon": (0, 1)}, self.get_counts())
+
+    def test_recount_on_save(self):
+        baker.make(Survivor, last_latitude=0.5, last_longitude=0.5, is_infected=True)
+        baker.make(Survivor, last_latitude=2, last_longitude=2.5, is_infected=False)
+        baker.make(Survivor, last_latitude=2, last_longitude=1.5, is_infected=False)
+        self.circle.radius = 335
+        with self.captureOnCommitCallbacks(execute=True):
+            self.circle.save()
+            self.polygon.save()
+
+        self.assertEqual({"Circle": (1, 1), "Polygon": (1, 1)}, self.get_counts())
+
+    def test_list(self):
+        self.post_location(self.survivor, 0.5, 0.5)
+        with self.assertNumQueries(1):
+            res = self.client.get(reverse("zones"))
+
+        self.assertEqual(
+            [
+                {
+                    "id": self.circle.id,
+                    "name": "Circle",
+                    "shape": "circle",
+                    "healthy_count": 1,
+                    "infected_count": 0,
+                },
+                {
+                    "id": self.polygon.id,
+                    "name": "Polygon",
+                    "shape": "polygon",
+                    "healthy_count": 1,
+                    "infected_count": 0,
+                },
+            ],
+            res.json(),
+        )
+
+
+@override_settings(HEATMAP_TILE_SIZE=4)
+class HeatmapTileAPIViewTestCase(APITestCase):
+    def setUp(self):
+        use_temporary_throttle_store(self)
+        get_lru_cache("survivors:heatmap", settings.HEATMAP_CACHE_MAX_BYTES).clear()
+        for latitude, longitude, is_infected in [
+            (10, 10, False),
+            (10.001, 10.001, True),
+            (-45, -90, False),
+            (89, 0, False),
+            (None, None, False),
+        ]:
+            baker.make(
+                Survivor,
+                last_latitude=latitude,
+                last_longitude=longitude,
+                is_infected=is_infected,
+            )
+
+    def get_tile(self, zoom, x, y):
+        return self.client.get(
+            reverse("survivors-heatmap", kwargs={"zoom": zoom, "x": x, "y": y})
+        )
+
+    def test_get(self):
+        res = self.get_tile(0, 0, 0)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            {
+                "zoom": 0,
+                "x": 0,
+                "y": 0,
+                "size": 4,
+                "cells": [[2, 1, 1, 1], [1, 2, 1, 0]],
+            },
+            res.json(),
+        )
+
+        self.assertEqual([[0, 3, 1, 1]], self.get_tile(1, 1, 0).json()["cells"])
+
+    def test_get_unknown_tile(self):
+        for zoom, x, y in [(0, 1, 0), (2, 0, 4), (settings.HEATMAP_MAX_ZOOM + 1, 0, 0)]:
+            self.assertEqual(
+                self.get_tile(zoom, x, y).status_code, status.HTTP_404_NOT_FOUND
+            )
+
+    def test_cached(self):
+        self.get_tile(3, 4, 3)
+        with self.assertNumQueries(0):
+            res = self.get_tile(3, 4, 3)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    @override_settings(HEATMAP_MIN_INVALIDATED_ZOOM=3)
+    def test_invalidated_on_location_log(self):
+        survivor = Survivor.objects.get(last_latitude=-45)
+        cells = self.get_tile(0, 0, 0).json()["cells"]
+        self.get_tile(3, 4, 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse("survivor-location-logs", kwargs={"pk": survivor.id}),
+                json.dumps({"latitude": 10, "longitude": 10}),
+                content_type="application/json",
+            )
+
+        self.assertEqual([[0, 3, 2, 1]], self.get_tile(3, 4, 3).json()["cells"])
+        # Lower zoom levels are left to expire.
+        self.assertEqual(cells, self.get_tile(0, 0, 0).json()["cells"])
+        with mock.patch("survivors.heatmap.time.time", return_value=time.time() + 60):
+            with self.settings(HEATMAP_CACHE_TIMEOUT=1):
+                self.assertEqual([[2, 1, 2, 1]], self.get_tile(0, 0, 0).json()["cells"])
+
+    def test_expires(self):
+        self.get_tile(0, 0, 0)
+        with mock.patch("survivors.heatmap.time.time", return_value=time.time() + 60):
+            with self.settings(HEATMAP_CACHE_TIMEOUT=1), self.assertNumQueries(1):
+                self.get_tile(0, 0, 0)
+
+
+class LocationLogArchiveTestCase(APITestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = self.settings(LOCATION_LOGS_ARCHIVE_DIR=directory.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.now = timezone.now()
+        self.survivors = baker.make(Survivor, _quantity=3)
+        self.location_logs = []
+        for days in range(10, 0, -1):
+            for i, survivor in enumerate(self.survivors):
+                location_log = baker.make(
+                    LocationLog, survivor=survivor, latitude=days, longitude=-days
+                )
+                location_log.created_at = self.now - timedelta(
+                    days=days, seconds=-i - 1
+                )
+                self.location_logs.append(location_log)
+        LocationLog.objects.bulk_update(self.location_logs, ["created_at"])
+        for i, survivor in enumerate(self.survivors):
+            survivor.last_located_at = self.now - timedelta(days=1, seconds=-i - 1)
+        Survivor.objects.bulk_update(self.survivors, ["last_located_at"])
+
+    def archive(self, days, segment_rows):
+        return archive_location_logs(
+            self.now - timedelta(days=days), segment_rows=segment_rows
+        )
+
+    def test_archive(self):
+        out = StringIO()
+        call_command("archive_location_logs", days=5, segment_rows=4, stdout=out)
+
+        self.assertEqual(
+            "15 location logs archived into 4 segments.", out.getvalue().strip()
+        )
+        self.assertEqual(15, LocationLog.objects.count())
+        self.assertFalse(
+            LocationLog.objects.filter(created_at__lt=self.now - timedelta(days=5))
+        )
+        index = load_index(settings.LOCATION_LOGS_ARCHIVE_DIR)
+        self.assertEqual([4, 4, 4, 3], [entry["rows"] for entry in index])
+        self.assertEqual(
+            sorted(index, key=lambda entry: entry["min_created_at"]), index
+        )
+
+    def test_archive_keeps_latest_locations(self):
+        self.archive(0, 100)
+
+        self.assertEqual(
+            {survivor.id for survivor in self.survivors},
+            set(LocationLog.objects.values_list("survivor_id", flat=True)),
+        )
+        self.assertEqual(3, LocationLog.objects.count())
+
+    def test_archive_rolled_back(self):
+        with mock.patch(
+            "survivors.archive._DELETE_LOCATION_LOGS_SQL",
+            "DELETE FROM missing_table WHERE id = ANY(%s)",
+        ), self.assertRaises(ProgrammingError):
+            self.archive(5, 4)
+
+        self.assertEqual(30, LocationLog.objects.count())
+        self.assertEqual([], load_index(settings.LOCATION_LOGS_ARCHIVE_DIR))
+        self.assertEqual(
+            [".lock", "index.json"],
+            sorted(os.listdir(settings.LOCATION_LOGS_ARCHIVE_DIR)),
+        )
+
+    def test_archive_interrupted(self):
+        directory = settings.LOCATION_LOGS_ARCHIVE_DIR
+        # Killed once the deletion of the first segment's logs is committed.
+        with mock.patch(
+            "survivors.archive.publish_segment", side_effect=KeyboardInterrupt
+        ), self.assertRaises(KeyboardInterrupt):
+            self.archive(5, 4)
+        self.assertEqual(26, LocationLog.objects.count())
+        self.assertEqual([], load_index(directory))
+
+        # Killed before the deletion of a segment's logs is committed.
+        location_logs = self.location_logs[4:6]
+        write_segment(
+            directory,
+            {
+                "created_at": np.array(
+                    [to_timestamp(log.created_at) for log in location_logs]
+                ),
+                "id": np.array([log.id for log in location_logs]),
+                "survivor_id": np.array([log.survivor_id for log in location_logs]),
+                "latitude": np.array([log.latitude for log in location_logs]),
+                "longitude": np.array([log.longitude for log in location_logs]),
+            },
+        )
+
+        self.archive(5, 100)
+
+        self.assertEqual(
+            [location_log.id for location_log in self.location_logs[:15]],
+            query_location_logs()["id"].tolist(),
+        )
+        self.assertEqual(
+            sorted(
+                [
+                    ".lock",
+                    INDEX_NAME,
+                    *(entry["name"] for entry in load_index(directory)),
+                ]
+            ),
+            sorted(os.listdir(directory)),
+        )
+
+    def test_query(self):
+        self.archive(5, 4)
+        self.archive(0, 4)
+
+        logs = query_location_logs()
+        self.assertEqual(
+            [location_log.id for location_log in self.location_logs[:-3]],
+            logs["id"].tolist(),
+        )
+
+        survivor = self.survivors[1]
+        start, end = self.now - timedelta(days=8), self.now - timedelta(days=4)
+        expected = [
+            location_log
+            for location_log in self.location_logs
+            if location_log.survivor == survivor
+            and start <= location_log.created_at < end
+        ]
+        logs = query_location_logs(start, end, survivor_ids=[survivor.id])
+        self.assertEqual(
+            [location_log.id for location_log in expected], logs["id"].tolist()
+        )
+        self.assertEqual([survivor.id] * 4, logs["survivor_id"].tolist())
+        self.assertEqual(
+            [location_log.latitude for location_log in expected],
+            logs["latitude"].tolist(),
+        )
+        self.assertEqual(
+            [location_log.longitude for location_log in expected],
+            logs["longitude"].tolist(),
+        )
+        self.assertEqual(
+            [location_log.created_at.replace(tzinfo=None) for location_log in expected],
+            logs["created_at"].tolist(),
+        )
+
+    def test_query_reads_overlapping_segments(self):
+        self.archive(5, 3)
+        index = load_index(settings.LOCATION_LOGS_ARCHIVE_DIR)
+
+        with mock.patch(
+            "survivors.archive.read_segment", wraps=read_segment
+        ) as read_segment_mock:
+            logs = query_location_logs(
+                self.now - timedelta(days=8, seconds=1),
+                self.now - timedelta(days=7, seconds=1),
+            )
+        self.assertEqual(
+            [location_log.id for location_log in self.location_logs[6:9]],
+            logs["id"].tolist(),
+        )
+        self.assertEqual(
+            [os.path.join(settings.LOCATION_LOGS_ARCHIVE_DIR, index[2]["name"])],
+            [call.args[0] for call in read_segment_mock.call_args_list],
+        )
+
+        with mock.patch("survivors.archive.read_segment") as read_segment_mock:
+            logs = query_location_logs(
+                survivor_ids=[max(survivor.id for survivor in self.survivors) + 1]
+            )
+        read_segment_mock.assert_not_called()
+        self.assertEqual([], logs["id"].tolist())
+
+
+@override_settings(INFECTION_RISK_RADIUS_KM=0.5, INFECTION_RISK_WINDOW_HOURS=24)
+class InfectionRiskTestCase(APITestCase):
+    def setUp(self):
+        now = timezone.now()
+        # 0.5 km north.
+        offset = 0.5 / (EARTH_RADIUS_KM * math.pi / 180)
+        locations = {
+            "infected": (0, 0, True, now),
+            "stale infected": (10, 10, True, now - timedelta(days=2)),
+            "unlocated infected": (None, None, True, None),
+            "next to infected": (0, 0, False, now),
+            "near infected": (offset, 0, False, now),
+            "far": (1, 1, False, now),
+            "next to stale infected": (10, 10, False, now),
+            "unlocated": (None, None, False, None),
+        }
+        self.survivors = {
+            name: baker.make(
+                Survivor,
+                name=name,
+                last_latitude=latitude,
+                last_longitude=longitude,
+                is_infected=is_infected,
+                last_located_at=located_at,
+            )
+            for name, (latitude, longitude, is_infected, located_at) in (
+                locations.items()
+            )
+        }
+        for author in ["infected", "stale infected", "unlocated infected"]:
+            baker.make(
+                InfectionReport,
+                author=self.survivors[author],
+                infected_survivor=self.survivors["unlocated"],
+            )
+
+    def get_risks(self):
+        return dict(Survivor.objects.values_list("name", "infection_risk"))
+
+    def test_score(self):
+        self.assertEqual((5, 5), score_infection_risks())
+
+        risks = self.get_risks()
+        self.assertAlmostEqual(1 - math.exp(-1), risks.pop("next to infected"))
+        self.assertAlmostEqual(1 - math.exp(-math.exp(-1)), risks.pop("near infected"))
+        self.assertAlmostEqual(1 - math.exp(-1), risks.pop("unlocated"))
+        self.assertEqual(
+            {
+                "infected": None,
+                "stale infected": None,
+                "unlocated infected": None,
+                "far": 0,
+                "next to stale infected": 0,
+            },
+            risks,
+        )
+
+    def test_score_unchanged(self):
+        score_infection_risks()
+        self.assertEqual((5, 0), score_infection_risks())
+
+    def test_infected_risk_cleared(self):
+        score_infection_risks()
+        survivor = self.survivors["unlocated"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual([survivor.id], flag_infected_survivors([survivor.id]))
+
+        self.assertIsNone(self.get_risks()["unlocated"])
+
+    def test_get_exposures(self):
+        rng = np.random.default_rng(0)
+        points = rng.uniform(-2, 2, (500, 3))
+        sources = rng.uniform(-2, 2, (200, 3))
+        distances = ((points[:, None] - sources[None]) ** 2).sum(axis=2)
+        expected = np.where(distances <= 0.3**2, np.exp(-distances / 0.1**2), 0)
+
+        np.testing.assert_allclose(
+            expected.sum(axis=1), get_exposures(points, sources, 0.1)
+        )
+
+    def test_benchmark(self):
+        options = {"survivors": 20000, "cities": 5, "loop_sample": 20}
+        out = StringIO()
+        call_command("benchmark_infection_risk", stdout=out, **options)
+        self.assertIn("speedup:", out.getvalue())
+
+        with mock.patch(
+            "survivors.management.commands.benchmark_infection_risk.compute_risks",
+            wraps=lambda *args: compute_risks(*args) / 2,
+        ), self.assertRaisesMessage(CommandError, "Vectorized risks differ"):
+            call_command("benchmark_infection_risk", stdout=StringIO(), **options)
+
+
+class SurvivorGroupsTestCase(APITestCase):
+    def setUp(self):
+        use_temporary_throttle_store(self)
+        # 0.0002 degrees of latitude are 22 m, grouping distance is 50 m.
+        self.locations = {
+            "a": (0, 0),
+            "b": (0.0002, 0),
+            "c": (0.0004, 0),
+            "d": (0.0008, 0),
+            "e": (1, 1),
+            "f": (1.0002, 1),
+            "g": (2, 2),
+            "h": (2, 2.0002),
+            "i": (2.0002, 2),
+        }
+        self.survivors = {
+            name: baker.make(Survivor, name=name) for name in self.locations
+        }
+        self.names = {survivor.id: name for name, survivor in self.survivors.items()}
+        for name, (latitude, longitude) in self.locations.items():
+            self.move(name, latitude, longitude)
+
+    def move(self, name, latitude, longitude):
+        res = self.client.post(
+            reverse("survivor-location-logs", kwargs={"pk": self.survivors[name].id}),
+            json.dumps({"latitude": latitude, "longitude": longitude}),
+            content_type="application/json",
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def get_groups(self):
+        groups = {}
+        for name, group_id in Survivor.objects.values_list("name", "group_id"):
+            if group_id is not None:
+                groups.setdefault(group_id, set()).add(name)
+        return groups
+
+    def test_cluster(self):
+        groups = cluster_groups()
+
+        self.assertEqual(
+            {frozenset("abcd"), frozenset("ghi")},
+            set(map(frozenset, self.get_groups().values())),
+        )
+        self.assertEqual(
+            {
+                group.id: {self.names[id] for id in group.survivor_ids}
+                for group in groups
+            },
+            self.get_groups(),
+        )
+        self.assertFalse(DirtyGroupCell.objects.exists())
+
+        res = self.client.get(reverse("survivor-groups"))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([4, 3], [group["size"] for group in res.json()])
+        self.assertAlmostEqual(0.00035, res.json()[0]["center_latitude"])
+        self.assertAlmostEqual(0, res.json()[0]["center_longitude"])
+
+    def test_cluster_incrementally(self):
+        cluster_groups()
+        groups = self.get_groups()
+        # Savepoint, lock, dirty and expired cells.
+        with self.assertNumQueries(5):
+            self.assertEqual([], cluster_groups())
+
+        self.move("d", 1.0001, 1.0001)
+        updated = {
+            frozenset(self.names[id] for id in group.survivor_ids): group.id
+            for group in cluster_groups()
+        }
+
+        self.assertEqual({frozenset("abc"), frozenset("def")}, set(updated))
+        group_ids = {frozenset(names): id for id, names in groups.items()}
+        self.assertEqual(group_ids[frozenset("abcd")], updated[frozenset("abc")])
+        self.assertEqual(
+            {
+                updated[frozenset("abc")]: set("abc"),
+                updated[frozenset("def")]: set("def"),
+                group_ids[frozenset("ghi")]: set("ghi"),
+            },
+            self.get_groups(),
+        )
+
+    def test_marks_dirty_cells(self):
+        cluster_groups()
+        survivor = self.survivors["e"]
+
+        # 1 m away, in the same cell, which may still change its neighbours.
+        self.move("e", 1.00001, 1)
+        self.assertEqual(
+            [Survivor.objects.get(id=survivor.id).group_cell],
+            list(DirtyGroupCell.objects.values_list("cell", flat=True)),
+        )
+
+        cluster_groups()
+        self.move("e", 2, 1)
+        self.assertEqual(2, DirtyGroupCell.objects.count())
+
+    def test_marks_kept_during_cluster(self):
+        self.move("e", 1.0002, 1.0002)
+        cell = Survivor.objects.get(id=self.survivors["e"].id).group_cell
+
+        def assign_then_mark(*args):
+            groups = assign_groups(*args)
+            mark_dirty_cells([cell])
+            return groups
+
+        with mock.patch("survivors.groups.assign_groups", assign_then_mark):
+            cluster_groups()
+
+        self.assertEqual(
+            [cell], list(DirtyGroupCell.objects.values_list("cell", flat=True))
+        )
+
+    def test_cluster_expired(self):
+        cluster_groups()
+
+        cluster_groups(
+            timezone.now() + timedelta(minutes=settings.GROUPS_WINDOW_MINUTES)
+        )
+
+        self.assertEqual({}, self.get_groups())
+        self.assertFalse(SurvivorGroup.objects.exists())
+
+    def test_cluster_all(self):
+        cluster_groups()
+        groups = self.get_groups()
+        Survivor.objects.update(group_cell=None)
+
+        cluster_all_groups()
+
+        self.assertEqual(groups, self.get_groups())
+
+    def test_cluster_points(self):
+        rng = np.random.default_rng(0)
+        points = rng.uniform(0, 1, (300, 3))
+        distance, min_size = 0.08, 4
+        near = ((points[:, None] - points[None]) ** 2).sum(axis=2) <= distance**2
+        is_core = near.sum(axis=1) >= min_size
+        expected = np.full(len(points), -1)
+        for i in np.flatnonzero(is_core):
+            if expected[i] >= 0:
+                continue
+            expected[i], stack = i, [i]
+            while stack:
+                for j in np.flatnonzero(near[stack.pop()] & is_core):
+                    if expected[j] < 0:
+                        expected[j] = i
+                        stack.append(j)
+        for i in np.flatnonzero(~is_core & near[:, is_core].any(axis=1)):
+            expected[i] = expected[near[i] & is_core].min()
+
+        self.assertEqual(
+            expected.tolist(), cluster(points, distance, min_size).tolist()
+        )
+
+
+class SurvivorGroupsConcurrencyTestCase(TransactionTestCase):
+    def test_moves_not_blocked_by_cluster(self):
+        survivors = baker.make(Survivor, _quantity=3)
+        for survivor in survivors:
+            with transaction.atomic():
+                move_survivor(survivor.id, 0, 0, timezone.now())
+        clustering, release = threading.Event(), threading.Event()
+
+        def cluster_slowly(*args):
+            clustering.set()
+            release.wait(5)
+            return cluster(*args)
+
+        def run_cluster():
+            try:
+                with mock.patch("survivors.groups.cluster", cluster_slowly):
+                    cluster_groups()
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=run_cluster)
+        thread.start()
+        try:
+            self.assertTrue(clustering.wait(5))
+            # Marks the cell being clustered again, and a new one.
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute("SET LOCAL lock_timeout = '1s'")
+                move_survivor(survivors[0].id, 1, 1, timezone.now())
+        finally:
+            release.set()
+            thread.join()
+
+        self.assertEqual(3, SurvivorGroup.objects.get().size)
+        self.assertEqual(2, DirtyGroupCell.objects.count())
+
+
+class SurvivorTradePartnersListAPIViewTestCase(APITestCase):
+    def setUp(self):
+        self.resource = baker.make(Resource)
+        self.survivor = self.make_survivor(0, 0, quantity=100)
+
+    def make_survivor(self, latitude, longitude, quantity=None, is_infected=False):
+        survivor = baker.make(
+            Survivor,
+            is_infected=is_infected,
+            last_latitude=latitude,
+            last_longitude=longitude,
+        )
+        if quantity is not None:
+            baker.make(
+                InventoryItem, owner=survivor, resource=self.resource, quantity=quantity
+            )
+        return survivor
+
+    def get_partners(self, survivor=None, **params):
+        return self.client.get(
+            reverse(
+                "survivor-trade-partners", kwargs={"pk": (survivor or self.survivor).id}
+            ),
+            {"resource_id": self.resource.id, **params},
+        )
+
+    def test_nearest_partners(self):
+        # 0.001 degrees of latitude are 111 m.
+        near = self.make_survivor(0.005, 0, quantity=5)
+        nearest = self.make_survivor(0.001, 0, quantity=2)
+        self.make_survivor(0.002, 0, quantity=5, is_infected=True)
+        self.make_survivor(0.003, 0)
+        baker.make(InventoryItem, owner=self.make_survivor(0.004, 0), quantity=5)
+        # Only found by growing the radius, or beyond the largest one.
+        far = self.make_survivor(1, 0, quantity=10)
+        self.make_survivor(5, 0, quantity=10)
+
+        res = self.get_partners()
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [nearest.id, near.id, far.id], [partner["id"] for partner in res.json()]
+        )
+        self.assertEqual([2, 5, 10], [partner["quantity"] for partner in res.json()])
+        self.assertAlmostEqual(
+            EARTH_RADIUS_KM * math.radians(0.005), res.json()[1]["distance_km"]
+        )
+
+        res = self.get_partners(quantity=3)
+        self.assertEqual([near.id, far.id], [partner["id"] for partner in res.json()])
+
+        # Enough partners within the smallest radius.
+        with self.assertNumQueries(2):
+            res = self.get_partners(limit=2)
+        self.assertEqual(
+            [nearest.id, near.id], [partner["id"] for partner in res.json()]
+        )
+
+    def test_across_antimeridian(self):
+        survivor = self.make_survivor(10, 179.999)
+        partner = self.make_survivor(10, -179.999, quantity=1)
+        self.make_survivor(10, 0, quantity=1)
+
+        res = self.get_partners(survivor)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([partner.id], [partner["id"] for partner in res.json()])
+        self.assertLess(res.json()[0]["distance_km"], 0.3)
+
+    def test_bounding_box(self):
+        latitudes, longitude_ranges = get_bounding_box(0, -179.99, 10)
+        self.assertEqual(2, len(longitude_ranges))
+        self.assertEqual(180, longitude_ranges[0][1])
+        self.assertEqual(-180, longitude_ranges[1][0])
+
+        latitudes, longitude_ranges = get_bounding_box(89.99, 0, 10)
+        self.assertEqual(90, latitudes[1])
+        self.assertEqual([(-180, 180)], longitude_ranges)
+
+    def test_invalid(self):
+        res = self.get_partners(self.make_survivor(0, 0, is_infected=True))
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.get_partners(self.make_survivor(None, None))
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.get(
+            reverse("survivor-trade-partners", kwargs={"pk": self.survivor.id})
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
 
 class SurvivorInventoryListAPIViewTestCase(APITestCase):
     @property
     def url(self):
         return reverse("survivor-inventory", kwargs={"pk": self.survivor.id})
 
+    def get_quantities(self):
+        return {
+            item["resource"]: item["quantity"]
+            for item in self.client.get(self.url).json()
+        }
+
     def setUp(self):
         self.survivor = baker.make(Survivor, is_infected=False)
         self.resources = baker.make(Resource, _quantity=10)
@@ -283,6 +1526,236 @@ class SurvivorInventoryListAPIViewTestCase(APITestCase):
 
         self.assertListEqual(expected_data, res_data)
 
+    def test_cached(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            res = self.client.get(self.url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(10, len(res.json()))
+
+        with self.assertNumQueries(1):
+            self.client.get(self.url + "?fields=id")
+
+    def test_invalidated_on_trade(self):
+        self.resources[0].price = 1
+        self.resources[0].save()
+        self.resources[1].price = 1
+        self.resources[1].save()
+        partner = baker.make(Survivor, is_infected=False)
+        baker.make(InventoryItem, owner=partner, resource=self.resources[1], quantity=5)
+        quantities = self.get_quantities()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(
+                reverse("trade", kwargs={"pk": self.survivor.id}),
+                json.dumps(
+                    {
+                        "partner_id": partner.id,
+                        "offered_items": [
+                            {"resource_id": self.resources[0].id, "quantity": 1}
+                        ],
+                        "requested_items": [
+                            {"resource_id": self.resources[1].id, "quantity": 1}
+                        ],
+                    }
+                ),
+                content_type="application/json",
+            )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        quantities[self.resources[0].name] -= 1
+        quantities[self.resources[1].name] += 1
+        self.assertEqual(quantities, self.get_quantities())
+
+    def test_invalidated_on_price_change(self):
+        InventoryItem.objects.update(quantity=1)
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.resources[0].price = Decimal("12.34")
+            self.resources[0].save()
+
+        prices = {
+            item["resource"]: item["resource_price"]
+            for item in self.client.get(self.url).json()
+        }
+        self.assertEqual("12.34", prices[self.resources[0].name])
+
+    def test_invalidated_on_resource_rename(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.resources[0].name = "Renamed"
+            self.resources[0].save()
+
+        self.assertIn("Renamed", self.get_quantities())
+
+    def test_expired(self):
+        self.client.get(self.url)
+        with mock.patch("time.time", return_value=time.time() + 3600):
+            with self.assertNumQueries(1):
+                self.client.get(self.url)
+
+
+class SurvivorDashboardAPIViewTestCase(APITestCase):
+    @property
+    def url(self):
+        return reverse("survivor-dashboard", kwargs={"pk": self.survivor.id})
+
+    def setUp(self):
+        cache.clear()
+        self.survivor = baker.make(
+            Survivor, is_infected=False, gender=baker.make(Gender), wealth=6
+        )
+        self.resources = baker.make(Resource, price=2, _quantity=2)
+        self.inventory_items = [
+            baker.make(InventoryItem, owner=self.survivor, resource=r, quantity=i + 1)
+            for i, r in enumerate(self.resources)
+        ]
+        self.location_logs = baker.make(
+            LocationLog, survivor=self.survivor, _quantity=2, _bulk_create=True
+        )
+        last_location = LocationLog.objects.latest("created_at")
+        Survivor.objects.filter(id=self.survivor.id).update(
+            last_latitude=last_location.latitude,
+            last_longitude=last_location.longitude,
+            last_located_at=last_location.created_at,
+        )
+        self.authors = baker.make(Survivor, is_infected=False, _quantity=2)
+        for author in self.authors:
+            baker.make(InfectionReport, author=author, infected_survivor=self.survivor)
+
+    def test_get(self):
+        with self.assertNumQueries(2):
+            res = self.client.get(self.url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        last_location = LocationLog.objects.latest("created_at")
+        self.assertEqual(
+            {
+                "id": self.survivor.id,
+                "name": self.survivor.name,
+                "age": self.survivor.age,
+                "gender": self.survivor.gender.name,
+                "is_infected": False,
+                "wealth": "6.00",
+                "infection_reports_count": 2,
+                "last_location": {
+                    "latitude": last_location.latitude,
+                    "longitude": last_location.longitude,
+                    "created_at": last_location.created_at.isoformat().replace(
+                        "+00:00", "Z"
+                    ),
+                },
+                "inventory_items": [
+                    {
+                        "id": item.id,
+                        "resource": item.resource.name,
+                        "resource_price": "2.00",
+                        "quantity": item.quantity,
+                    }
+                    for item in self.inventory_items
+                ],
+            },
+            res.json(),
+        )
+
+    def test_get_without_locations(self):
+        survivor = baker.make(Survivor, gender=None)
+        res = self.client.get(reverse("survivor-dashboard", kwargs={"pk": survivor.id}))
+        self.assertEqual(
+            (None, None, 0, []),
+            (
+                res.json()["gender"],
+                res.json()["last_location"],
+                res.json()["infection_reports_count"],
+                res.json()["inventory_items"],
+            ),
+        )
+
+    def test_get_unknown_survivor(self):
+        res = self.client.get(reverse("survivor-dashboard", kwargs={"pk": 0}))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cached(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            res = self.client.get(self.url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_not_refilled_with_stale_data(self):
+        retrieve = RetrieveAPIView.retrieve
+
+        def retrieve_then_rename(view, *args, **kwargs):
+            # A write commits after the dashboard was read, before it is cached.
+            response = retrieve(view, *args, **kwargs)
+            with self.captureOnCommitCallbacks(execute=True):
+                Survivor.objects.filter(id=self.survivor.id).update(name="Renamed")
+                invalidate_dashboards([self.survivor.id])
+            return response
+
+        with mock.patch.object(RetrieveAPIView, "retrieve", retrieve_then_rename):
+            self.client.get(self.url)
+
+        self.assertEqual("Renamed", self.client.get(self.url).json()["name"])
+
+    def test_invalidated_on_location_log(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(
+                reverse("survivor-location-logs", kwargs={"pk": self.survivor.id}),
+                json.dumps({"latitude": 1.5, "longitude": 2.5}),
+                content_type="application/json",
+            )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        last_location = self.client.get(self.url).json()["last_location"]
+        self.assertEqual(
+            (1.5, 2.5), (last_location["latitude"], last_location["longitude"])
+        )
+
+    def test_invalidated_on_infection_report(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse("survivor-infection-reports", kwargs={"pk": self.survivor.id}),
+                json.dumps({"author_id": baker.make(Survivor, is_infected=False).id}),
+                content_type="application/json",
+            )
+
+        res_data = self.client.get(self.url).json()
+        self.assertEqual(
+            (3, True), (res_data["infection_reports_count"], res_data["is_infected"])
+        )
+
+    def test_invalidated_on_trade(self):
+        partner = baker.make(Survivor, is_infected=False)
+        baker.make(InventoryItem, owner=partner, resource=self.resources[0], quantity=5)
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(
+                reverse("trade", kwargs={"pk": self.survivor.id}),
+                json.dumps(
+                    {
+                        "partner_id": partner.id,
+                        "offered_items": [
+                            {"resource_id": self.resources[1].id, "quantity": 1}
+                        ],
+                        "requested_items": [
+                            {"resource_id": self.resources[0].id, "quantity": 1}
+                        ],
+                    }
+                ),
+                content_type="application/json",
+            )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(
+            [2, 1],
+            [
+                item["quantity"]
+                for item in self.client.get(self.url).json()["inventory_items"]
+            ],
+        )
+
 
 class TradeAPIViewTestCase(APITestCase):
     @property
@@ -352,6 +1825,58 @@ class TradeAPIViewTestCase(APITestCase):
             ).count(),
         )
 
+    def test_trade_is_logged(self):
+        data = {
+            "partner_id": self.partner.id,
+            "offered_items": [{"resource_id": self.resources[0].id, "quantity": 2}],
+            "requested_items": [
+                {"resource_id": r.id, "quantity": 1} for r in self.resources[:2]
+            ],
+        }
+        for _ in range(2):
+            res = self.client.post(
+                self.url, json.dumps(data), content_type="application/json"
+            )
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        trade = Trade.objects.latest("id")
+        self.assertEqual(2, Trade.objects.count())
+        self.assertEqual(
+            (self.survivor, self.partner, 2),
+            (trade.survivor, trade.partner, trade.value),
+        )
+        self.assertEqual(
+            [
+                (self.survivor.id, self.resources[0].id, 2),
+                (self.partner.id, self.resources[0].id, 1),
+                (self.partner.id, self.resources[1].id, 1),
+            ],
+            list(
+                trade.items.order_by("id").values_list(
+                    "giver_id", "resource_id", "quantity"
+                )
+            ),
+        )
+        self.assertEqual(6, trade.movements.count())
+
+        self.assertEqual(
+            [(self.resources[0].id, 2, 6, 6), (self.resources[1].id, 2, 2, 2)],
+            list(
+                ResourceTradeVolume.objects.order_by("resource_id").values_list(
+                    "resource_id", "trade_count", "quantity", "turnover"
+                )
+            ),
+        )
+
+    def test_trade_with_stale_prices(self):
+        prices = {r.id: (r.price, r.price_version) for r in self.resources}
+        Resource.objects.update(price_version=1)
+        items = [{"resource": self.resources[0], "quantity": 1}]
+
+        with self.assertRaises(PricesChanged):
+            execute_trade(self.survivor, self.partner, items, items, prices)
+        self.assertFalse(Trade.objects.exists())
+
     def test_post_equal_exchange(self):
         data = {
             "partner_id": self.partner.id,
@@ -413,6 +1938,54 @@ class TradeAPIViewTestCase(APITestCase):
         )
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def test_post_swap_of_missing_resources(self):
+        items = [{"resource_id": self.resources[9].id, "quantity": 1}]
+        res = self.client.post(
+            self.url,
+            json.dumps(
+                {
+                    "partner_id": self.partner.id,
+                    "offered_items": items,
+                    "requested_items": items,
+                }
+            ),
+            content_type="application/json",
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(["offered_items"], list(res.json()))
+        self.assertFalse(Trade.objects.exists())
+        self.assertFalse(
+            InventoryItem.objects.filter(
+                owner=self.survivor, resource=self.resources[9]
+            ).exists()
+        )
+
+    def test_post_empties_only_own_items(self):
+        other = baker.make(Survivor)
+        baker.make(InventoryItem, owner=other, resource=self.resources[0], quantity=3)
+        data = {
+            "partner_id": self.partner.id,
+            "offered_items": [{"resource_id": self.resources[0].id, "quantity": 4}],
+            "requested_items": [
+                {"resource_id": r.id, "quantity": 2} for r in self.resources[5:7]
+            ],
+        }
+
+        res = self.client.post(
+            self.url, json.dumps(data), content_type="application/json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        self.assertFalse(
+            self.survivor.inventory_items.filter(resource=self.resources[0]).exists()
+        )
+        self.assertEqual(
+            3, other.inventory_items.get(resource=self.resources[0]).quantity
+        )
+        self.assertEqual(
+            6, self.partner.inventory_items.get(resource=self.resources[0]).quantity
+        )
+
     def test_post_not_equal_trade(self):
         data = {
             "partner_id": self.partner.id,
@@ -436,3 +2009,493 @@ class TradeAPIViewTestCase(APITestCase):
             self.url, json.dumps(data), content_type="application/json"
         )
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class InventoryLedgerTestCase(APITestCase):
+    def setUp(self):
+        self.gender = baker.make(Gender)
+        self.resources = baker.make(Resource, price=1, _quantity=2)
+
+    def register(self, quantity):
+        res = self.client.post(
+            reverse("survivors"),
+            json.dumps(
+                {
+                    "name": "Survivor",
+                    "age": 30,
+                    "gender_id": self.gender.id,
+                    "inventory_items": [
+                        {"resource_id": r.id, "quantity": quantity}
+                        for r in self.resources
+                    ],
+                }
+            ),
+            content_type="application/json",
+        )
+        return Survivor.objects.get(id=res.json()["id"])
+
+    def trade(self, survivor, partner, offered_resource, requested_resource):
+        return self.client.post(
+            reverse("trade", kwargs={"pk": survivor.id}),
+            json.dumps(
+                {
+                    "partner_id": partner.id,
+                    "offered_items": [
+                        {"resource_id": offered_resource.id, "quantity": 2}
+                    ],
+                    "requested_items": [
+                        {"resource_id": requested_resource.id, "quantity": 2}
+                    ],
+                }
+            ),
+            content_type="application/json",
+        )
+
+    def test_registration_and_trade_are_recorded(self):
+        survivor = self.register(2)
+        partner = self.register(4)
+        self.assertEqual(
+            2,
+            survivor.inventory_movements.filter(
+                reason=InventoryMovement.Reason.REGISTRATION
+            ).count(),
+        )
+
+        res = self.trade(survivor, partner, self.resources[0], self.resources[1])
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        self.assertListEqual(
+            [-2, 2],
+            list(
+                survivor.inventory_movements.filter(
+                    reason=InventoryMovement.Reason.TRADE
+                )
+                .order_by("resource_id")
+                .values_list("delta", flat=True)
+            ),
+        )
+        self.assertFalse(
+            survivor.inventory_items.filter(resource=self.resources[0]).exists()
+        )
+        self.assertEqual(
+            4, survivor.inventory_items.get(resource=self.resources[1]).quantity
+        )
+        self.assertEqual(
+            {
+                (survivor.id, self.resources[1].id): 4,
+                (partner.id, self.resources[0].id): 6,
+                (partner.id, self.resources[1].id): 2,
+            },
+            get_holdings(),
+        )
+
+    def test_historical_holdings_and_snapshots(self):
+        survivor = self.register(2)
+        partner = self.register(4)
+        take_snapshot()
+        before_trade = timezone.now()
+        self.trade(survivor, partner, self.resources[0], self.resources[1])
+
+        self.assertEqual(
+            {
+                (survivor.id, self.resources[0].id): 2,
+                (survivor.id, self.resources[1].id): 2,
+            },
+            get_holdings(owner_ids=[survivor.id], at=before_trade),
+        )
+        self.assertEqual(
+            {(survivor.id, self.resources[1].id): 4},
+            get_holdings(owner_ids=[survivor.id]),
+        )
+
+    def test_rebuild_balances(self):
+        survivor = self.register(2)
+        InventoryItem.objects.filter(owner=survivor).update(quantity=100)
+        baker.make(InventoryItem, owner=survivor)
+
+        rebuild_balances(owner_ids=[survivor.id])
+
+        self.assertListEqual(
+            [(self.resources[0].id, 2), (self.resources[1].id, 2)],
+            list(
+                survivor.inventory_items.order_by("resource_id").values_list(
+                    "resource_id", "quantity"
+                )
+            ),
+        )
+
+    def test_infection_lockout_is_recorded(self):
+        survivor = self.register(2)
+        for _ in range(3):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(
+                    reverse("survivor-infection-reports", kwargs={"pk": survivor.id}),
+                    json.dumps({"author_id": baker.make(Survivor).id}),
+                    content_type="application/json",
+                )
+
+        self.assertEqual(
+            2,
+            survivor.inventory_movements.filter(
+                reason=InventoryMovement.Reason.INFECTION_LOCKOUT, delta=0
+            ).count(),
+        )
+
+
+class InventorySnapshotTestCase(TransactionTestCase):
+    def test_snapshot_waits_for_pending_movements(self):
+        survivor = baker.make(Survivor)
+        resource = baker.make(Resource)
+        movement = partial(
+            InventoryMovement,
+            owner=survivor,
+            resource=resource,
+            reason=InventoryMovement.Reason.OPENING_BALANCE,
+        )
+        inserted, release = threading.Event(), threading.Event()
+
+        def insert_pending_movement():
+            try:
+                with transaction.atomic():
+                    record_movements([movement(delta=5)])
+                    inserted.set()
+                    release.wait(5)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=insert_pending_movement)
+        thread.start()
+        self.assertTrue(inserted.wait(5))
+        # A higher id committed before the pending one.
+        record_movements([movement(delta=1)])
+        threading.Timer(0.2, release.set).start()
+
+        snapshot = take_snapshot()
+        thread.join()
+
+        self.assertEqual(
+            InventoryMovement.objects.order_by("-id").first().id,
+            snapshot.last_movement_id,
+        )
+        self.assertEqual([6], [item.quantity for item in snapshot.items.all()])
+
+
+class LeaderboardTestCase(APITestCase):
+    def setUp(self):
+        self.gender = baker.make(Gender)
+        self.water = baker.make(Resource, price=4)
+        self.food = baker.make(Resource, price=3)
+        self.survivors = [
+            self.register([(self.water, quantity), (self.food, 1)])
+            for quantity in [1, 5, 3]
+        ]
+
+    def register(self, items):
+        res = self.client.post(
+            reverse("survivors"),
+            json.dumps(
+                {
+                    "name": "Survivor",
+                    "age": 30,
+                    "gender_id": self.gender.id,
+                    "inventory_items": [
+                        {"resource_id": r.id, "quantity": quantity}
+                        for r, quantity in items
+                    ],
+                }
+            ),
+            content_type="application/json",
+        )
+        return Survivor.objects.get(id=res.json()["id"])
+
+    def test_get(self):
+        self.survivors[0].is_infected = True
+        self.survivors[0].save()
+
+        res = self.client.get(reverse("leaderboard"), {"limit": 5})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertListEqual(
+            [
+                {
+                    "id": self.survivors[1].id,
+                    "name": "Survivor",
+                    "wealth": "23.00",
+                    "rank": 1,
+                },
+                {
+                    "id": self.survivors[2].id,
+                    "name": "Survivor",
+                    "wealth": "15.00",
+                    "rank": 2,
+                },
+            ],
+            res.json(),
+        )
+
+    def test_get_rank(self):
+        res = self.client.get(
+            reverse("survivor-leaderboard-rank", kwargs={"pk": self.survivors[2].id})
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(2, res.json()["rank"])
+
+    def test_price_change_recomputes_wealth(self):
+        self.food.price = 10
+        self.food.save()
+
+        self.assertListEqual(
+            ["14.00", "30.00", "22.00"],
+            [
+                "{:.2f}".format(w)
+                for w in Survivor.objects.filter(id__in=[s.id for s in self.survivors])
+                .order_by("id")
+                .values_list("wealth", flat=True)
+            ],
+        )
+
+
+class AdminTestCase(TestCase):
+    def setUp(self):
+        self.client.force_login(
+            User.objects.create_superuser("admin", "admin@example.com", "password")
+        )
+        survivors = baker.make(Survivor, _quantity=2)
+        baker.make(LocationLog, survivor=survivors[0])
+        baker.make(InfectionReport, author=survivors[0], infected_survivor=survivors[1])
+        baker.make(InventoryItem, owner=survivors[0])
+        baker.make(InventoryMovement, owner=survivors[0], delta=1, reason="trade")
+
+    def test_changelists(self):
+        for model in [
+            Survivor,
+            LocationLog,
+            InfectionReport,
+            InventoryItem,
+            InventoryMovement,
+        ]:
+            url = reverse(
+                f"admin:{model._meta.app_label}_{model._meta.model_name}_changelist"
+            )
+            res = self.client.get(url, {"created_within": "day"})
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_derived_state_read_only(self):
+        survivor = Survivor.objects.filter(inventory_items__isnull=False).get()
+        res = self.client.post(
+            reverse("admin:survivors_survivor_change", args=[survivor.id]),
+            {"name": "Renamed", "age": survivor.age, "is_infected": "on"},
+        )
+        self.assertEqual(res.status_code, status.HTTP_302_FOUND)
+        survivor.refresh_from_db()
+        self.assertEqual("Renamed", survivor.name)
+        self.assertFalse(survivor.is_infected)
+
+        item = InventoryItem.objects.get()
+        res = self.client.post(
+            reverse("admin:survivors_inventoryitem_change", args=[item.id]),
+            {"owner": item.owner_id, "resource": item.resource_id, "quantity": 100},
+        )
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_survivor_search(self):
+        res = self.client.get(
+            reverse("admin:survivors_survivor_changelist"), {"q": "(unmatched"}
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+
+class QueryBudgetTestCase(QueryBudgetMixin, APITestCase):
+    dataset_sizes = [10, 30, 90]
+    large_tables = [
+        Survivor._meta.db_table,
+        LocationLog._meta.db_table,
+        InfectionReport._meta.db_table,
+        InventoryItem._meta.db_table,
+        InventoryMovement._meta.db_table,
+        Trade._meta.db_table,
+    ]
+
+    def setUp(self):
+        cache.clear()
+        use_temporary_throttle_store(self)
+
+        self.genders = baker.make(Gender, _quantity=2)
+        self.resources = baker.make(Resource, price=1, _quantity=5)
+        self.survivors = []
+        with self.captureOnCommitCallbacks(execute=True):
+            Zone.objects.create(
+                name="Zone",
+                shape=Zone.Shape.CIRCLE,
+                center_latitude=1,
+                center_longitude=2,
+                radius=1,
+            )
+        # Built once per process and zones generation, not per request.
+        get_zone_index()
+
+    def grow_dataset(self, size):
+        """
+        Add healthy survivors, with inventories, locations, infection reports
+        and trades, until there are `size` of them.
+        """
+        survivors = [
+            baker.make(
+                Survivor,
+                is_infected=False,
+                gender=self.genders[index % 2],
+                # 1.1 km apart, so that trade partners are searched in a few
+                # radii.
+                last_latitude=index * 0.01,
+                last_longitude=0,
+            )
+            for index in range(len(self.survivors), size)
+        ]
+        for survivor in survivors:
+            for resource in self.resources:
+                baker.make(
+                    InventoryItem, owner=survivor, resource=resource, quantity=100
+                )
+            baker.make(LocationLog, survivor=survivor, _quantity=3)
+        for author, survivor in zip(survivors, survivors[1:]):
+            baker.make(InfectionReport, author=author, infected_survivor=survivor)
+            baker.make(Trade, survivor=author, partner=survivor, value=1)
+        self.survivors += survivors
+
+    def get_requests(self):
+        survivor, partner, author = self.survivors[:3]
+        reported, reporter = self.survivors[-2:]
+        survivor_url = partial(reverse, kwargs={"pk": survivor.id})
+        item = partial(dict, quantity=1)
+        return [
+            ("survivors list", 1, "get", reverse("survivors"), None),
+            ("survivors search", 1, "get", reverse("survivors") + "?name=a", None),
+            (
+                "survivors create",
+                9,
+                "post",
+                reverse("survivors"),
+                {
+                    "name": "Survivor",
+                    "age": 30,
+                    "gender_id": self.genders[0].id,
+                    "inventory_items": [item(resource_id=self.resources[0].id)],
+                },
+            ),
+            ("genders", 1, "get", reverse("genders"), None),
+            ("location logs", 1, "get", reverse("location-logs"), None),
+            ("leaderboard", 1, "get", reverse("leaderboard"), None),
+            ("zones", 1, "get", reverse("zones"), None),
+            ("groups", 1, "get", reverse("survivor-groups"), None),
+            (
+                "heatmap",
+                1,
+                "get",
+                reverse("survivors-heatmap", kwargs={"zoom": 2, "x": 2, "y": 1}),
+                None,
+            ),
+            (
+                "leaderboard rank",
+                2,
+                "get",
+                survivor_url("survivor-leaderboard-rank"),
+                None,
+            ),
+            ("dashboard", 2, "get", survivor_url("survivor-dashboard"), None),
+            ("inventory", 1, "get", survivor_url("survivor-inventory"), None),
+            (
+                "trade partners",
+                6,
+                "get",
+                survivor_url("survivor-trade-partners")
+                + f"?resource_id={self.resources[0].id}",
+                None,
+            ),
+            (
+                "location log create",
+                7,
+                "post",
+                survivor_url("survivor-location-logs"),
+                {"latitude": 1, "longitude": 2},
+            ),
+            (
+                "infection report create",
+                8,
+                "post",
+                reverse("survivor-infection-reports", kwargs={"pk": reported.id}),
+                {"author_id": reporter.id},
+            ),
+            (
+                "infection reports bulk create",
+                4,
+                "post",
+                reverse("infection-reports"),
+                {
+                    "reports": [
+                        {"author_id": author.id, "infected_survivor_id": s.id}
+                        for s in self.survivors[3:6]
+                    ]
+                },
+            ),
+            (
+                "trade",
+                18,
+                "post",
+                survivor_url("trade"),
+                {
+                    "partner_id": partner.id,
+                    "offered_items": [item(resource_id=self.resources[0].id)],
+                    "requested_items": [item(resource_id=self.resources[1].id)],
+                },
+            ),
+        ]
+
+    def test_query_budgets(self):
+        for size in self.dataset_sizes:
+            self.grow_dataset(size)
+            for name, budget, method, url, data in self.get_requests():
+                cache.clear()
+                get_inventory_cache().clear()
+                get_lru_cache(
+                    "survivors:heatmap", settings.HEATMAP_CACHE_MAX_BYTES
+                ).clear()
+                with self.subTest(size=size, endpoint=name):
+                    msg = f"{name} with {size} survivors"
+                    with self.captureOnCommitCallbacks(execute=True):
+                        with self.assertQueryBudget(budget, msg):
+                            res = getattr(self.client, method)(
+                                url,
+                                data and json.dumps(data),
+                                content_type="application/json",
+                            )
+                    self.assertLess(res.status_code, 300, msg)
+
+
+@tag("stress")
+class StressTestCase(TransactionTestCase):
+    """
+    Skipped unless requested with `python manage.py test --tag stress`; scale
+    up with e.g. `STRESS_WORKERS=32 STRESS_OPERATIONS=500`.
+    """
+
+    workers = int(os.getenv("STRESS_WORKERS", "8"))
+    operations = int(os.getenv("STRESS_OPERATIONS", "25"))
+
+    def test_concurrent_trades_and_reports(self):
+        survivor_ids, resource_ids = create_population(
+            survivors_count=20, resources_count=4, quantity=10
+        )
+        resource_totals = get_resource_totals()
+
+        stats = run_stress(
+            survivor_ids,
+            resource_ids,
+            workers=self.workers,
+            operations=self.operations,
+            report_ratio=0.2,
+        )
+
+        self.assertEqual(self.workers * self.operations, stats.operations)
+        self.assertGreater(stats.outcomes["trade 200"], 0)
+        self.assertEqual(0, stats.outcomes["trade gave up"])
+        self.assertEqual(0, stats.retries["deadlock"])
+        self.assertEqual([], check_invariants(resource_totals))
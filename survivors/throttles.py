@@ -0,0 +1,8 @@
+from utils.throttling import TokenBucketThrottle
+
+
+class LocationLogsThrottle(TokenBucketThrottle):
+    scopes = ["location_logs_client", "location_logs_survivor"]
+
+    def get_keys(self, request, view):
+        return [self.get_ident(request), view.kwargs["pk"]]
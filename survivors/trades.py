@@ -0,0 +1,114 @@
+from django.db import connection, transaction
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+
+from .dashboard import invalidate_dashboards
+from .inventories import invalidate_inventories
+from .ledger import InsufficientInventory, post_movements
+from .models import InventoryMovement, Trade, TradeItem
+from resources.models import Resource
+from resources.rollups import increment_trade_volume
+
+
+# Blocks repricing, which locks resources for update, until the trade commits.
+_LOCK_PRICE_VERSIONS_SQL = f"""
+    SELECT id, price_version
+    FROM {Resource._meta.db_table}
+    WHERE id = ANY(%s)
+    FOR SHARE
+"""
+
+
+class PricesChanged(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Resource prices have changed, please retry the trade."
+    default_code = "prices_changed"
+
+
+def lock_prices(prices, resource_ids):
+    with connection.cursor() as cursor:
+        cursor.execute(_LOCK_PRICE_VERSIONS_SQL, [list(resource_ids)])
+        price_versions = dict(cursor.fetchall())
+    if any(
+        price_versions.get(resource_id) != prices[resource_id][1]
+        for resource_id in resource_ids
+    ):
+        raise PricesChanged()
+
+
+@transaction.atomic
+def execute_trade(survivor, partner, offered_items, requested_items, prices):
+    """
+    Move traded items between both parties' inventories and append the trade
+    to the trade log and the per-resource volume rollups.
+
+    `prices` is the `{resource_id: (price, price_version)}` snapshot the trade
+    was validated against; `PricesChanged` is raised if it became stale, and
+    a `ValidationError` if either party lacks the traded items.
+    """
+    lock_prices(
+        prices, {item["resource"].id for item in offered_items + requested_items}
+    )
+    trade = Trade.objects.create(
+        survivor=survivor,
+        partner=partner,
+        value=sum(
+            prices[item["resource"].id][0] * item["quantity"] for item in offered_items
+        ),
+    )
+
+    trade_items = []
+    movements = []
+    for giver, receiver, items in [
+        (survivor, partner, offered_items),
+        (partner, survivor, requested_items),
+    ]:
+        for item in items:
+            trade_items.append(
+                TradeItem(
+                    trade=trade,
+                    giver=giver,
+                    resource=item["resource"],
+                    quantity=item["quantity"],
+                    price=prices[item["resource"].id][0],
+                )
+            )
+            movements += [
+                InventoryMovement(
+                    owner=giver,
+                    resource=item["resource"],
+                    delta=-item["quantity"],
+                    reason=InventoryMovement.Reason.TRADE,
+                    trade=trade,
+                ),
+                InventoryMovement(
+                    owner=receiver,
+                    resource=item["resource"],
+                    delta=item["quantity"],
+                    reason=InventoryMovement.Reason.TRADE,
+                    trade=trade,
+                ),
+            ]
+
+    TradeItem.objects.bulk_create(trade_items)
+    try:
+        post_movements(movements)
+    except InsufficientInventory as exc:
+        owner_ids = {owner_id for owner_id, _ in exc.missing}
+        errors = {}
+        if survivor.id in owner_ids:
+            errors["offered_items"] = [
+                "Some offered items are missing from survivor's inventory."
+            ]
+        if partner.id in owner_ids:
+            errors["requested_items"] = [
+                "Some requested items are missing from partner's inventory."
+            ]
+        raise ValidationError(errors)
+    increment_trade_volume(
+        [(item.resource_id, item.quantity, item.price) for item in trade_items],
+        trade.created_at,
+    )
+    invalidate_dashboards([survivor.id, partner.id])
+    invalidate_inventories([survivor.id, partner.id])
+    return trade
@@ -1,16 +1,25 @@
 from django.urls import path, include
 from .views import (
     GendersListAPIView,
+    HeatmapTileAPIView,
+    InfectionReportsBulkCreateAPIView,
+    LeaderboardListAPIView,
     LocationLogsListAPIView,
+    SurvivorDashboardAPIView,
     SurvivorsListCreateAPIView,
     SurvivorInventoryListAPIView,
     SurvivorLocationLogsCreateAPIView,
     SurvivorInfectionReportsCreateAPIView,
+    SurvivorLeaderboardRankAPIView,
+    SurvivorTradePartnersListAPIView,
+    SurvivorGroupsListAPIView,
     TradeAPIView,
+    ZonesListAPIView,
 )
 
 
 survivor_details_urlpatterns = [
+    path("dashboard/", SurvivorDashboardAPIView.as_view(), name="survivor-dashboard"),
     path(
         "inventory-items/",
         SurvivorInventoryListAPIView.as_view(),
@@ -27,6 +36,16 @@ survivor_details_urlpatterns = [
         name="survivor-infection-reports",
     ),
     path("trade/", TradeAPIView.as_view(), name="trade"),
+    path(
+        "trade-partners/",
+        SurvivorTradePartnersListAPIView.as_view(),
+        name="survivor-trade-partners",
+    ),
+    path(
+        "leaderboard-rank/",
+        SurvivorLeaderboardRankAPIView.as_view(),
+        name="survivor-leaderboard-rank",
+    ),
 ]
 
 
@@ -35,4 +54,17 @@ urlpatterns = [
     path("<int:pk>/", include(survivor_details_urlpatterns)),
     path("genders", GendersListAPIView.as_view(), name="genders"),
     path("location-logs", LocationLogsListAPIView.as_view(), name="location-logs"),
+    path("leaderboard", LeaderboardListAPIView.as_view(), name="leaderboard"),
+    path("zones", ZonesListAPIView.as_view(), name="zones"),
+    path("groups", SurvivorGroupsListAPIView.as_view(), name="survivor-groups"),
+    path(
+        "heatmap/<int:zoom>/<int:x>/<int:y>",
+        HeatmapTileAPIView.as_view(),
+        name="survivors-heatmap",
+    ),
+    path(
+        "infection-reports",
+        InfectionReportsBulkCreateAPIView.as_view(),
+        name="infection-reports",
+    ),
 ]
@@ -1,52 +1,219 @@
-from django.db.models import Max, F
-from django.db import transaction
+import re
+
+from django.conf import settings
+from django.contrib.postgres.search import TrigramSimilarity
+from django.core.cache import cache
+from django.db.models import (
+    Count,
+    F,
+    Max,
+    OuterRef,
+    Prefetch,
+    Q,
+    Subquery,
+    Value,
+)
+from django.db.models.functions import Coalesce
+from django.http import HttpResponse
 from rest_framework import status
 from rest_framework.generics import (
     GenericAPIView,
     ListAPIView,
     ListCreateAPIView,
     CreateAPIView,
+    RetrieveAPIView,
 )
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.response import Response
-
-
-from .models import Gender, LocationLog, Survivor, InventoryItem
+from rest_framework.views import APIView
+
+
+from .dashboard import get_dashboard_cache_key, get_dashboard_version
+from .inventories import get_inventory_cache, get_inventory_generation
+from .heatmap import get_tile
+from .partners import find_trade_partners
+from .encoders import (
+    INVENTORY_ITEM_LOOKUPS,
+    INVENTORY_ITEM_SCHEMA,
+    SURVIVOR_LOCATION_LOG_LOOKUPS,
+    SURVIVOR_LOCATION_LOG_SCHEMA,
+    SURVIVOR_LOOKUPS,
+    SURVIVOR_SCHEMA,
+)
+from .models import (
+    Gender,
+    InfectionReport,
+    InventoryItem,
+    LocationLog,
+    Survivor,
+    SurvivorGroup,
+    Zone,
+)
 from .serializers import (
     GenderSerializer,
+    InfectionReportBulkSerializer,
     InfectionReportSerializer,
     InventoryItemSerializer,
+    SurvivorDashboardSerializer,
     SurvivorLocationLogSerializer,
+    SurvivorFilterSerializer,
+    SurvivorGroupSerializer,
     SurvivorSerializer,
+    SurvivorWealthSerializer,
+    TradePartnerFilterSerializer,
+    TradePartnerSerializer,
     TradeSerializer,
+    ZoneSerializer,
+)
+from .throttles import LocationLogsThrottle
+from .trades import execute_trade
+from utils.serializers import SparseFieldset
+from utils.views import (
+    FastJSONListMixin,
+    MessagePackMixin,
+    ReplicaReadMixin,
+    SparseFieldsMixin,
 )
-from resources.models import Resource
 
 
-class GendersListAPIView(ListAPIView):
+class GendersListAPIView(ReplicaReadMixin, ListAPIView):
     serializer_class = GenderSerializer
 
     def get_queryset(self):
         return Gender.objects.all()
 
 
-class LocationLogsListAPIView(ListAPIView):
+class LocationLogsListAPIView(
+    ReplicaReadMixin,
+    MessagePackMixin,
+    SparseFieldsMixin,
+    FastJSONListMixin,
+    ListAPIView,
+):
     serializer_class = SurvivorLocationLogSerializer
+    fast_list_schema = SURVIVOR_LOCATION_LOG_SCHEMA
+    fast_list_lookups = SURVIVOR_LOCATION_LOG_LOOKUPS
 
     def get_queryset(self):
-        return (
+        queryset = (
             LocationLog.objects.annotate(
                 latest_created_at=Max("survivor__location_logs__created_at")
             )
             .filter(created_at=F("latest_created_at"))
-            .select_related("survivor")
+            .order_by("id")
         )
+        return self.select_related(queryset, "survivor__gender")
+
+
+class ZonesListAPIView(ReplicaReadMixin, ListAPIView):
+    serializer_class = ZoneSerializer
+
+    def get_queryset(self):
+        return Zone.objects.only(*ZoneSerializer.Meta.fields).order_by("id")
+
+
+class SurvivorGroupsListAPIView(ReplicaReadMixin, ListAPIView):
+    serializer_class = SurvivorGroupSerializer
+
+    def get_queryset(self):
+        return SurvivorGroup.objects.only(
+            *SurvivorGroupSerializer.Meta.fields
+        ).order_by("-size", "id")
 
 
-class SurvivorsListCreateAPIView(ListCreateAPIView):
+class HeatmapTileAPIView(APIView):
+    def get(self, request, zoom, x, y):
+        if zoom > settings.HEATMAP_MAX_ZOOM or max(x, y) >= 2**zoom:
+            raise NotFound("Tile not found.")
+        return HttpResponse(get_tile(zoom, x, y), content_type="application/json")
+
+
+class SurvivorsListCreateAPIView(
+    ReplicaReadMixin, SparseFieldsMixin, FastJSONListMixin, ListCreateAPIView
+):
     serializer_class = SurvivorSerializer
+    fast_list_schema = SURVIVOR_SCHEMA
+    fast_list_lookups = SURVIVOR_LOOKUPS
+    filter_lookups = {
+        "is_infected": "is_infected",
+        "gender_id": "gender_id",
+        "age_min": "age__gte",
+        "age_max": "age__lte",
+        "created_after": "created_at__gte",
+        "created_before": "created_at__lte",
+    }
+
+    def get_queryset(self):
+        return self.select_related(Survivor.objects.order_by("id"), "gender")
+
+    def filter_queryset(self, queryset):
+        # Plain dict, so missing booleans are not read as unchecked checkboxes.
+        filters = SurvivorFilterSerializer(data=self.request.query_params.dict())
+        filters.is_valid(raise_exception=True)
+        params = filters.validated_data
+
+        queryset = queryset.filter(
+            **{
+                lookup: params[param]
+                for param, lookup in self.filter_lookups.items()
+                if param in params
+            }
+        )
+        if "name" in params:
+            # Unlike `istartswith`, a regex match can use the trigram index.
+            queryset = queryset.filter(name__iregex="^" + re.escape(params["name"]))
+        if "search" in params:
+            queryset = (
+                queryset.filter(name__trigram_similar=params["search"])
+                .annotate(similarity=TrigramSimilarity("name", params["search"]))
+                .order_by("-similarity", "id")
+            )
+        return queryset
+
+
+class LeaderboardListAPIView(ReplicaReadMixin, SparseFieldsMixin, ListAPIView):
+    serializer_class = SurvivorWealthSerializer
+    default_limit = 10
+    max_limit = 100
+
+    def get_queryset(self):
+        return Survivor.objects.filter(is_infected=False).order_by("-wealth", "id")
+
+    def get_limit(self):
+        try:
+            limit = int(self.request.query_params.get("limit", self.default_limit))
+        except ValueError:
+            raise ValidationError({"limit": ["A valid integer is required."]})
+        return max(1, min(limit, self.max_limit))
+
+    def list(self, request, *args, **kwargs):
+        survivors = list(self.get_queryset()[: self.get_limit()])
+        for rank, survivor in enumerate(survivors, start=1):
+            survivor.rank = rank
+        serializer = self.get_serializer(survivors, many=True)
+        return Response(serializer.data)
+
+
+class SurvivorLeaderboardRankAPIView(
+    ReplicaReadMixin, SparseFieldsMixin, RetrieveAPIView
+):
+    serializer_class = SurvivorWealthSerializer
 
     def get_queryset(self):
-        return Survivor.objects.select_related("gender")
+        return Survivor.objects.filter(is_infected=False)
+
+    def get_object(self):
+        survivor = super().get_object()
+        survivor.rank = (
+            self.get_queryset()
+            .filter(
+                Q(wealth__gt=survivor.wealth)
+                | Q(wealth=survivor.wealth, id__lt=survivor.id)
+            )
+            .count()
+            + 1
+        )
+        return survivor
 
 
 class SurvivorInfectionReportsCreateAPIView(CreateAPIView):
@@ -64,8 +231,13 @@ class SurvivorInfectionReportsCreateAPIView(CreateAPIView):
         )
 
 
-class SurvivorLocationLogsCreateAPIView(CreateAPIView):
+class InfectionReportsBulkCreateAPIView(CreateAPIView):
+    serializer_class = InfectionReportBulkSerializer
+
+
+class SurvivorLocationLogsCreateAPIView(MessagePackMixin, CreateAPIView):
     serializer_class = SurvivorLocationLogSerializer
+    throttle_classes = [LocationLogsThrottle]
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(
@@ -79,15 +251,94 @@ class SurvivorLocationLogsCreateAPIView(CreateAPIView):
         )
 
 
-class SurvivorInventoryListAPIView(ListAPIView):
+class SurvivorInventoryListAPIView(SparseFieldsMixin, FastJSONListMixin, ListAPIView):
     serializer_class = InventoryItemSerializer
+    fast_list_schema = INVENTORY_ITEM_SCHEMA
+    fast_list_lookups = INVENTORY_ITEM_LOOKUPS
 
     def get_queryset(self):
-        return InventoryItem.objects.select_related("resource")
+        return self.select_related(InventoryItem.objects.all(), "resource")
 
     def filter_queryset(self, queryset):
         return queryset.filter(owner_id=self.kwargs["pk"])
 
+    def render_fast_list(self, encoder, lookups):
+        if self.get_fieldset() != SparseFieldset():
+            return super().render_fast_list(encoder, lookups)
+
+        # Not read from replicas, which could cache data older than the
+        # generation it is stored with.
+        survivor_id = self.kwargs["pk"]
+        cache = get_inventory_cache()
+        generation = get_inventory_generation(survivor_id)
+        content = cache.get(survivor_id, generation)
+        if content is None:
+            content = super().render_fast_list(encoder, lookups)
+            cache.set(survivor_id, generation, content)
+        return content
+
+
+class SurvivorDashboardAPIView(RetrieveAPIView):
+    serializer_class = SurvivorDashboardSerializer
+
+    def get_queryset(self):
+        infection_reports_count = (
+            InfectionReport.objects.filter(infected_survivor=OuterRef("pk"))
+            .values("infected_survivor")
+            .annotate(count=Count("id"))
+            .values("count")
+        )
+        return (
+            Survivor.objects.select_related("gender")
+            .annotate(
+                infection_reports_count=Coalesce(
+                    Subquery(infection_reports_count), Value(0)
+                ),
+            )
+            .prefetch_related(
+                Prefetch(
+                    "inventory_items",
+                    queryset=InventoryItem.objects.select_related("resource").order_by(
+                        "id"
+                    ),
+                )
+            )
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        # Not read from replicas, which could refill the cache with stale data.
+        cache_key = get_dashboard_cache_key(kwargs["pk"])
+        version = get_dashboard_version(kwargs["pk"])
+        data = cache.get(cache_key, version=version)
+        if data is None:
+            data = super().retrieve(request, *args, **kwargs).data
+            cache.set(
+                cache_key,
+                data,
+                settings.SURVIVOR_DASHBOARD_CACHE_TIMEOUT,
+                version=version,
+            )
+        return Response(data)
+
+
+class SurvivorTradePartnersListAPIView(ReplicaReadMixin, ListAPIView):
+    serializer_class = TradePartnerSerializer
+
+    def get_queryset(self):
+        return Survivor.objects.only("is_infected", "last_latitude", "last_longitude")
+
+    def list(self, request, *args, **kwargs):
+        filters = TradePartnerFilterSerializer(data=request.query_params.dict())
+        filters.is_valid(raise_exception=True)
+        survivor = self.get_object()
+        if survivor.is_infected:
+            raise ValidationError(["Infected survivors cannot perform such action."])
+        if survivor.last_latitude is None:
+            raise ValidationError(["Survivor location is unknown."])
+
+        partners = find_trade_partners(survivor, **filters.validated_data)
+        return Response(self.get_serializer(partners, many=True).data)
+
 
 class TradeAPIView(GenericAPIView):
     serializer_class = TradeSerializer
@@ -98,78 +349,12 @@ class TradeAPIView(GenericAPIView):
         )
         serializer.is_valid(raise_exception=True)
 
-        survivor = serializer.validated_data["survivor_id"]
-        partner = serializer.validated_data["partner_id"]
-
-        resources = Resource.objects.values("name", "id")
-        resource_id_map = {r["name"]: r["id"] for r in resources}
-        survivor_items = {
-            item.resource.name: item
-            for item in survivor.inventory_items.select_related("resource")
-        }
-        partner_items = {
-            item.resource.name: item
-            for item in partner.inventory_items.select_related("resource")
-        }
-        inventory_items_bulk_create_list = []
-        inventory_items_bulk_update_list = []
-        inventory_items_bulk_delete_list = []
-
-        for item in serializer.validated_data["offered_items"]:
-            survivor_item_obj = survivor_items[item["resource"].name]
-
-            if survivor_item_obj.quantity > item["quantity"]:
-                survivor_item_obj.quantity -= item["quantity"]
-                inventory_items_bulk_update_list.append(survivor_item_obj)
-            else:
-                inventory_items_bulk_delete_list.append(survivor_item_obj)
-
-            partner_item_obj = partner_items.get(item["resource"].name)
-            if partner_item_obj:
-                partner_item_obj.quantity += item["quantity"]
-                inventory_items_bulk_update_list.append(partner_item_obj)
-            else:
-                inventory_items_bulk_create_list.append(
-                    InventoryItem(
-                        owner=partner,
-                        resource_id=resource_id_map[item["resource"].name],
-                        quantity=item["quantity"],
-                    )
-                )
-
-        for item in serializer.validated_data["requested_items"]:
-            survivor_item_obj = survivor_items.get(item["resource"].name)
-            if survivor_item_obj:
-                survivor_item_obj = survivor_items[item["resource"].name]
-                survivor_item_obj.quantity += item["quantity"]
-                if survivor_item_obj not in inventory_items_bulk_update_list:
-                    inventory_items_bulk_update_list.append(survivor_item_obj)
-            else:
-                inventory_items_bulk_create_list.append(
-                    InventoryItem(
-                        owner=survivor,
-                        resource_id=resource_id_map[item["resource"].name],
-                        quantity=item["quantity"],
-                    )
-                )
-
-            partner_item_obj = partner_items[item["resource"].name]
-            if partner_item_obj.quantity > item["quantity"]:
-                partner_item_obj.quantity -= item["quantity"]
-                if partner_item_obj not in inventory_items_bulk_update_list:
-                    inventory_items_bulk_update_list.append(partner_item_obj)
-            else:
-                inventory_items_bulk_delete_list.append(partner_item_obj)
-
-        with transaction.atomic():
-            InventoryItem.objects.filter(
-                resource_id__in=[
-                    i.resource_id for i in inventory_items_bulk_delete_list
-                ]
-            ).delete()
-            InventoryItem.objects.bulk_create(inventory_items_bulk_create_list)
-            InventoryItem.objects.bulk_update(
-                inventory_items_bulk_update_list, ["quantity"]
-            )
+        execute_trade(
+            serializer.validated_data["survivor_id"],
+            serializer.validated_data["partner_id"],
+            serializer.validated_data["offered_items"],
+            serializer.validated_data["requested_items"],
+            serializer.validated_data["prices"],
+        )
 
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -0,0 +1,57 @@
+from collections import defaultdict
+
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import InventoryItem, Survivor
+from resources.models import Resource
+
+
+def apply_wealth_deltas(movements):
+    """
+    Increment survivors' wealth by the value of their inventory movements.
+    """
+    movements = list(movements)
+    prices = dict(
+        Resource.objects.filter(
+            id__in={movement.resource_id for movement in movements}
+        ).values_list("id", "price")
+    )
+    deltas = defaultdict(int)
+    for movement in movements:
+        deltas[movement.owner_id] += prices[movement.resource_id] * movement.delta
+
+    # In id order, like inventory items, so concurrent trades cannot deadlock.
+    for owner_id, delta in sorted(deltas.items()):
+        if delta:
+            Survivor.objects.filter(id=owner_id).update(wealth=F("wealth") + delta)
+
+
+def recompute_wealth(survivors=None):
+    """
+    Recompute wealth of `survivors` (all by default) with a single UPDATE.
+    """
+    if survivors is None:
+        survivors = Survivor.objects.all()
+    inventory_value = (
+        InventoryItem.objects.filter(owner=OuterRef("pk"))
+        .values("owner")
+        .annotate(value=Sum(F("quantity") * F("resource__price")))
+        .values("value")
+    )
+    return survivors.update(
+        wealth=Coalesce(
+            Subquery(inventory_value, output_field=DecimalField()),
+            Value(0, output_field=DecimalField()),
+        )
+    )
+
+
+def recompute_wealth_of_holders(resource_ids):
+    return recompute_wealth(
+        Survivor.objects.filter(
+            id__in=InventoryItem.objects.filter(resource_id__in=resource_ids).values(
+                "owner_id"
+            )
+        )
+    )
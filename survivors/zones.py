@@ -0,0 +1,213 @@
+"""
+Zone occupancy counters, maintained incrementally as survivors move.
+
+Each process keeps a grid index of all zones, rebuilt when the shared zones
+generation is bumped, so candidate zones of a location are found without a
+query. Counters change only when a survivor's latest location crosses a zone
+boundary or a survivor inside a zone gets infected.
+"""
+
+import math
+from collections import Counter, defaultdict
+from functools import partial
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .groups import get_group_cell
+from .heatmap import invalidate_heatmap_tiles
+from .models import DirtyGroupCell, Survivor, Zone
+from utils.caching import get_shared_generations
+
+
+ZONES_GENERATION_KEY = "survivors:zones"
+
+# Also marks the group cells left and entered as dirty, see `groups`.
+_MOVE_SURVIVOR_SQL = f"""
+    WITH moved AS (
+        UPDATE {Survivor._meta.db_table} AS survivor
+        SET last_latitude = %s,
+            last_longitude = %s,
+            last_located_at = %s,
+            group_cell = %s
+        FROM (
+            SELECT id, last_latitude, last_longitude, group_cell
+            FROM {Survivor._meta.db_table}
+            WHERE id = %s
+            FOR UPDATE
+        ) AS previous
+        WHERE survivor.id = previous.id
+        RETURNING
+            previous.last_latitude,
+            previous.last_longitude,
+            previous.group_cell AS previous_cell,
+            survivor.group_cell AS cell,
+            survivor.is_infected
+    ), dirty AS (
+        INSERT INTO {DirtyGroupCell._meta.db_table} (cell, marked_at)
+        SELECT DISTINCT dirty_cell.cell, statement_timestamp()
+        FROM moved, unnest(ARRAY[moved.previous_cell, moved.cell]) AS dirty_cell(cell)
+        WHERE dirty_cell.cell IS NOT NULL
+        ON CONFLICT (cell) DO UPDATE SET marked_at = EXCLUDED.marked_at
+    )
+    SELECT last_latitude, last_longitude, is_infected FROM moved
+"""
+
+_APPLY_OCCUPANCY_DELTAS_SQL = f"""
+    WITH locked AS (
+        SELECT id FROM {Zone._meta.db_table}
+        WHERE id = ANY(%s)
+        ORDER BY id
+        FOR NO KEY UPDATE
+    )
+    UPDATE {Zone._meta.db_table} AS zone
+    SET healthy_count = healthy_count + delta.healthy,
+        infected_count = infected_count + delta.infected
+    FROM unnest(%s::bigint[], %s::int[], %s::int[])
+        AS delta(id, healthy, infected)
+    WHERE zone.id = delta.id AND zone.id IN (SELECT id FROM locked)
+"""
+
+_index = (None, None)
+
+
+class ZoneIndex:
+    """
+    Zones bucketed by the grid cells their bounding boxes overlap.
+    """
+
+    def __init__(self, zones, cell_size):
+        self.cell_size = cell_size
+        self.cells = defaultdict(list)
+        for zone in zones:
+            min_cell = self.get_cell(zone.min_latitude, zone.min_longitude)
+            max_cell = self.get_cell(zone.max_latitude, zone.max_longitude)
+            for row in range(min_cell[0], max_cell[0] + 1):
+                for column in range(min_cell[1], max_cell[1] + 1):
+                    self.cells[(row, column)].append(zone)
+
+    def get_cell(self, latitude, longitude):
+        return (
+            math.floor(latitude / self.cell_size),
+            math.floor(longitude / self.cell_size),
+        )
+
+    def get_zone_ids(self, latitude, longitude):
+        if latitude is None or longitude is None:
+            return set()
+        return {
+            zone.id
+            for zone in self.cells.get(self.get_cell(latitude, longitude), ())
+            if zone.contains(latitude, longitude)
+        }
+
+
+def get_zone_index():
+    global _index
+    (generation,) = get_shared_generations().get(ZONES_GENERATION_KEY)
+    if _index[0] != generation:
+        _index = (
+            generation,
+            ZoneIndex(Zone.objects.all(), settings.ZONE_GRID_CELL_SIZE),
+        )
+    return _index[1]
+
+
+def invalidate_zone_index():
+    transaction.on_commit(
+        partial(get_shared_generations().bump, [ZONES_GENERATION_KEY]), robust=True
+    )
+
+
+def apply_occupancy_deltas(deltas):
+    """
+    Add `{zone_id: (healthy, infected)}` deltas to the zone counters.
+    """
+    deltas = {zone_id: delta for zone_id, delta in deltas.items() if any(delta)}
+    if not deltas:
+        return
+    zone_ids = list(deltas)
+    healthy, infected = zip(*deltas.values())
+    with connection.cursor() as cursor:
+        cursor.execute(
+            _APPLY_OCCUPANCY_DELTAS_SQL,
+            [zone_ids, zone_ids, list(healthy), list(infected)],
+        )
+
+
+def move_survivor(survivor_id, latitude, longitude, located_at):
+    """
+    Record the latest location of a survivor and move them between the
+    counters of the zones whose boundaries they crossed. Must run in the
+    transaction that creates the location log.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            _MOVE_SURVIVOR_SQL,
+            [
+                latitude,
+                longitude,
+                located_at,
+                get_group_cell(latitude, longitude),
+                survivor_id,
+            ],
+        )
+        previous_latitude, previous_longitude, is_infected = cursor.fetchone()
+
+    index = get_zone_index()
+    previous_zone_ids = index.get_zone_ids(previous_latitude, previous_longitude)
+    zone_ids = index.get_zone_ids(latitude, longitude)
+    step = (0, 1) if is_infected else (1, 0)
+    deltas = {zone_id: step for zone_id in zone_ids - previous_zone_ids}
+    deltas.update(
+        (zone_id, (-step[0], -step[1])) for zone_id in previous_zone_ids - zone_ids
+    )
+    apply_occupancy_deltas(deltas)
+    invalidate_heatmap_tiles(
+        [(previous_latitude, previous_longitude), (latitude, longitude)]
+    )
+
+
+def move_to_infected(survivor_ids):
+    """
+    Move newly infected survivors from the healthy to the infected counters
+    of the zones they are in.
+    """
+    locations = list(
+        Survivor.objects.filter(
+            id__in=survivor_ids, last_latitude__isnull=False
+        ).values_list("last_latitude", "last_longitude")
+    )
+    index = get_zone_index()
+    counts = Counter(
+        zone_id
+        for latitude, longitude in locations
+        for zone_id in index.get_zone_ids(latitude, longitude)
+    )
+    apply_occupancy_deltas({zone_id: (-n, n) for zone_id, n in counts.items()})
+    invalidate_heatmap_tiles(locations)
+
+
+@transaction.atomic
+def recount_zones(zones=None):
+    """
+    Recount the occupancy of `zones` (all by default) from the latest
+    locations of survivors within their bounding boxes.
+    """
+    queryset = Zone.objects.select_for_update().order_by("id")
+    if zones is not None:
+        queryset = queryset.filter(id__in=[zone.id for zone in zones])
+    zones = list(queryset)
+    for zone in zones:
+        counts = Counter(
+            is_infected
+            for latitude, longitude, is_infected in Survivor.objects.filter(
+                last_latitude__range=(zone.min_latitude, zone.max_latitude),
+                last_longitude__range=(zone.min_longitude, zone.max_longitude),
+            ).values_list("last_latitude", "last_longitude", "is_infected")
+            if zone.contains(latitude, longitude)
+        )
+        Zone.objects.filter(id=zone.id).update(
+            healthy_count=counts[False], infected_count=counts[True]
+        )
+    return zones
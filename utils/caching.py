@@ -0,0 +1,112 @@
+"""
+Process-local caches of rendered payloads, invalidated across all worker
+processes through shared generation counters.
+
+Readers take the generation of a key before loading the data it covers and
+store the payload under it; writers bump the generation once their changes
+are committed, which turns the payloads cached by every process stale.
+"""
+
+import fcntl
+import struct
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+from django.conf import settings
+
+from .shm import open_shared_map, stable_hash
+
+
+_COUNTER = struct.Struct("<Q")
+
+
+class SharedGenerations:
+    """
+    Generation counters in a fixed number of slots of a memory-mapped file.
+    Keys sharing a slot are invalidated together.
+    """
+
+    def __init__(self, path, slots):
+        self.slots = slots
+        self.fd, self.map = open_shared_map(path, slots * _COUNTER.size)
+        self.lock = threading.Lock()
+
+    def get_offset(self, key):
+        return stable_hash(key) % self.slots * _COUNTER.size
+
+    def get(self, *keys):
+        return tuple(
+            _COUNTER.unpack_from(self.map, self.get_offset(key))[0] for key in keys
+        )
+
+    def bump(self, keys):
+        offsets = {self.get_offset(key) for key in keys}
+        with self.lock:
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+            try:
+                for offset in offsets:
+                    (generation,) = _COUNTER.unpack_from(self.map, offset)
+                    _COUNTER.pack_into(self.map, offset, generation + 1)
+            finally:
+                fcntl.flock(self.fd, fcntl.LOCK_UN)
+
+
+@lru_cache(maxsize=None)
+def get_generations(path, slots):
+    return SharedGenerations(path, slots)
+
+
+class LRUCache:
+    """
+    Least recently used `bytes` payloads of up to `max_bytes` in total, each
+    returned only for the generation it was stored with.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, generation):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] != generation:
+                self.pop(key)
+                return None
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, generation, payload):
+        if len(payload) > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.entries:
+                self.pop(key)
+            self.entries[key] = (generation, payload)
+            self.size += len(payload)
+            while self.size > self.max_bytes:
+                self.pop(next(iter(self.entries)))
+
+    def pop(self, key):
+        _, payload = self.entries.pop(key)
+        self.size -= len(payload)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+
+@lru_cache(maxsize=None)
+def get_lru_cache(name, max_bytes):
+    return LRUCache(max_bytes)
+
+
+def get_shared_generations():
+    return get_generations(
+        settings.GENERATIONS_STORE_PATH, settings.GENERATIONS_STORE_SLOTS
+    )
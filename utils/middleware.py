@@ -0,0 +1,24 @@
+from django.conf import settings
+from rest_framework.permissions import SAFE_METHODS
+
+
+class PrimaryStickinessMiddleware:
+    """
+    Pins clients to the primary database for a short while after they write,
+    so they read their own writes even if replicas lag behind.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            response.set_cookie(
+                settings.REPLICA_STICKY_COOKIE_NAME,
+                "1",
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
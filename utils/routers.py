@@ -0,0 +1,80 @@
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+
+_replica_reads_enabled = ContextVar("replica_reads_enabled", default=False)
+
+_REPLICA_LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(
+            EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0
+        )
+    END
+"""
+
+# alias -> (checked_at, lag_seconds); lag is None when replica is unreachable.
+_replica_lag_cache = {}
+
+
+@contextmanager
+def replica_reads():
+    token = _replica_reads_enabled.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads_enabled.reset(token)
+
+
+def get_replica_aliases():
+    return [alias for alias in settings.DATABASES if alias != "default"]
+
+
+def get_replica_lag(alias):
+    now = time.monotonic()
+    cached = _replica_lag_cache.get(alias)
+    if cached and now - cached[0] < settings.REPLICA_LAG_CHECK_INTERVAL_SECONDS:
+        return cached[1]
+
+    try:
+        with connections[alias].cursor() as cursor:
+            cursor.execute(_REPLICA_LAG_SQL)
+            lag = float(cursor.fetchone()[0])
+    except DatabaseError:
+        lag = None
+    _replica_lag_cache[alias] = (now, lag)
+    return lag
+
+
+def get_healthy_replica_aliases():
+    return [
+        alias
+        for alias in get_replica_aliases()
+        if (lag := get_replica_lag(alias)) is not None
+        and lag <= settings.REPLICA_MAX_LAG_SECONDS
+    ]
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not _replica_reads_enabled.get():
+            return "default"
+        replicas = get_healthy_replica_aliases()
+        if not replicas:
+            return "default"
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == "default"
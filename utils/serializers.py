@@ -0,0 +1,122 @@
+from typing import NamedTuple, Optional
+
+from rest_framework import serializers
+
+
+def parse_list_param(value):
+    return frozenset(item.strip() for item in value.split(",") if item.strip())
+
+
+class SparseFieldset(NamedTuple):
+    """
+    Response fields requested with the ``fields`` and ``expand`` query params.
+
+    ``fields`` holds dotted paths of the selected fields, including nested
+    ones such as ``survivor.name``; ``expand`` holds paths of the nested
+    objects to embed, the others being rendered as their primary keys.
+    ``None`` selects or expands everything.
+    """
+
+    fields: Optional[frozenset] = None
+    expand: Optional[frozenset] = None
+
+    @classmethod
+    def from_query_params(cls, query_params):
+        fields = parse_list_param(query_params.get("fields", ""))
+        expand = query_params.get("expand")
+        return cls(
+            fields=fields or None,
+            expand=None if expand is None else parse_list_param(expand),
+        )
+
+    def restrict(self, paths):
+        """
+        Drop the requested paths that are not in ``paths``, so that unknown
+        names neither reach the response paths nor make distinct fieldsets.
+        """
+        return SparseFieldset(
+            fields=None if self.fields is None else self.fields & paths,
+            expand=None if self.expand is None else self.expand & paths,
+        )
+
+    def is_selected(self, path):
+        return self.fields is None or any(
+            path == field
+            or path.startswith(field + ".")
+            or field.startswith(path + ".")
+            for field in self.fields
+        )
+
+    def is_expanded(self, path):
+        return self.expand is None or path in self.expand
+
+
+def prune_fields(serializer, fieldset, prefix=""):
+    """
+    Drop the readable fields of ``serializer`` not selected by ``fieldset``
+    and replace nested serializers that are not expanded by primary keys.
+    """
+    serializer = getattr(serializer, "child", serializer)
+    for name, field in list(serializer.fields.items()):
+        path = prefix + name
+        if field.write_only:
+            continue
+        if not fieldset.is_selected(path):
+            del serializer.fields[name]
+        elif isinstance(field, serializers.BaseSerializer):
+            if fieldset.is_expanded(path):
+                prune_fields(field, fieldset, path + ".")
+            else:
+                source = {} if field.source == name else {"source": field.source}
+                serializer.fields[name] = serializers.PrimaryKeyRelatedField(
+                    read_only=True, **source
+                )
+
+
+def get_field_paths(serializer, prefix=""):
+    """
+    Return the dotted paths of the readable fields of ``serializer``,
+    including those of nested serializers.
+    """
+    serializer = getattr(serializer, "child", serializer)
+    paths = set()
+    for field in serializer._readable_fields:
+        path = prefix + field.field_name
+        paths.add(path)
+        if isinstance(field, serializers.BaseSerializer):
+            paths |= get_field_paths(field, path + ".")
+    return paths
+
+
+def get_related_lookups(serializer, prefix=""):
+    """
+    Return the relation lookups traversed by the readable fields of
+    ``serializer``, e.g. ``survivor__gender`` for a nested ``gender.name``.
+    """
+    serializer = getattr(serializer, "child", serializer)
+    lookups = set()
+    for field in serializer._readable_fields:
+        source_attrs = field.source_attrs
+        if isinstance(field, serializers.BaseSerializer):
+            lookup = prefix + "__".join(source_attrs)
+            lookups.add(lookup)
+            lookups |= get_related_lookups(field, lookup + "__")
+        else:
+            lookups |= {
+                prefix + "__".join(source_attrs[:length])
+                for length in range(1, len(source_attrs))
+            }
+    return lookups
+
+
+def use_native_datetimes(serializer):
+    """
+    Leave datetimes of ``serializer`` as ``datetime`` objects for renderers
+    with a native datetime type.
+    """
+    serializer = getattr(serializer, "child", serializer)
+    for field in serializer.fields.values():
+        if isinstance(field, serializers.DateTimeField):
+            field.format = None
+        elif isinstance(field, serializers.BaseSerializer):
+            use_native_datetimes(field)
@@ -0,0 +1,28 @@
+"""
+Helpers for state shared by all worker processes through memory-mapped
+files, under ``/dev/shm`` by default.
+"""
+
+import mmap
+import os
+from hashlib import blake2b
+
+
+def stable_hash(key):
+    """
+    Return a non-zero 64-bit hash of `key`, unlike `hash()` the same in all
+    processes.
+    """
+    digest = blake2b(key.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little") or 1
+
+
+def open_shared_map(path, size):
+    """
+    Return the file descriptor and a shared memory map of the file at `path`,
+    created zero-filled up to `size` bytes if needed.
+    """
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+    if os.fstat(fd).st_size < size:
+        os.ftruncate(fd, size)
+    return fd, mmap.mmap(fd, size)
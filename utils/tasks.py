@@ -0,0 +1,169 @@
+"""
+Lightweight post-commit task pipeline on top of kombu.
+
+Request handlers enqueue side effects with ``some_task.delay(...)``. Messages
+are published only once the surrounding transaction commits, and consumed by
+``python manage.py run_task_worker``. With the ``memory://`` broker, queued
+messages are consumed in-process right after publishing instead.
+"""
+
+import logging
+import threading
+from collections import defaultdict
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import autodiscover_modules
+from kombu import Connection
+
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+_local = threading.local()
+
+
+class Task:
+    def __init__(self, func, name, max_retries, batched):
+        self.func = func
+        self.name = name
+        self.max_retries = max_retries
+        self.batched = batched
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def delay(self, *args, **kwargs):
+        """
+        Run the task in the background once the current transaction commits.
+
+        Batched tasks take a single list of items, which the worker may merge
+        with the items of other pending messages of the same task.
+        """
+        if self.batched and (len(args) != 1 or kwargs):
+            raise TypeError(f"Batched task {self.name} takes a single list of items.")
+        payload = {"task": self.name, "args": list(args), "kwargs": kwargs}
+        transaction.on_commit(partial(publish, payload), robust=True)
+
+
+def task(func=None, *, name=None, max_retries=None, batched=False):
+    def decorator(func):
+        task_name = name or f"{func.__module__}.{func.__name__}"
+        if max_retries is None:
+            retries = settings.TASKS_MAX_RETRIES
+        else:
+            retries = max_retries
+        _registry[task_name] = Task(func, task_name, retries, batched)
+        return _registry[task_name]
+
+    return decorator(func) if func else decorator
+
+
+def get_task(name):
+    if name not in _registry:
+        autodiscover_modules("tasks")
+    return _registry[name]
+
+
+def is_eager():
+    return settings.TASKS_BROKER_URL.startswith("memory://")
+
+
+def get_connection():
+    connection = getattr(_local, "connection", None)
+    if connection is None:
+        connection = _local.connection = Connection(settings.TASKS_BROKER_URL)
+    return connection
+
+
+def get_queue():
+    return get_connection().SimpleQueue(settings.TASKS_QUEUE)
+
+
+def publish(payload):
+    payload.setdefault("retries", 0)
+    queue = get_queue()
+    try:
+        queue.put(payload, serializer="json")
+    finally:
+        queue.close()
+
+    # Tasks enqueued by tasks are picked up by the outer drain loop.
+    if is_eager() and not getattr(_local, "draining", False):
+        _local.draining = True
+        try:
+            while consume(settings.TASKS_BATCH_SIZE, timeout=0):
+                pass
+        finally:
+            _local.draining = False
+
+
+def consume(batch_size, timeout=1):
+    """
+    Consume and run up to ``batch_size`` queued messages, waiting up to
+    ``timeout`` seconds for the first one. Return the number of messages.
+
+    Messages are acknowledged once run, so those of a worker that crashes or
+    fails to run them are delivered again.
+    """
+    queue = get_queue()
+    messages = []
+    try:
+        while len(messages) < batch_size:
+            try:
+                if messages or not timeout:
+                    message = queue.get_nowait()
+                else:
+                    message = queue.get(block=True, timeout=timeout)
+            except queue.Empty:
+                break
+            messages.append(message)
+
+        for payload, batch in merge_batches(messages):
+            run(payload)
+            for message in batch:
+                message.ack()
+    finally:
+        for message in messages:
+            if not message.acknowledged:
+                message.requeue()
+        queue.close()
+    return len(messages)
+
+
+def merge_batches(messages):
+    """
+    Return `(payload, messages)` pairs of the payloads to run, merging the
+    items of batched tasks, and the messages they come from.
+    """
+    batches = defaultdict(list)
+    merged = []
+    for message in messages:
+        payload = message.payload
+        if get_task(payload["task"]).batched:
+            batches[(payload["task"], payload["retries"])].append(message)
+        else:
+            merged.append((payload, [message]))
+    for (name, retries), batch in batches.items():
+        items = [item for message in batch for item in message.payload["args"][0]]
+        merged.append(
+            (
+                {"task": name, "args": [items], "kwargs": {}, "retries": retries},
+                batch,
+            )
+        )
+    return merged
+
+
+def run(payload):
+    task = get_task(payload["task"])
+    try:
+        with transaction.atomic():
+            task(*payload["args"], **payload["kwargs"])
+    except Exception:
+        if payload["retries"] >= task.max_retries:
+            logger.exception("Task %s failed, giving up.", task.name)
+            return
+        logger.warning("Task %s failed, retrying.", task.name, exc_info=True)
+        publish({**payload, "retries": payload["retries"] + 1})
@@ -0,0 +1,81 @@
+"""
+Test runner, and query budget and query plan assertions for tests.
+
+Test datasets are too small for the planner to prefer indexes, so plans are
+explained with sequential scans disabled: a sequential scan then means no
+index can serve the query, which would not scale on a large table.
+"""
+
+import json
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.runner import DiscoverRunner
+from django.test.utils import CaptureQueriesContext
+
+
+# Tags of slow tests, which only run when their tag is requested.
+OPT_IN_TAGS = {"stress"}
+
+
+class TestRunner(DiscoverRunner):
+    def __init__(self, *args, tags=None, exclude_tags=None, **kwargs):
+        exclude_tags = set(exclude_tags or ()) | (OPT_IN_TAGS - set(tags or ()))
+        super().__init__(*args, tags=tags, exclude_tags=exclude_tags, **kwargs)
+
+
+def explain(sql, params=None):
+    """
+    Return the JSON plan of `sql`, with sequential scans disabled.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("SET enable_seqscan = off")
+        try:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+        finally:
+            cursor.execute("RESET enable_seqscan")
+    return json.loads(plan) if isinstance(plan, str) else plan
+
+
+def get_seq_scans(plan):
+    """
+    Return names of the relations sequentially scanned by `plan`.
+    """
+    if isinstance(plan, list):
+        return {table for node in plan for table in get_seq_scans(node)}
+    node = plan.get("Plan", plan)
+    tables = {node["Relation Name"]} if node["Node Type"] == "Seq Scan" else set()
+    for child in node.get("Plans", []):
+        tables |= get_seq_scans(child)
+    return tables
+
+
+class QueryBudgetMixin:
+    """
+    Test case mixin asserting the number of queries run by a block and that
+    none of its reads falls back to sequential scans on `large_tables`.
+    """
+
+    large_tables = ()
+
+    @contextmanager
+    def assertQueryBudget(self, budget, msg=None):
+        with CaptureQueriesContext(connection) as context:
+            yield context
+
+        queries = [query["sql"] for query in context.captured_queries]
+        self.assertLessEqual(
+            len(queries),
+            budget,
+            "\n".join([msg or "Query budget exceeded.", *map("  {}".format, queries)]),
+        )
+        for sql in queries:
+            if not sql.startswith("SELECT"):
+                continue
+            seq_scans = get_seq_scans(explain(sql)) & set(self.large_tables)
+            self.assertFalse(
+                seq_scans,
+                f"{msg or 'Query'} scans {', '.join(sorted(seq_scans))} "
+                f"sequentially:\n  {sql}",
+            )
@@ -0,0 +1,293 @@
+import json
+import os
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+from model_bakery import baker
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from survivors.models import Gender, LocationLog, Survivor
+from .admin import EstimatedCountPaginator
+from .caching import LRUCache, SharedGenerations
+from .routers import PrimaryReplicaRouter, replica_reads
+from .tasks import consume, get_queue, task
+from .testing import QueryBudgetMixin, explain, get_seq_scans
+from .throttling import TokenBucketStore
+
+
+class PrimaryReplicaRouterTestCase(SimpleTestCase):
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+        patcher = mock.patch(
+            "utils.routers.get_replica_aliases",
+            return_value=["replica_1", "replica_2"],
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_reads_outside_replica_context_use_primary(self):
+        self.assertEqual("default", self.router.db_for_read(Survivor))
+
+    @mock.patch("utils.routers.get_replica_lag", return_value=0.0)
+    def test_reads_inside_replica_context_use_replica(self, _):
+        with replica_reads():
+            self.assertIn(self.router.db_for_read(Survivor), ["replica_1", "replica_2"])
+
+    def test_lagging_replicas_fail_over_to_primary(self):
+        lags = {"replica_1": settings.REPLICA_MAX_LAG_SECONDS + 1, "replica_2": None}
+        with mock.patch("utils.routers.get_replica_lag", side_effect=lags.get):
+            with replica_reads():
+                self.assertEqual("default", self.router.db_for_read(Survivor))
+
+    def test_writes_use_primary(self):
+        with replica_reads():
+            self.assertEqual("default", self.router.db_for_write(Survivor))
+
+
+class PrimaryStickinessMiddlewareTestCase(APITestCase):
+    def test_successful_write_pins_client_to_primary(self):
+        gender = baker.make(Gender)
+
+        res = self.client.get(reverse("survivors"))
+        self.assertNotIn(settings.REPLICA_STICKY_COOKIE_NAME, res.cookies)
+
+        res = self.client.post(
+            reverse("survivors"),
+            json.dumps({"name": "Survivor", "age": 20}),
+            content_type="application/json",
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertNotIn(settings.REPLICA_STICKY_COOKIE_NAME, res.cookies)
+
+        res = self.client.post(
+            reverse("survivors"),
+            json.dumps(
+                {
+                    "name": "Survivor",
+                    "age": 20,
+                    "gender_id": gender.id,
+                    "inventory_items": [],
+                }
+            ),
+            content_type="application/json",
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertIn(settings.REPLICA_STICKY_COOKIE_NAME, res.cookies)
+
+        with mock.patch("utils.views.replica_reads") as replica_reads_mock:
+            self.client.get(reverse("survivors"))
+        replica_reads_mock.assert_not_called()
+
+
+class EstimatedCountPaginatorTestCase(APITestCase):
+    def setUp(self):
+        baker.make(Survivor, _quantity=3)
+
+    def test_small_result_sets_are_counted_exactly(self):
+        paginator = EstimatedCountPaginator(Survivor.objects.order_by("id"), 2)
+        self.assertEqual(3, paginator.count)
+
+    def test_large_result_sets_are_estimated(self):
+        paginator = EstimatedCountPaginator(Survivor.objects.order_by("id"), 2)
+        paginator.exact_count_threshold = 0
+        estimate = paginator.get_estimated_count()
+        with self.assertNumQueries(1):
+            self.assertEqual(estimate, paginator.count)
+
+
+task_calls = []
+
+
+@task(name="utils.tests.record_call", max_retries=1)
+def record_call(value, fail_times=0):
+    task_calls.append(value)
+    if task_calls.count(value) <= fail_times:
+        raise ValueError(value)
+
+
+@task(name="utils.tests.record_batch", batched=True)
+def record_batch(values):
+    task_calls.append(sorted(values))
+
+
+class TaskPipelineTestCase(TestCase):
+    def setUp(self):
+        task_calls.clear()
+
+    def test_runs_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            record_call.delay("a")
+            self.assertEqual([], task_calls)
+
+        self.assertEqual(["a"], task_calls)
+
+    def test_skipped_on_rollback(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with transaction.atomic():
+                record_call.delay("a")
+                transaction.set_rollback(True)
+
+        self.assertEqual([], callbacks)
+        self.assertEqual([], task_calls)
+
+    def test_retries(self):
+        with self.assertLogs(
+            "utils.tasks", "WARNING"
+        ) as logs, self.captureOnCommitCallbacks(execute=True):
+            record_call.delay("a", fail_times=1)
+            record_call.delay("b", fail_times=2)
+
+        self.assertEqual(["a", "a", "b", "b"], task_calls)
+        self.assertIn(
+            "Task utils.tests.record_call failed, giving up.", logs.output[-1]
+        )
+
+    def test_batching(self):
+        queue = get_queue()
+        for values in ([1, 2], [3]):
+            queue.put(
+                {
+                    "task": "utils.tests.record_batch",
+                    "args": [values],
+                    "kwargs": {},
+                    "retries": 0,
+                }
+            )
+        queue.put(
+            {
+                "task": "utils.tests.record_call",
+                "args": ["a"],
+                "kwargs": {},
+                "retries": 0,
+            }
+        )
+        queue.close()
+
+        self.assertEqual(3, consume(10, timeout=0))
+        self.assertEqual(["a", [1, 2, 3]], task_calls)
+
+    def test_requeued_unless_run(self):
+        queue = get_queue()
+        queue.put(
+            {
+                "task": "utils.tests.record_call",
+                "args": ["a"],
+                "kwargs": {"fail_times": 1},
+                "retries": 0,
+            }
+        )
+        queue.close()
+
+        # The retry cannot be published, so the message is delivered again.
+        with self.assertLogs("utils.tasks", "WARNING"), mock.patch(
+            "utils.tasks.publish", side_effect=ConnectionError
+        ), self.assertRaises(ConnectionError):
+            consume(10, timeout=0)
+        self.assertEqual(["a"], task_calls)
+
+        self.assertEqual(1, consume(10, timeout=0))
+        self.assertEqual(["a", "a"], task_calls)
+        self.assertEqual(0, consume(10, timeout=0))
+
+
+class TokenBucketStoreTestCase(SimpleTestCase):
+    def setUp(self):
+        store_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(store_dir.cleanup)
+        self.path = os.path.join(store_dir.name, "throttle")
+        self.store = TokenBucketStore(self.path, slots=4)
+
+    def test_consume(self):
+        waits = [self.store.consume("a", rate=0.5, burst=2, now=100) for _ in range(3)]
+        self.assertEqual([0, 0, 2], waits)
+        self.assertEqual(0, self.store.consume("b", rate=0.5, burst=2, now=100))
+        self.assertEqual(1, self.store.consume("a", rate=0.5, burst=2, now=101))
+        self.assertEqual(0, self.store.consume("a", rate=0.5, burst=2, now=102))
+
+    def test_shared(self):
+        self.store.consume("a", rate=1, burst=1, now=100)
+        other_store = TokenBucketStore(self.path, slots=4)
+        self.assertEqual(1, other_store.consume("a", rate=1, burst=1, now=100))
+
+    def test_evicts_stalest(self):
+        for index in range(4):
+            self.store.consume(f"key {index}", rate=1, burst=1, now=100 + index)
+        # Keys claiming an evicted slot start empty.
+        self.assertEqual(1, self.store.consume("new", rate=1, burst=1, now=104))
+        self.assertEqual(0, self.store.consume("new", rate=1, burst=1, now=105))
+        self.assertEqual(1, self.store.consume("key 3", rate=1, burst=1, now=103))
+
+    def test_consume_all(self):
+        buckets = [("a", 1, 2), ("b", 0.5, 1)]
+        self.assertEqual(0, self.store.consume_all(buckets, now=100))
+        self.assertEqual(2, self.store.consume_all(buckets, now=100))
+        # The rejected request took no token from "a".
+        self.assertEqual(0, self.store.consume("a", rate=1, burst=2, now=100))
+        self.assertEqual(1, self.store.consume("a", rate=1, burst=2, now=100))
+
+
+class QueryBudgetMixinTestCase(QueryBudgetMixin, TestCase):
+    large_tables = [LocationLog._meta.db_table]
+
+    def test_explain(self):
+        table = LocationLog._meta.db_table
+        seq_scan = LocationLog.objects.filter(latitude=1).query
+        index_scan = LocationLog.objects.filter(created_at__gt=timezone.now()).query
+
+        self.assertEqual({table}, get_seq_scans(explain(*seq_scan.sql_with_params())))
+        self.assertEqual(set(), get_seq_scans(explain(*index_scan.sql_with_params())))
+
+    def test_budget_exceeded(self):
+        with self.assertRaisesMessage(AssertionError, "2 not less than or equal to 1"):
+            with self.assertQueryBudget(1):
+                list(Gender.objects.all())
+                list(Gender.objects.all())
+
+    def test_seq_scan(self):
+        with self.assertRaisesMessage(AssertionError, "scans survivors_locationlog"):
+            with self.assertQueryBudget(1):
+                list(LocationLog.objects.filter(latitude=1))
+
+
+class SharedGenerationsTestCase(SimpleTestCase):
+    def test_bump(self):
+        store_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(store_dir.cleanup)
+        path = os.path.join(store_dir.name, "generations")
+        generations = SharedGenerations(path, slots=1024)
+        other_generations = SharedGenerations(path, slots=1024)
+
+        self.assertEqual((0, 0), generations.get("a", "b"))
+        other_generations.bump(["a", "a"])
+        self.assertEqual((1, 0), generations.get("a", "b"))
+
+
+class LRUCacheTestCase(SimpleTestCase):
+    def test_generations(self):
+        cache = LRUCache(max_bytes=10)
+        cache.set("a", (1,), b"abc")
+
+        self.assertEqual(b"abc", cache.get("a", (1,)))
+        self.assertIsNone(cache.get("a", (2,)))
+        self.assertIsNone(cache.get("a", (1,)))
+        self.assertEqual(0, cache.size)
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(max_bytes=10)
+        cache.set("a", 0, b"aaaa")
+        cache.set("b", 0, b"bbbb")
+        cache.get("a", 0)
+        cache.set("c", 0, b"cccc")
+        cache.set("d", 0, b"d" * 11)
+
+        self.assertEqual(
+            [b"aaaa", None, b"cccc", None],
+            [cache.get(key, 0) for key in "abcd"],
+        )
+        self.assertEqual(8, cache.size)
@@ -0,0 +1,132 @@
+"""
+Token bucket throttling shared by all worker processes.
+
+Buckets live in a fixed-size hash table in a memory-mapped file (under
+``/dev/shm`` by default), so every uWSGI process and thread sees the same
+token counts without a network round trip.
+"""
+
+import fcntl
+import struct
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.throttling import BaseThrottle
+
+from .shm import open_shared_map, stable_hash
+
+
+# Key hash (0 marks a free slot), tokens left and time of the last update.
+_SLOT = struct.Struct("<Qdd")
+_PROBES = 8
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+class TokenBucketStore:
+    def __init__(self, path, slots):
+        self.slots = slots
+        self.fd, self.map = open_shared_map(path, slots * _SLOT.size)
+        # `flock` excludes other processes, threads of this one need a lock too.
+        self.lock = threading.Lock()
+
+    def consume(self, key, rate, burst, now=None):
+        """
+        Take a token from the bucket of `key`, refilled with `rate` tokens per
+        second up to `burst`. Return 0 if allowed, else seconds to wait.
+        """
+        return self.consume_all([(key, rate, burst)], now)
+
+    def consume_all(self, buckets, now=None):
+        """
+        Take a token from each of the `(key, rate, burst)` buckets if all of
+        them have one. Return 0 if allowed, else seconds to wait.
+        """
+        now = time.time() if now is None else now
+        wait = 0
+        with self.lock:
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+            try:
+                slots = []
+                for key, rate, burst in buckets:
+                    key_hash = stable_hash(key)
+                    offset, tokens, updated_at = self.find_slot(key_hash, burst, now)
+                    tokens = min(burst, tokens + max(now - updated_at, 0) * rate)
+                    if tokens < 1:
+                        wait = max(wait, (1 - tokens) / rate)
+                    # Claim the slot before the next bucket looks for one.
+                    _SLOT.pack_into(self.map, offset, key_hash, tokens, now)
+                    slots.append((offset, key_hash, tokens))
+                if not wait:
+                    for offset, key_hash, tokens in slots:
+                        _SLOT.pack_into(self.map, offset, key_hash, tokens - 1, now)
+            finally:
+                fcntl.flock(self.fd, fcntl.LOCK_UN)
+        return wait
+
+    def find_slot(self, key_hash, burst, now):
+        """
+        Return the offset and state of the slot of `key_hash`, claiming a free
+        or else the least recently used slot among its probes.
+
+        Keys start with a full bucket in a free slot but with an empty one in
+        an evicted slot, so cycling through keys cannot refill buckets.
+        """
+        stalest = None
+        for probe in range(_PROBES):
+            offset = (key_hash + probe) % self.slots * _SLOT.size
+            slot_hash, tokens, updated_at = _SLOT.unpack_from(self.map, offset)
+            if slot_hash == key_hash:
+                return offset, tokens, updated_at
+            if not slot_hash:
+                return offset, burst, now
+            if stalest is None or updated_at < stalest[1]:
+                stalest = (offset, updated_at)
+        return stalest[0], 0, now
+
+
+def get_store():
+    path = settings.THROTTLE_STORE_PATH
+    if path not in _stores:
+        with _stores_lock:
+            if path not in _stores:
+                _stores[path] = TokenBucketStore(path, settings.THROTTLE_STORE_SLOTS)
+    return _stores[path]
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Throttles requests with the buckets named by `scopes` in
+    `settings.THROTTLE_BUCKETS`, keyed by `get_keys()`. Requests take a token
+    from every bucket, and only when all of them have one.
+    """
+
+    scopes = []
+
+    def __init__(self):
+        self.buckets = [settings.THROTTLE_BUCKETS[scope] for scope in self.scopes]
+        for scope, bucket in zip(self.scopes, self.buckets):
+            if bucket["rate"] <= 0:
+                raise ImproperlyConfigured(
+                    f"Rate of the {scope!r} throttle bucket must be positive."
+                )
+
+    def get_keys(self, request, view):
+        raise NotImplementedError(".get_keys() must be overridden")
+
+    def allow_request(self, request, view):
+        self.wait_time = get_store().consume_all(
+            [
+                (f"{scope}:{key}", bucket["rate"], bucket["burst"])
+                for scope, key, bucket in zip(
+                    self.scopes, self.get_keys(request, view), self.buckets
+                )
+            ]
+        )
+        return not self.wait_time
+
+    def wait(self):
+        return self.wait_time
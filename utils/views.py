@@ -0,0 +1,150 @@
+from functools import lru_cache
+
+from django.conf import settings
+from django.http import HttpResponse
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+
+from .fastjson import compile_encoder, render_list, select_fields
+from .parsers import MessagePackParser
+from .renderers import MessagePackRenderer
+from .routers import replica_reads
+from .serializers import (
+    SparseFieldset,
+    get_field_paths,
+    get_related_lookups,
+    prune_fields,
+    use_native_datetimes,
+)
+
+
+class ReplicaReadMixin:
+    def dispatch(self, request, *args, **kwargs):
+        if (
+            request.method in SAFE_METHODS
+            and settings.REPLICA_STICKY_COOKIE_NAME not in request.COOKIES
+        ):
+            with replica_reads():
+                return super().dispatch(request, *args, **kwargs)
+        return super().dispatch(request, *args, **kwargs)
+
+
+class MessagePackMixin:
+    """
+    Accepts and renders MessagePack next to the default JSON, as selected by
+    the ``Content-Type`` and ``Accept`` headers.
+    """
+
+    parser_classes = [*api_settings.DEFAULT_PARSER_CLASSES, MessagePackParser]
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, MessagePackRenderer]
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        request = getattr(self, "request", None)
+        if isinstance(getattr(request, "accepted_renderer", None), MessagePackRenderer):
+            use_native_datetimes(serializer)
+        return serializer
+
+
+@lru_cache(maxsize=None)
+def get_declared_paths(serializer_class):
+    return frozenset(get_field_paths(serializer_class()))
+
+
+class SparseFieldsMixin:
+    """
+    Prunes read responses with ``?fields=`` and ``?expand=`` (see
+    ``SparseFieldset``). Querysets should be built with
+    ``select_related()`` so pruned relations are not joined.
+
+    Paths not declared by the serializer are ignored.
+    """
+
+    def get_fieldset(self):
+        request = getattr(self, "request", None)
+        if request is None or request.method not in SAFE_METHODS:
+            return SparseFieldset()
+        if not hasattr(self, "_fieldset"):
+            self._fieldset = SparseFieldset.from_query_params(
+                request.query_params
+            ).restrict(get_declared_paths(self.get_serializer_class()))
+        return self._fieldset
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        fieldset = self.get_fieldset()
+        if fieldset != SparseFieldset():
+            prune_fields(serializer, fieldset)
+        return serializer
+
+    def select_related(self, queryset, *lookups):
+        """
+        Apply those of the given ``select_related()`` lookups, or their
+        prefixes, that are traversed by the pruned serializer.
+        """
+        serializer = self.get_serializer_class()()
+        prune_fields(serializer, self.get_fieldset())
+        used = [
+            lookup
+            for lookup in get_related_lookups(serializer)
+            if any(
+                candidate == lookup or candidate.startswith(lookup + "__")
+                for candidate in lookups
+            )
+        ]
+        # Without arguments, `select_related()` would follow all relations.
+        return queryset.select_related(*used) if used else queryset
+
+
+@lru_cache(maxsize=256)
+def compile_fast_list(view_class, fieldset):
+    schema, lookups = select_fields(
+        view_class.fast_list_schema, view_class.fast_list_lookups, fieldset
+    )
+    try:
+        return compile_encoder(schema), lookups
+    except ValueError:
+        # The first field left can be omitted, which the encoder cannot do.
+        return None, lookups
+
+
+class FastJSONListMixin:
+    """
+    Renders plain JSON list responses from ``values_list()`` rows with a
+    precompiled encoder, bypassing the serializer. Other renderers, pagination
+    and indented output fall back to the regular serializer path.
+
+    Combined with ``SparseFieldsMixin``, an encoder is compiled for each
+    requested fieldset. Fieldsets only hold declared paths, so clients cannot
+    grow the encoder cache with made-up field names.
+    """
+
+    fast_list_schema = None
+    fast_list_lookups = None
+
+    def get_fast_list(self):
+        fieldset = (
+            self.get_fieldset() if hasattr(self, "get_fieldset") else SparseFieldset()
+        )
+        return compile_fast_list(type(self), fieldset)
+
+    def can_use_fast_list(self, request):
+        return (
+            type(request.accepted_renderer) is JSONRenderer
+            and "indent" not in request.accepted_media_type
+            and self.paginator is None
+        )
+
+    def render_fast_list(self, encoder, lookups):
+        queryset = self.filter_queryset(self.get_queryset())
+        # Without lookups, `values_list()` would select all fields.
+        return render_list(queryset.values_list(*lookups or ["pk"]), encoder)
+
+    def list(self, request, *args, **kwargs):
+        encoder, lookups = self.get_fast_list()
+        if encoder is None or not self.can_use_fast_list(request):
+            return super().list(request, *args, **kwargs)
+
+        content = self.render_fast_list(encoder, lookups)
+        return HttpResponse(content, content_type=JSONRenderer.media_type)